@@ -5,3 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'アカウント管理'
+
+    def ready(self):
+        from .audit import connect_signals
+        connect_signals()
@@ -0,0 +1,241 @@
+"""
+監査ログ（AuditLog）の記録
+
+settings.AUDIT_LOG['MODELS'] に指定したモデルの作成・更新・削除を、
+読み込み時の値（post_init で保持）との差分として記録する。差分の計算のために再読み込みはしない。
+
+- 記録はトランザクション確定後にバッファへ追加し、リクエストの終わりに1回の bulk_create でまとめて保存する
+  （AuditLogMiddleware。リクエスト外では audit_buffer() で囲むとまとめて保存、囲まなければ確定ごとに保存）
+- ロールバックされた変更は記録しない
+- モデルごとに記録する操作・除外フィールド・サンプリング率を指定できる
+- QuerySet.update() / bulk_create() など save() を経由しない変更は記録されない
+  （bulk_update() / bulk_create() したインスタンスは record_instances() で記録できる）
+"""
+import contextvars
+import datetime
+import decimal
+import ipaddress
+import logging
+import random
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ('create', 'update', 'delete')
+
+# リクエスト（または audit_buffer()）ごとの保存待ちの AuditLog
+_buffer = contextvars.ContextVar('audit_log_buffer', default=None)
+
+
+def _config(name, default):
+    return getattr(settings, 'AUDIT_LOG', {}).get(name, default)
+
+
+def model_policy(model):
+    """モデルの記録方針（対象外なら None）"""
+    if not _config('ENABLED', True):
+        return None
+    return _config('MODELS', {}).get(model._meta.label)
+
+
+@lru_cache(maxsize=None)
+def _tracked_fields(model, excluded):
+    return tuple(
+        (field.name, field.attname) for field in model._meta.concrete_fields
+        if not field.primary_key
+        and field.name not in excluded and field.attname not in excluded
+        and field.get_internal_type() != 'BinaryField'
+    )
+
+
+def tracked_fields(model, policy):
+    """差分を記録するフィールドの (name, attname) の一覧"""
+    excluded = frozenset(_config('EXCLUDE_FIELDS', ())) | frozenset(policy.get('exclude_fields', ()))
+    return _tracked_fields(model, excluded)
+
+
+def _json_value(value):
+    """JSONField に保存できる値に変換する"""
+    if value is None or isinstance(value, (bool, int, float, str, list, dict)):
+        return value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, 'name') and hasattr(value, 'storage'):
+        # FieldFile
+        return value.name or ''
+    return str(value)
+
+
+def _should_record(policy, action):
+    if action not in policy.get('actions', ACTIONS):
+        return False
+    rate = policy.get('sample_rate', _config('SAMPLE_RATE', 1.0))
+    return rate >= 1 or random.random() < rate
+
+
+def _current_values(instance, fields):
+    values = instance.__dict__
+    return {attname: values[attname] for _, attname in fields if attname in values}
+
+
+# --- シグナルハンドラ ---
+
+def remember_original(sender, instance, **kwargs):
+    """読み込み時（生成時）の値を保持する（遅延読み込みのフィールドは含めない）"""
+    policy = model_policy(sender)
+    if policy is not None:
+        instance._audit_original = _current_values(instance, tracked_fields(sender, policy))
+
+
+def record_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    policy = model_policy(sender)
+    if policy is None or raw:
+        return
+    fields = tracked_fields(sender, policy)
+    current = _current_values(instance, fields)
+    original = getattr(instance, '_audit_original', None) or {}
+
+    action = 'create' if created else 'update'
+    if _should_record(policy, action):
+        if created:
+            changes = {name: _json_value(current[attname]) for name, attname in fields if attname in current}
+        else:
+            changes = {}
+            for name, attname in fields:
+                if update_fields is not None and name not in update_fields and attname not in update_fields:
+                    continue
+                if attname not in current or attname not in original:
+                    continue
+                old, new = _json_value(original[attname]), _json_value(current[attname])
+                if old != new:
+                    changes[name] = [old, new]
+        if changes:
+            record(instance, action, changes, policy)
+
+    # 同じインスタンスを続けて保存した場合は、保存後の値との差分を記録する
+    original.update(current)
+    instance._audit_original = original
+
+
+def record_delete(sender, instance, **kwargs):
+    policy = model_policy(sender)
+    if policy is None or not _should_record(policy, 'delete'):
+        return
+    fields = tracked_fields(sender, policy)
+    values = _current_values(instance, fields)
+    changes = {name: _json_value(values[attname]) for name, attname in fields if attname in values}
+    record(instance, 'delete', changes, policy)
+
+
+def record_instances(model, instances, created=False, update_fields=None):
+    """save() を経由せずに保存したインスタンス（bulk_create / bulk_update）の作成・差分を記録する"""
+    for instance in instances:
+        record_save(model, instance, created, update_fields=update_fields)
+
+
+def connect_signals():
+    """settings.AUDIT_LOG['MODELS'] のモデルにシグナルハンドラを登録する（AccountsConfig.ready() から呼ぶ）"""
+    for label in _config('MODELS', {}):
+        model = apps.get_model(label)
+        post_init.connect(remember_original, sender=model, dispatch_uid=f'audit_original_{label}')
+        post_save.connect(record_save, sender=model, dispatch_uid=f'audit_save_{label}')
+        post_delete.connect(record_delete, sender=model, dispatch_uid=f'audit_delete_{label}')
+
+
+# --- 記録と保存 ---
+
+def record(instance, action, changes, policy=None):
+    """AuditLog を作成し、トランザクション確定後に保存待ちにする"""
+    from .models import AuditLog
+
+    policy = policy or {}
+    repr_field = policy.get('repr_field')
+    entry = AuditLog(
+        model_name=instance._meta.label,
+        object_id=instance.pk,
+        object_repr=str(getattr(instance, repr_field, '') or '')[:200] if repr_field else '',
+        action=action,
+        changes=changes,
+    )
+    transaction.on_commit(lambda: _committed(entry))
+
+
+def _committed(entry):
+    buffer = _buffer.get()
+    if buffer is not None:
+        buffer.append(entry)
+    else:
+        flush([entry])
+
+
+def flush(entries, actor=None, ip_address=None):
+    """保存待ちの AuditLog を1回の bulk_create で保存する（失敗しても本処理には影響させない）"""
+    if not entries:
+        return
+    from .models import AuditLog
+
+    for entry in entries:
+        if entry.actor_id is None and actor is not None:
+            entry.actor = actor
+        if entry.ip_address is None:
+            entry.ip_address = ip_address
+    try:
+        AuditLog.objects.bulk_create(entries, batch_size=_config('BATCH_SIZE', 500))
+    except Exception:
+        logger.exception(f'Failed to write {len(entries)} audit log entries')
+
+
+@contextmanager
+def audit_buffer(actor=None, ip_address=None):
+    """ブロック内で確定した変更の監査ログをまとめ、終了時に保存する"""
+    entries = []
+    token = _buffer.set(entries)
+    try:
+        yield entries
+    finally:
+        _buffer.reset(token)
+        flush(entries, actor=actor, ip_address=ip_address)
+
+
+def client_ip(request):
+    """リクエスト元の IP アドレス（プロキシ経由の場合は X-Forwarded-For の先頭）"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    candidate = forwarded.split(',')[0].strip() if forwarded else request.META.get('REMOTE_ADDR', '')
+    try:
+        return str(ipaddress.ip_address(candidate))
+    except ValueError:
+        return None
+
+
+class AuditLogMiddleware:
+    """リクエスト中に確定した変更の監査ログを、レスポンス後に1回の bulk_create で保存する
+
+    実行者は認証後の request.user（DRF の JWT 認証は HttpRequest.user にも反映される）。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        entries = []
+        token = _buffer.set(entries)
+        try:
+            return self.get_response(request)
+        finally:
+            _buffer.reset(token)
+            if entries:
+                user = getattr(request, 'user', None)
+                flush(
+                    entries,
+                    actor=user if user is not None and user.is_authenticated else None,
+                    ip_address=client_ip(request),
+                )
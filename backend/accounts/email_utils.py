@@ -2,19 +2,35 @@
 追跡可能なメール送信ユーティリティ
 
 全てのメール送信を EmailLog に記録し、送信結果を追跡可能にする。
-失敗時はログに記録し、管理コマンドでリトライ可能。
+
+EmailLog の status='pending' の行がそのまま送信キューとなる。
+リクエスト処理では行を作成するだけで SMTP には接続せず、
+send_queued_emails ワーカーが process_email_queue() でまとめて送信する。
+失敗時は指数バックオフで再送し、max_retries に達したら 'failed' とする。
 """
 
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _queue_config(name, default):
+    return getattr(settings, 'EMAIL_QUEUE', {}).get(name, default)
+
+
 def send_tracked_email(email_type, to_email, subject, body, related_user=None, from_email=None):
     """追跡可能なメール送信
-    
+
+    送信キューが有効な場合（settings.EMAIL_QUEUE['ENABLED']）は EmailLog を pending で作成して即座に返す。
+    実際の送信は send_queued_emails ワーカーが行う。
+
     Args:
         email_type: メールの種類 ('password_reset', 'shelter_registration', etc.)
         to_email: 送信先メールアドレス
@@ -22,17 +38,17 @@ def send_tracked_email(email_type, to_email, subject, body, related_user=None, f
         body: 本文
         related_user: 関連ユーザー（任意）
         from_email: 送信元メールアドレス（デフォルト: settings.DEFAULT_FROM_EMAIL）
-    
+
     Returns:
         tuple: (success: bool, email_log: EmailLog)
+        キュー有効時の success は「キューに登録できたか」を表す
     """
     from .models import EmailLog
-    from django.conf import settings
-    
+
     if from_email is None:
         from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
-    
-    # ログレコードを作成（pending状態）
+
+    # ログレコードを作成（pending状態 = 送信待ち）
     log = EmailLog.objects.create(
         email_type=email_type,
         to_email=to_email,
@@ -42,7 +58,11 @@ def send_tracked_email(email_type, to_email, subject, body, related_user=None, f
         related_user=related_user,
         status='pending',
     )
-    
+
+    if _queue_config('ENABLED', False):
+        logger.info(f"Email queued: type={email_type}, to={to_email}, log_id={log.id}")
+        return True, log
+
     try:
         send_mail(subject, body, from_email, [to_email])
         log.status = 'sent'
@@ -56,3 +76,98 @@ def send_tracked_email(email_type, to_email, subject, body, related_user=None, f
         log.save(update_fields=['status', 'error_message'])
         logger.error(f"Email send failed: type={email_type}, to={to_email}, error={e}, log_id={log.id}")
         return False, log
+
+
+def retry_delay(retry_count):
+    """retry_count 回目の失敗後の待ち時間（指数バックオフ）"""
+    base = _queue_config('RETRY_BASE_SECONDS', 60)
+    maximum = _queue_config('RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * (2 ** max(retry_count - 1, 0)), maximum))
+
+
+def process_email_queue(batch_size=None):
+    """送信待ちのメールを1バッチ分送信する
+
+    1. 送信予定日時を過ぎた pending 行を SELECT ... FOR UPDATE SKIP LOCKED で確保し、
+       next_attempt_at を CLAIM_SECONDS 後に進めてすぐにコミットする（確保中は他のワーカーが取得しない）
+    2. トランザクションの外で、バッチ内のメールを1本の SMTP 接続で送信する
+    3. 1通ごとに送信結果を1行の UPDATE で記録する
+
+    SMTP の送信中は行ロックを保持しない。送信後・記録前にワーカーが停止した場合に限り、
+    確保期限の経過後にそのメールを再送することがある（記録済みのメールは再送しない）。
+    SMTP に接続できない場合は確保した全件を1回の失敗として扱い、指数バックオフで再送を待つ。
+
+    Returns:
+        tuple: (sent: int, failed: int, deferred: int)
+        送信成功・リトライ上限で失敗確定・再送待ちの件数。キューが空なら (0, 0, 0)
+    """
+    from .models import EmailLog
+
+    batch_size = batch_size or _queue_config('BATCH_SIZE', 50)
+    now = timezone.now()
+
+    with transaction.atomic():
+        logs = list(
+            EmailLog.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by('created_at')[:batch_size]
+        )
+        if not logs:
+            return 0, 0, 0
+        claimed_until = now + timedelta(seconds=_queue_config('CLAIM_SECONDS', 600))
+        EmailLog.objects.filter(pk__in=[log.pk for log in logs]).update(next_attempt_at=claimed_until)
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Email queue: SMTP connection failed: {e}")
+        for log in logs:
+            failed += _record_failure(log, e)
+        return 0, failed, len(logs) - failed
+
+    try:
+        for log in logs:
+            try:
+                EmailMessage(
+                    log.subject, log.body, log.from_email, [log.to_email],
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                failed += _record_failure(log, e)
+            else:
+                EmailLog.objects.filter(pk=log.pk).update(
+                    status='sent', sent_at=timezone.now(), next_attempt_at=None,
+                )
+                sent += 1
+    finally:
+        connection.close()
+
+    deferred = len(logs) - sent - failed
+    logger.info(f"Email queue: sent={sent}, failed={failed}, deferred={deferred}")
+    return sent, failed, deferred
+
+
+def _record_failure(log, error):
+    """送信失敗を記録する（リトライ上限に達したら 'failed'。失敗確定なら 1 を返す）"""
+    from .models import EmailLog
+
+    log.retry_count += 1
+    log.error_message = str(error)
+    if log.retry_count >= log.max_retries:
+        log.status = 'failed'
+        log.next_attempt_at = None
+    else:
+        log.next_attempt_at = timezone.now() + retry_delay(log.retry_count)
+    EmailLog.objects.filter(pk=log.pk).update(
+        status=log.status, retry_count=log.retry_count,
+        error_message=log.error_message, next_attempt_at=log.next_attempt_at,
+    )
+    logger.error(
+        f"Email send failed: type={log.email_type}, to={log.to_email}, "
+        f"error={error}, log_id={log.id}, retry_count={log.retry_count}"
+    )
+    return int(log.status == 'failed')
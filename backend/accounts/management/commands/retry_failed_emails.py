@@ -1,22 +1,23 @@
 """
-失敗したメールを再送信する管理コマンド
+失敗したメールを送信キューに戻す管理コマンド
+
+送信自体は send_queued_emails ワーカーが行う。
+--send を指定した場合はこのコマンド内でキューを処理する。
 
 Usage:
     python manage.py retry_failed_emails
     python manage.py retry_failed_emails --max-retries 5
+    python manage.py retry_failed_emails --send
 """
 
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.utils import timezone
-from django.db import models
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = '失敗したメールを再送信する'
+    help = '失敗したメールを再送信キューに戻す'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -25,52 +26,48 @@ class Command(BaseCommand):
             default=3,
             help='最大リトライ回数 (デフォルト: 3)',
         )
+        parser.add_argument(
+            '--send',
+            action='store_true',
+            help='キューに戻した後、このコマンド内で送信まで行う',
+        )
 
     def handle(self, *args, **options):
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        from accounts.email_utils import process_email_queue
         from accounts.models import EmailLog
-        
+
         max_retries = options['max_retries']
-        
-        failed_emails = EmailLog.objects.filter(
+
+        # 1回分の再送枠を確保した上で pending に戻す（UPDATE 1回）
+        requeued = EmailLog.objects.filter(
             status='failed',
             retry_count__lt=max_retries,
-        ).order_by('created_at')
-        
-        total = failed_emails.count()
-        if total == 0:
+        ).update(
+            status='pending',
+            next_attempt_at=None,
+            max_retries=Greatest(F('max_retries'), F('retry_count') + Value(1)),
+        )
+
+        if requeued == 0:
             self.stdout.write(self.style.SUCCESS('再送信が必要なメールはありません。'))
             return
-        
-        self.stdout.write(f'{total} 件の失敗メールを再送信します...')
-        
+
+        self.stdout.write(f'{requeued} 件の失敗メールを再送信キューに戻しました。')
+
+        if not options['send']:
+            return
+
         success_count = 0
         fail_count = 0
-        
-        for log in failed_emails:
-            try:
-                send_mail(
-                    log.subject,
-                    log.body,
-                    log.from_email,
-                    [log.to_email],
-                )
-                log.status = 'sent'
-                log.sent_at = timezone.now()
-                log.retry_count = models.F('retry_count') + 1
-                log.save(update_fields=['status', 'sent_at', 'retry_count'])
-                success_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'  ✓ {log.to_email} ({log.email_type})')
-                )
-            except Exception as e:
-                log.retry_count = models.F('retry_count') + 1
-                log.error_message = str(e)
-                log.save(update_fields=['retry_count', 'error_message'])
-                fail_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'  ✗ {log.to_email} ({log.email_type}): {e}')
-                )
-        
+        while True:
+            sent, failed, deferred = process_email_queue()
+            if not (sent or failed or deferred):
+                break
+            success_count += sent
+            fail_count += failed
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'\n完了: 成功 {success_count} 件, 失敗 {fail_count} 件'
@@ -0,0 +1,78 @@
+"""
+送信キュー（EmailLog の pending 行）のメールを送信するワーカー
+
+Usage:
+    python manage.py send_queued_emails            # 常駐してキューを監視
+    python manage.py send_queued_emails --once     # キューを空にして終了（cron 用）
+    python manage.py send_queued_emails --batch-size 100 --interval 5
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '送信キューのメールを送信する'
+
+    def add_arguments(self, parser):
+        queue = getattr(settings, 'EMAIL_QUEUE', {})
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='キューが空になったら終了する',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=queue.get('BATCH_SIZE', 50),
+            help='1バッチあたりの送信件数',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=queue.get('POLL_INTERVAL', 2),
+            help='キューが空のときのポーリング間隔（秒）',
+        )
+
+    def handle(self, *args, **options):
+        from accounts.email_utils import process_email_queue
+
+        batch_size = options['batch_size']
+        interval = options['interval']
+        total_sent = total_failed = 0
+
+        if not options['once']:
+            self.stdout.write(f'メール送信ワーカーを開始しました（batch={batch_size}, interval={interval}s）')
+
+        while True:
+            close_old_connections()
+            try:
+                sent, failed, deferred = process_email_queue(batch_size)
+            except Exception as e:
+                # DB エラーなど: 確保済みの行は確保期限（CLAIM_SECONDS）の経過後に再試行される。
+                # SMTP に接続できない場合は process_email_queue() が行ごとにバックオフを記録する
+                logger.exception(f"Email queue batch failed: {e}")
+                if options['once']:
+                    raise
+                time.sleep(interval)
+                continue
+
+            total_sent += sent
+            total_failed += failed
+            if sent or failed or deferred:
+                self.stdout.write(f'送信 {sent} 件, 失敗 {failed} 件, 再送待ち {deferred} 件')
+                continue
+
+            if options['once']:
+                break
+            time.sleep(interval)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'完了: 送信 {total_sent} 件, 失敗 {total_failed} 件')
+        )
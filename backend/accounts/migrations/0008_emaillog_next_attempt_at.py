@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_is_email_verified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='送信キューのリトライ待ち（指数バックオフ）。NULL は即時送信対象', null=True, verbose_name='次回送信予定日時'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='accounts_em_status_43dcd3_idx'),
+        ),
+    ]
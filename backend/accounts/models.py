@@ -280,10 +280,11 @@ class ApplicantProfile(models.Model):
 
 
 class EmailLog(models.Model):
-    """メール送信ログ
+    """メール送信ログ（送信キューを兼ねる）
     
     全てのメール送信を記録し、管理画面から送信結果を追跡可能にする。
-    失敗時はリトライ管理コマンドで再送信可能。
+    status='pending' の行が送信キューとなり、send_queued_emails ワーカーが送信する。
+    失敗時は指数バックオフでリトライし、上限到達で 'failed' となる。
     """
     
     STATUS_CHOICES = [
@@ -336,6 +337,12 @@ class EmailLog(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name='送信日時')
     retry_count = models.PositiveSmallIntegerField(default=0, verbose_name='リトライ回数')
     max_retries = models.PositiveSmallIntegerField(default=3, verbose_name='最大リトライ回数')
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='次回送信予定日時',
+        help_text='送信キューのリトライ待ち（指数バックオフ）。NULL は即時送信対象'
+    )
     
     class Meta:
         verbose_name = 'メール送信ログ'
@@ -343,6 +350,7 @@ class EmailLog(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'next_attempt_at']),
             models.Index(fields=['email_type']),
             models.Index(fields=['to_email']),
         ]
@@ -37,12 +37,8 @@ class IsShelterOwner(permissions.BasePermission):
             return False
         
         # この猫の所属団体のスタッフかチェック
-        from shelters.models import ShelterUser
-        return ShelterUser.objects.filter(
-            shelter=obj.shelter,
-            user=request.user,
-            is_active=True
-        ).exists()
+        from shelters.membership import get_membership
+        return get_membership(request).is_member(obj.shelter_id)
 
 
 class IsApplicationParty(permissions.BasePermission):
@@ -53,16 +49,12 @@ class IsApplicationParty(permissions.BasePermission):
             return False
         
         # 応募者本人
-        if obj.applicant == request.user:
+        if obj.applicant_id == request.user.id:
             return True
         
         # 団体スタッフ
         if request.user.user_type == 'shelter':
-            from shelters.models import ShelterUser
-            return ShelterUser.objects.filter(
-                shelter=obj.shelter,
-                user=request.user,
-                is_active=True
-            ).exists()
+            from shelters.membership import get_membership
+            return get_membership(request).is_member(obj.shelter_id)
         
         return False
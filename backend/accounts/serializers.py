@@ -6,7 +6,7 @@ from .models import ApplicantProfile
 User = get_user_model()
 
 
-from shelters.models import ShelterUser
+from shelters.membership import get_membership
 
 class ApplicantProfileSerializer(serializers.ModelSerializer):
     """応募者プロフィールシリアライザー"""
@@ -48,29 +48,34 @@ class UserPrivateSerializer(serializers.ModelSerializer):
         # GET用として安全性を確保（万が一更新に使われても重要項目は不可）
         read_only_fields = ['id', 'username', 'email', 'user_type', 'created_at']
 
+    def _membership(self, obj):
+        # shelter_role / shelter_info で同じ所属情報を使う（ユーザーごとに1回だけ取得）
+        if not hasattr(self, '_memberships'):
+            self._memberships = {}
+        if obj.pk not in self._memberships:
+            self._memberships[obj.pk] = get_membership(self.context.get('request'), user=obj)
+        return self._memberships[obj.pk]
+
     def get_shelter_role(self, obj):
         if obj.user_type != 'shelter':
             return None
             
-        shelter_user = ShelterUser.objects.filter(user=obj, is_active=True).first()
-        if shelter_user:
-            return shelter_user.role
-        return None
+        return self._membership(obj).primary_role
 
     def get_shelter_info(self, obj):
         if obj.user_type != 'shelter':
             return None
             
-        shelter_user = ShelterUser.objects.filter(user=obj, is_active=True).first()
-        if shelter_user:
+        shelter = self._membership(obj).primary_shelter
+        if shelter:
             return {
-                'id': shelter_user.shelter.id,
-                'name': shelter_user.shelter.name,
-                'prefecture': shelter_user.shelter.prefecture,
-                'city': shelter_user.shelter.city,
-                'address': shelter_user.shelter.address,
-                'verification_status': shelter_user.shelter.verification_status,
-                'review_message': shelter_user.shelter.review_message,
+                'id': shelter.id,
+                'name': shelter.name,
+                'prefecture': shelter.prefecture,
+                'city': shelter.city,
+                'address': shelter.address,
+                'verification_status': shelter.verification_status,
+                'review_message': shelter.review_message,
             }
         return None
 
@@ -0,0 +1,72 @@
+"""
+メール送信キュー（process_email_queue）のテスト
+
+- 確保した行はコミット後に送信し、送信中は他のワーカーが取得しない
+- 送信結果は1通ごとに記録する
+- SMTP に接続できない場合は行ごとに再送を待つ
+"""
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .email_utils import process_email_queue, send_tracked_email
+from .models import EmailLog
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_QUEUE={'ENABLED': True, 'BATCH_SIZE': 50, 'RETRY_BASE_SECONDS': 60, 'RETRY_MAX_SECONDS': 3600},
+)
+class EmailQueueTests(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            send_tracked_email('other', f'user{i}@example.com', '件名', '本文')
+
+    def test_sends_outside_claim_transaction(self):
+        from django.db import connection
+
+        seen = []
+        original_send = mail.EmailMessage.send
+
+        def send(message, *args, **kwargs):
+            # 送信中は確保済み（トランザクション外）で、別のワーカーは同じ行を取得しない
+            seen.append((len(connection.atomic_blocks), process_email_queue()))
+            log = EmailLog.objects.get(to_email=message.to[0])
+            self.assertEqual(log.status, 'pending')
+            self.assertGreater(log.next_attempt_at, timezone.now())
+            return original_send(message, *args, **kwargs)
+
+        depth = len(connection.atomic_blocks)  # TestCase 自体のトランザクション
+        with mock.patch('accounts.email_utils.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(process_email_queue(), (3, 0, 0))
+        self.assertEqual({blocks for blocks, _ in seen}, {depth})
+        self.assertEqual({result for _, result in seen}, {(0, 0, 0)})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(EmailLog.objects.filter(status='sent', next_attempt_at=None).count(), 3)
+
+    def test_records_each_result(self):
+        def send(message, *args, **kwargs):
+            if message.to == ['user1@example.com']:
+                raise OSError('mailbox unavailable')
+            return 1
+
+        with mock.patch('accounts.email_utils.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(process_email_queue(), (2, 0, 1))
+        failed = EmailLog.objects.get(to_email='user1@example.com')
+        self.assertEqual((failed.status, failed.retry_count), ('pending', 1))
+        self.assertEqual(failed.error_message, 'mailbox unavailable')
+        self.assertEqual(EmailLog.objects.filter(status='sent').count(), 2)
+
+    def test_defers_each_row_when_connection_fails(self):
+        with mock.patch('accounts.email_utils.get_connection') as get_connection:
+            get_connection.return_value.open.side_effect = OSError('connection refused')
+            self.assertEqual(process_email_queue(), (0, 0, 3))
+        for log in EmailLog.objects.all():
+            self.assertEqual((log.status, log.retry_count), ('pending', 1))
+            self.assertGreater(log.next_attempt_at, timezone.now())
+        # バックオフ中は再試行しない
+        self.assertEqual(process_email_queue(), (0, 0, 0))
+        self.assertEqual(len(mail.outbox), 0)
@@ -321,15 +321,14 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         user = request.user
         data = self.get_serializer(user).data
 
-        from shelters.models import ShelterUser
-        shelter_membership = ShelterUser.objects.filter(
-            user=user, is_active=True
-        ).select_related('shelter').first()
-
-        if shelter_membership:
-            data['shelter_status'] = shelter_membership.shelter.verification_status
-            data['shelter_id'] = shelter_membership.shelter.id
-            data['shelter_name'] = shelter_membership.shelter.name
+        # シリアライザー（shelter_info）と同じ所属情報を使う
+        from shelters.membership import get_membership
+        shelter = get_membership(request).primary_shelter
+
+        if shelter:
+            data['shelter_status'] = shelter.verification_status
+            data['shelter_id'] = shelter.id
+            data['shelter_name'] = shelter.name
         else:
             data['shelter_status'] = None
             data['shelter_id'] = None
@@ -79,6 +79,14 @@ class ApplicationAdmin(admin.ModelAdmin):
         
         return qs.none()
     
+    def save_model(self, request, obj, form, change):
+        """ステータス変更の履歴（ApplicationEvent）に管理画面の操作者を記録する"""
+        from .events import actor_type_for, event_batch
+
+        actor_type = actor_type_for(request.user, request.user.user_type == 'shelter')
+        with event_batch(actor=request.user, actor_type=actor_type):
+            super().save_model(request, obj, form, change)
+
     def has_add_permission(self, request):
         """追加権限：管理者と一般ユーザーのみ"""
         if request.user.is_superuser or request.user.user_type in ['admin', 'adopter']:
@@ -0,0 +1,97 @@
+"""
+応募イベント（ApplicationEvent）の記録
+
+応募の作成・ステータス変更・アーカイブ・猫ステータスの自動同期を応募の履歴として記録する。
+
+    with transaction.atomic(), event_batch(actor=request.user, actor_type='shelter'):
+        application.status = 'trial'
+        application.save()      # status_changed イベントを記録
+
+- event_batch() の中で発生したイベントはまとめて保持し、ブロックの終わりに1回の bulk_create で保存する。
+  transaction.atomic() の内側で使うと応募の更新と同じトランザクションで保存され、ロールバック時はイベントも残らない
+- event_batch() の外で発生したイベントは1件ずつ保存する（実行者は system）
+- QuerySet.update() での一括変更は ApplicationQuerySet.transition() を使うとイベントも記録される
+"""
+import contextvars
+from contextlib import contextmanager
+
+# 保存待ちのイベントと実行者（event_batch() ごと）
+_batch = contextvars.ContextVar('application_event_batch', default=None)
+
+# actor 省略の目印（event_batch() の実行者を使う）
+_DEFAULT = object()
+
+
+class EventBatch:
+    def __init__(self, actor=None, actor_type='system'):
+        self.actor = actor
+        self.actor_type = actor_type
+        self.events = []
+
+
+def actor_type_for(user, is_shelter_member=False):
+    """ユーザーの立場に対応する実行者種別（管理者 > 団体メンバー > 応募者）"""
+    if user.is_superuser or user.user_type == 'admin':
+        return 'admin'
+    if is_shelter_member:
+        return 'shelter'
+    return 'user'
+
+
+def emit(application_id, event_type, *, from_status=None, to_status=None, note='',
+         actor=_DEFAULT, actor_type=None):
+    """イベントを1件記録する（event_batch() の中ではブロックの終わりにまとめて保存）
+
+    actor / actor_type を省略した場合は event_batch() の実行者を使う。
+    actor_type='system' を指定した場合は実行者を記録しない。
+    """
+    from .models import ApplicationEvent
+
+    batch = _batch.get()
+    if actor_type is None:
+        actor_type = batch.actor_type if batch else 'system'
+    if actor is _DEFAULT:
+        actor = batch.actor if batch and actor_type != 'system' else None
+
+    event = ApplicationEvent(
+        application_id=application_id,
+        event_type=event_type,
+        from_status=from_status,
+        to_status=to_status,
+        actor_type=actor_type,
+        actor=actor,
+        note=note,
+    )
+    if batch is not None:
+        batch.events.append(event)
+    else:
+        event.save()
+    return event
+
+
+def status_changed(application_id, from_status, to_status, **kwargs):
+    return emit(application_id, 'status_changed', from_status=from_status, to_status=to_status, **kwargs)
+
+
+@contextmanager
+def event_batch(actor=None, actor_type=None):
+    """ブロック内のイベントをまとめ、正常終了時に1回の bulk_create で保存する
+
+    actor_type を省略した場合、外側の event_batch() があればそれに合流する（外側でまとめて保存）。
+    例外で抜けた場合は保存しない（外側のトランザクションもロールバックされる前提）。
+    """
+    from .models import ApplicationEvent
+
+    outer = _batch.get()
+    if outer is not None and actor_type is None:
+        yield outer
+        return
+
+    batch = EventBatch(actor, actor_type or 'system')
+    token = _batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _batch.reset(token)
+    if batch.events:
+        ApplicationEvent.objects.bulk_create(batch.events)
@@ -0,0 +1,254 @@
+"""
+応募・メッセージの書き出し（CSV / JSONL）
+
+保護団体が受け取った応募（応募者の連絡先・プロフィール・同意事項を含む）とチャットの履歴を
+表計算ソフトで扱えるファイルとして書き出す。GET /api/applications/export/ と /api/messages/export/ から使う。
+
+- 主キー順に CHUNK_SIZE 件ずつ読み込み（pk > 前回の最後の pk のキーセット方式）、読み込んだ分から送る。
+  QuerySet.iterator() はサーバーサイドカーソルの無い MySQL では結果全体を読み込むため使わない。
+  各チャンクは短いクエリで、長いトランザクションやカーソルを保持しない
+- 書き出し開始時点の最大の pk までを対象にする（書き出し中に増えた行は含めない）
+- 値は values_list() で読み込み、モデルインスタンスやシリアライザーは作らない
+- CSV は Excel で開けるよう BOM 付き UTF-8。見出しは項目名、選択肢は表示名、真偽値は はい / いいえ
+- CSV で数式として解釈される文字（= + - @ タブ 改行）で始まる文字列は先頭に ' を付ける（CSV インジェクション対策）
+- JSONL は1行に1件。キーはフィールド名（応募者などは入れ子のオブジェクト）、選択肢は値
+- ASGI では非同期のイテレーターで返す（同期のイテレーターは Django が全体を読み込んでから送るため）
+"""
+import csv
+import datetime
+import io
+import json
+
+from django.utils import timezone
+
+from cats.models import Cat
+from shelters.models import Shelter
+from .models import Application, Message
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json で書き出す
+    orjson = None
+
+CHUNK_SIZE = 1000
+
+# 表計算ソフトが数式として解釈する先頭文字
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+FORMATS = ('csv', 'jsonl')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# 応募者の情報（UserPrivateSerializer のうち、画像・アカウントのセキュリティ設定・所属団体を除いた項目）
+APPLICANT_FIELDS = (
+    'id', 'username', 'email', 'phone_number', 'address', 'user_type', 'bio', 'created_at', 'is_email_verified',
+)
+
+# 応募時の同意事項・追加情報
+CONSENT_FIELDS = (
+    'term_agreement', 'lifelong_care_agreement', 'spay_neuter_agreement', 'medical_cost_understanding',
+    'income_status', 'emergency_contact_available', 'family_consent', 'allergy_status',
+    'cafe_data_sharing_consent',
+)
+
+
+class Column:
+    """書き出す列（key は JSONL のキー。'.' 区切りで入れ子にする）"""
+
+    def __init__(self, key, path, field, label):
+        self.key = key
+        self.path = path
+        self.label = label
+        self.choices = dict(field.flatchoices) if field.choices else None
+        self.is_boolean = field.get_internal_type() == 'BooleanField'
+
+    def csv_value(self, value):
+        if value is None:
+            return ''
+        if self.is_boolean:
+            return 'はい' if value else 'いいえ'
+        if self.choices is not None:
+            return self.choices.get(value, value)
+        if isinstance(value, datetime.datetime):
+            return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            return "'" + value
+        return value
+
+    def json_value(self, value):
+        if isinstance(value, datetime.datetime):
+            return timezone.localtime(value).isoformat()
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        return value
+
+
+def columns_for(model, names, key='', path='', label=''):
+    """model のフィールド names の列（key・path・label は関連先の接頭辞）"""
+    columns = []
+    for name in names:
+        field = model._meta.get_field(name)
+        columns.append(Column(
+            f'{key}.{name}' if key else name,
+            f'{path}__{name}' if path else name,
+            field,
+            f'{label} {field.verbose_name}' if label else str(field.verbose_name),
+        ))
+    return columns
+
+
+def application_columns():
+    from accounts.models import ApplicantProfile, User
+    from accounts.serializers import ApplicantProfileSerializer
+
+    return [
+        *columns_for(Application, ('id', 'applied_at', 'updated_at', 'status')),
+        *columns_for(Shelter, ('id', 'name'), 'shelter', 'shelter', '保護団体'),
+        *columns_for(Cat, ('id', 'name'), 'cat', 'cat', '保護猫'),
+        *columns_for(User, APPLICANT_FIELDS, 'applicant', 'applicant', '応募者'),
+        *columns_for(
+            ApplicantProfile, ApplicantProfileSerializer.Meta.fields,
+            'applicant.applicant_profile', 'applicant__applicant_profile', '応募者',
+        ),
+        *columns_for(Application, CONSENT_FIELDS),
+        *columns_for(Application, ('message',)),
+    ]
+
+
+def message_columns():
+    from accounts.models import User
+
+    return [
+        *columns_for(Message, ('id', 'created_at', 'read_at', 'sender_type')),
+        *columns_for(User, ('id', 'username'), 'sender', 'sender', '送信者'),
+        *columns_for(Message, ('content',)),
+        *columns_for(Application, ('id', 'status'), 'application', 'application', '応募'),
+        *columns_for(Cat, ('id', 'name'), 'application.cat', 'application__cat', '保護猫'),
+        *columns_for(User, ('id', 'username'), 'application.applicant', 'application__applicant', '応募者'),
+    ]
+
+
+def day_range(date_from=None, date_to=None):
+    """日付（両端を含む）を日時の範囲の条件に変換する（__date ではインデックスが使われないため）"""
+    conditions = {}
+    if date_from:
+        conditions['gte'] = timezone.make_aware(datetime.datetime.combine(date_from, datetime.time.min))
+    if date_to:
+        next_day = date_to + datetime.timedelta(days=1)
+        conditions['lt'] = timezone.make_aware(datetime.datetime.combine(next_day, datetime.time.min))
+    return conditions
+
+
+def application_queryset(shelter_ids, statuses=None, date_from=None, date_to=None):
+    """団体が受け取った応募（一覧と同じく団体側で非表示にしたものを除く。日付は応募日）"""
+    queryset = Application.objects.filter(shelter_id__in=shelter_ids, is_hidden_by_shelter=False)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    for lookup, value in day_range(date_from, date_to).items():
+        queryset = queryset.filter(**{f'applied_at__{lookup}': value})
+    return queryset
+
+
+def message_queryset(shelter_ids, application_id=None, statuses=None, date_from=None, date_to=None):
+    """団体が受け取った応募のメッセージ（statuses は応募のステータス。日付は送信日）"""
+    queryset = Message.objects.filter(application__shelter_id__in=shelter_ids)
+    if application_id is not None:
+        queryset = queryset.filter(application_id=application_id)
+    if statuses:
+        queryset = queryset.filter(application__status__in=statuses)
+    for lookup, value in day_range(date_from, date_to).items():
+        queryset = queryset.filter(**{f'created_at__{lookup}': value})
+    return queryset
+
+
+def iter_chunks(queryset, columns, chunk_size=CHUNK_SIZE):
+    """列の値のタプルを主キー順に chunk_size 件ずつのリストで返す"""
+    last_pk = queryset.order_by('-pk').values_list('pk', flat=True).first()
+    if last_pk is None:
+        return
+    queryset = queryset.filter(pk__lte=last_pk).order_by('pk')
+    paths = [column.path for column in columns]
+    after = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=after).values_list('pk', *paths)[:chunk_size])
+        if not rows:
+            return
+        after = rows[-1][0]
+        yield [row[1:] for row in rows]
+        if len(rows) < chunk_size:
+            return
+
+
+def render_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow([column.label for column in columns])
+    yield buffer.getvalue().encode('utf-8')
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [column.csv_value(value) for column, value in zip(columns, row)] for row in rows
+        )
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _dumps(record):
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def render_jsonl(columns, chunks):
+    keys = [column.key.split('.') for column in columns]
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            record = {}
+            for column, key, value in zip(columns, keys, row):
+                target = record
+                for part in key[:-1]:
+                    target = target.setdefault(part, {})
+                target[key[-1]] = column.json_value(value)
+            lines.append(_dumps(record))
+        lines.append(b'')
+        yield b'\n'.join(lines)
+
+
+def render(fmt, columns, queryset, chunk_size=CHUNK_SIZE):
+    """書き出すファイルの内容（bytes）を順に返すイテレーター"""
+    chunks = iter_chunks(queryset, columns, chunk_size)
+    if fmt == 'jsonl':
+        return render_jsonl(columns, chunks)
+    return render_csv(columns, chunks)
+
+
+async def as_async(iterator):
+    """同期のイテレーターを1チャンクずつスレッドで進める非同期イテレーター（ASGI 用）"""
+    from asgiref.sync import sync_to_async
+
+    done = object()
+    while True:
+        chunk = await sync_to_async(next)(iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def streaming_response(request, fmt, columns, queryset, filename):
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse
+
+    content = render(fmt, columns, queryset)
+    if isinstance(request, ASGIRequest):
+        content = as_async(content)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    response['Cache-Control'] = 'no-store'
+    # nginx 等のリバースプロキシでバッファリングさせない
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:35
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    Message = apps.get_model('applications', 'Message')
+
+    def unread(condition):
+        counts = (
+            Message.objects
+            .filter(condition, application=OuterRef('pk'), read_at__isnull=True)
+            .order_by()
+            .values('application')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Application.objects.update(
+        applicant_unread_count=unread(~Q(sender_type='user')),
+        shelter_unread_count=unread(Q(sender_type='user')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0009_application_is_hidden_by_applicant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='applicant_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='団体・管理者から届いた未読メッセージ数', verbose_name='応募者側の未読数'),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='shelter_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='応募者から届いた未読メッセージ数', verbose_name='団体側の未読数'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
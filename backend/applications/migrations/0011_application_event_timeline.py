@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0010_application_unread_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicationevent',
+            name='event_type',
+            field=models.CharField(choices=[('status_changed', 'ステータス変更'), ('archived', 'アーカイブ'), ('note', 'メモ'), ('system', 'システム')], max_length=20, verbose_name='イベント種別'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationevent',
+            index=models.Index(fields=['application', 'created_at'], name='application_applica_340381_idx'),
+        ),
+    ]
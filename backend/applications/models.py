@@ -7,6 +7,77 @@ from shelters.models import Shelter
 User = get_user_model()
 
 
+# 進行中（猫の募集状況に影響する）の応募ステータス
+ACTIVE_STATUSES = ('pending', 'reviewing', 'trial')
+
+# 許可される状態遷移マップ（ステータス更新 API と ApplicationQuerySet.transition() で共通）
+ALLOWED_TRANSITIONS = {
+    'pending':   ['reviewing', 'cancelled'],
+    'reviewing': ['trial', 'rejected', 'cancelled'],
+    'trial':     ['accepted', 'rejected', 'cancelled'],
+    'accepted':  [],  # 完了 → 変更不可
+    'rejected':  [],  # 完了 → 変更不可
+    'cancelled': [],  # 完了 → 変更不可
+}
+
+
+class ApplicationQuerySet(models.QuerySet):
+    """応募クエリセット（一括ステータス変更付き）"""
+
+    def transition(self, status, note='', actor_type=None, skip_disallowed=False):
+        """対象の応募をまとめて status に変更する
+
+        対象件数に関わらず、対象行のロック付き取得・一括 UPDATE・猫ステータスの同期
+        （集計1回 + 更新は変更後ステータスごとに1回）・イベントの一括保存の一定数のクエリで完了する。
+        ロックした時点のステータスを状態遷移マップ（ALLOWED_TRANSITIONS）で検証し、許可されない遷移を
+        含む場合は ValidationError を送出して何も変更しない。skip_disallowed=True の場合はそれらの応募を
+        変更せずに残りを変更する。
+        actor_type を省略した場合、イベントの実行者は外側の event_batch() に従う。
+
+        Returns:
+            int: 変更した応募の件数
+        """
+        from django.core.exceptions import ValidationError
+        from django.db import transaction
+        from django.utils import timezone
+        from .events import event_batch, status_changed
+        from .realtime import publish_status
+
+        with transaction.atomic(), event_batch(actor_type=actor_type):
+            rows = list(
+                self.exclude(status=status).select_for_update()
+                .values_list('id', 'cat_id', 'shelter_id', 'status')
+            )
+            disallowed = [row for row in rows if status not in ALLOWED_TRANSITIONS.get(row[3], ())]
+            if disallowed and not skip_disallowed:
+                labels = dict(Application.STATUS_CHOICES)
+                from_labels = '・'.join(sorted({labels.get(row[3], row[3]) for row in disallowed}))
+                raise ValidationError({
+                    'status': f'「{from_labels}」から「{labels.get(status, status)}」への変更はできません。'
+                })
+            rows = [row for row in rows if row not in disallowed]
+            if not rows:
+                return 0
+
+            now = timezone.now()
+            Application.objects.filter(pk__in=[row[0] for row in rows]).update(status=status, updated_at=now)
+            for application_id, _, _, from_status in rows:
+                status_changed(application_id, from_status, status, note=note, actor_type=actor_type)
+
+            applications = {}
+            for application_id, cat_id, _, _ in rows:
+                applications.setdefault(cat_id, []).append(application_id)
+            Application.sync_cat_statuses(
+                {(cat_id, shelter_id) for _, cat_id, shelter_id, _ in rows}, status, applications
+            )
+
+        for application_id, cat_id, shelter_id, _ in rows:
+            publish_status(Application(
+                id=application_id, cat_id=cat_id, shelter_id=shelter_id, status=status, updated_at=now
+            ))
+        return len(rows)
+
+
 class Application(models.Model):
     """応募モデル"""
     
@@ -124,7 +195,24 @@ class Application(models.Model):
         default=False,
         verbose_name='団体側で非表示'
     )
+
+    # 未読メッセージ数（非正規化カウンター）
+    # Message の作成・削除と MessageViewSet.mark_as_read で更新する
+    applicant_unread_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='応募者側の未読数',
+        help_text='団体・管理者から届いた未読メッセージ数'
+    )
+    shelter_unread_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='団体側の未読数',
+        help_text='応募者から届いた未読メッセージ数'
+    )
     
+    objects = ApplicationQuerySet.as_manager()
+
     class Meta:
         verbose_name = '応募'
         verbose_name_plural = '応募'
@@ -161,6 +249,18 @@ class Application(models.Model):
                     'shelter': 'Application.shelter must match Cat.shelter'
                 })
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """読み込み時のステータスを保持する（保存時の変更検知で再取得しないため）"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status', models.DEFERRED)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+
     def save(self, *args, **kwargs):
         # 新規作成時にshelterを自動設定
         is_new = not self.pk
@@ -170,39 +270,123 @@ class Application(models.Model):
         # 保存前にバリデーション実行
         self.full_clean()
         
-        # ステータス変更の検知
+        # ステータス変更の検知（DBから読み込んだインスタンスなら読み込み時の値と比較する）
         old_status = None
         if not is_new:
-            old_status = Application.objects.get(pk=self.pk).status
+            old_status = getattr(self, '_loaded_status', models.DEFERRED)
+            if old_status is models.DEFERRED:
+                old_status = Application.objects.filter(pk=self.pk).values_list('status', flat=True).first()
             
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
         
-        # 猫のステータス同期
+        # 履歴の記録と猫のステータス同期
         if old_status != self.status:
+            from .events import status_changed
+            status_changed(self.pk, old_status, self.status)
             self.sync_cat_status()
+            if not is_new:
+                from .realtime import publish_status
+                publish_status(self)
+
+    @staticmethod
+    def unread_counter_field(sender_type):
+        """メッセージ送信者種別に対応する未読カウンター（受信側）のフィールド名"""
+        return 'shelter_unread_count' if sender_type == 'user' else 'applicant_unread_count'
+
+    def recount_unread(self):
+        """未読カウンターをメッセージから集計し直す（1クエリで集計 + 1クエリで更新）"""
+        from django.db.models import Count, Q
+
+        counts = Message.objects.filter(application=self, read_at__isnull=True).aggregate(
+            shelter_unread_count=Count('id', filter=Q(sender_type='user')),
+            applicant_unread_count=Count('id', filter=~Q(sender_type='user')),
+        )
+        Application.objects.filter(pk=self.pk).update(**counts)
+        self.applicant_unread_count = counts['applicant_unread_count']
+        self.shelter_unread_count = counts['shelter_unread_count']
 
     def sync_cat_status(self):
         """応募状況に応じて猫のステータスを更新する"""
-        cat = self.cat
-        
-        # 1. 誰かが成立(accepted)していたら「譲渡済み」
-        if Application.objects.filter(cat=cat, status='accepted').exists():
-            cat.status = 'adopted'
-        # 2. 誰かがトライアル中(trial)なら「トライアル中」
-        elif Application.objects.filter(cat=cat, status='trial').exists():
-            cat.status = 'trial'
-        # 3. 誰かが審査中(reviewing)なら「審査中」
-        elif Application.objects.filter(cat=cat, status='reviewing').exists():
-            cat.status = 'in_review'
-        # 4. それ以外で、もし現在が「不承認」や「キャンセル」になった結果なら「募集中」に戻す
-        # (ただし、明示的に一時停止(paused)にされている場合は維持したいかもしれないが、
-        #  基本フローとしては応募が無くなれば自動的に「募集中」に戻るのが親切)
-        elif self.status in ['rejected', 'cancelled']:
-            # 他に動いている応募がないか最終確認
-            if not Application.objects.filter(cat=cat, status__in=['pending', 'reviewing', 'trial']).exists():
-                cat.status = 'open'
-        
-        cat.save()
+        Application.sync_cat_statuses({(self.cat_id, self.shelter_id)}, self.status, {self.cat_id: [self.pk]})
+
+    @staticmethod
+    def derive_cat_status(counts, trigger_status):
+        """猫の応募集計から猫のステータスを決める（変更しない場合は None）
+
+        1. 誰かが成立(accepted)していたら「譲渡済み」
+        2. 誰かがトライアル中(trial)なら「トライアル中」
+        3. 誰かが審査中(reviewing)なら「審査中」
+        4. 不承認・キャンセルの結果、進行中の応募が無くなったら「募集中」に戻す
+           (明示的な一時停止(paused)よりも、応募が無くなれば自動的に「募集中」に戻る方を優先する)
+        """
+        if counts['accepted']:
+            return 'adopted'
+        if counts['trial']:
+            return 'trial'
+        if counts['reviewing']:
+            return 'in_review'
+        if trigger_status in ('rejected', 'cancelled') and not counts['active']:
+            return 'open'
+        return None
+
+    @classmethod
+    def sync_cat_statuses(cls, cats, trigger_status, applications=None):
+        """複数の猫のステータスを応募状況に合わせて更新する
+
+        Args:
+            cats: (cat_id, shelter_id) の集合
+            trigger_status: 同期のきっかけとなった応募の変更後ステータス
+            applications: {cat_id: [応募ID, ...]} 同期のきっかけとなった応募
+                （指定した場合、猫のステータスが変わった応募に system イベントを記録する）
+
+        応募の集計は猫の数に関わらず1クエリ、猫の更新は変更後ステータスごとに1クエリ。
+        Cat.save() を経由しないため、公開APIキャッシュの無効化と公開カタログの更新はここで行う。
+        """
+        from django.db.models import Count, Q
+        from django.utils import timezone
+        from config.cache import bump_cat_versions
+
+        shelter_ids = dict(cats)
+        if not shelter_ids:
+            return
+
+        rows = (
+            Application.objects.filter(cat_id__in=shelter_ids)
+            .values('cat_id', 'cat__status')
+            .annotate(
+                accepted=Count('id', filter=Q(status='accepted')),
+                trial=Count('id', filter=Q(status='trial')),
+                reviewing=Count('id', filter=Q(status='reviewing')),
+                active=Count('id', filter=Q(status__in=ACTIVE_STATUSES)),
+            )
+            .order_by()
+        )
+
+        changes = {}
+        for row in rows:
+            new_status = cls.derive_cat_status(row, trigger_status)
+            if new_status and new_status != row['cat__status']:
+                changes.setdefault(new_status, []).append(row['cat_id'])
+
+        now = timezone.now()
+        for new_status, cat_ids in changes.items():
+            Cat.objects.filter(pk__in=cat_ids).update(status=new_status, updated_at=now)
+            for cat_id in cat_ids:
+                bump_cat_versions(cat_id, shelter_ids[cat_id])
+
+        if changes:
+            from cats.catalog import sync_public_cats
+            sync_public_cats([cat_id for cat_ids in changes.values() for cat_id in cat_ids])
+
+        if changes and applications:
+            from .events import emit
+            labels = dict(Cat.STATUS_CHOICES)
+            for new_status, cat_ids in changes.items():
+                note = f'猫のステータスを「{labels[new_status]}」に変更しました'
+                for cat_id in cat_ids:
+                    for application_id in applications.get(cat_id, ()):
+                        emit(application_id, 'system', note=note, actor_type='system')
 
 
 class ApplicationEvent(models.Model):
@@ -210,6 +394,7 @@ class ApplicationEvent(models.Model):
     
     EVENT_TYPE_CHOICES = [
         ('status_changed', 'ステータス変更'),
+        ('archived', 'アーカイブ'),
         ('note', 'メモ'),
         ('system', 'システム'),
     ]
@@ -277,6 +462,8 @@ class ApplicationEvent(models.Model):
             models.Index(fields=['application']),
             models.Index(fields=['created_at']),
             models.Index(fields=['actor']),
+            # 応募ごとのタイムライン（キーセットページネーション）
+            models.Index(fields=['application', 'created_at']),
         ]
     
     def __str__(self):
@@ -365,7 +552,32 @@ class Message(models.Model):
     def save(self, *args, **kwargs):
         # 保存前にバリデーション実行
         self.full_clean()
+        is_new = self._state.adding
         super().save(*args, **kwargs)
+
+        # 応募の未読カウンターを更新
+        if is_new:
+            if self.read_at is None:
+                field = Application.unread_counter_field(self.sender_type)
+                Application.objects.filter(pk=self.application_id).update(
+                    **{field: models.F(field) + 1}
+                )
+            # チャットを開いているクライアントへ配信
+            from .realtime import publish_message
+            publish_message(self)
+        else:
+            # 管理画面などで既読状態が直接変更された場合に備えて集計し直す
+            self.application.recount_unread()
+
+    def delete(self, *args, **kwargs):
+        application_id, was_unread = self.application_id, self.read_at is None
+        field = Application.unread_counter_field(self.sender_type)
+        result = super().delete(*args, **kwargs)
+        if was_unread:
+            Application.objects.filter(pk=application_id, **{f'{field}__gt': 0}).update(
+                **{field: models.F(field) - 1}
+            )
+        return result
     
     def __str__(self):
         return f"{self.sender.username}: {self.content[:30]}"
@@ -0,0 +1,48 @@
+"""
+応募チャットのリアルタイム配信
+
+応募ごとのチャンネル（config.realtime.application_channel）へ以下のイベントを配信する。
+
+- message: 新着メッセージ（MessageSerializer の内容）
+- read:    既読通知（mark_as_read で既読にした側と件数）
+- status:  応募ステータスの変更
+
+購読は MessageStreamView（GET /api/messages/stream/?application=<id>）で行う。
+"""
+from config.realtime import application_channel, broker
+
+
+def message_event(message):
+    from .serializers import MessageSerializer
+
+    return {
+        'type': 'message',
+        'id': message.id,
+        'application': message.application_id,
+        'message': MessageSerializer(message).data,
+    }
+
+
+def publish_message(message):
+    broker.publish(application_channel(message.application_id), message_event(message))
+
+
+def publish_read(application_id, reader, count, read_at):
+    """reader: 既読にした側（'applicant' / 'shelter'）"""
+    broker.publish(application_channel(application_id), {
+        'type': 'read',
+        'application': application_id,
+        'reader': reader,
+        'count': count,
+        'read_at': read_at,
+    })
+
+
+def publish_status(application):
+    broker.publish(application_channel(application.id), {
+        'type': 'status',
+        'application': application.id,
+        'status': application.status,
+        'status_display': application.get_status_display(),
+        'updated_at': application.updated_at,
+    })
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Application, Message
+from .models import ALLOWED_TRANSITIONS, Application, ApplicationEvent, Message
 from cats.serializers import CatListSerializer, ShelterInfoSerializer
 from accounts.serializers import UserPublicSerializer, UserPrivateSerializer
 
@@ -34,21 +34,13 @@ class ApplicationSerializer(serializers.ModelSerializer):
             
         # 自分が応募者の場合：団体または管理者からの未読を出す
         if obj.applicant_id == user.id:
-            return obj.messages.filter(read_at__isnull=True).exclude(sender_type='user').count()
+            return obj.applicant_unread_count
             
         # 自分が団体スタッフの場合：ユーザーからの未読を出す
-        # 注意: N+1問題の懸念があるため、本番環境では prefetch_related や 
-        # queryset.annotate(unread_count=...) の検討が必要。
-        # 今回は小規模想定で実装。
-        from shelters.models import ShelterUser
-        is_shelter_member = ShelterUser.objects.filter(
-            user=user,
-            shelter_id=obj.shelter_id,
-            is_active=True
-        ).exists()
-        
-        if is_shelter_member:
-            return obj.messages.filter(read_at__isnull=True).filter(sender_type='user').count()
+        # 所属団体はリクエストごとに1回だけ解決する
+        from shelters.membership import get_membership
+        if get_membership(self.context.get('request')).is_member(obj.shelter_id):
+            return obj.shelter_unread_count
             
         return 0
 
@@ -126,15 +118,8 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
 class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
     """応募ステータス更新用シリアライザー（状態マシン付き）"""
     
-    # 許可される状態遷移マップ
-    ALLOWED_TRANSITIONS = {
-        'pending':   ['reviewing', 'cancelled'],
-        'reviewing': ['trial', 'rejected', 'cancelled'],
-        'trial':     ['accepted', 'rejected', 'cancelled'],
-        'accepted':  [],  # 完了 → 変更不可
-        'rejected':  [],  # 完了 → 変更不可
-        'cancelled': [],  # 完了 → 変更不可
-    }
+    # 許可される状態遷移マップ（applications.models.ALLOWED_TRANSITIONS）
+    ALLOWED_TRANSITIONS = ALLOWED_TRANSITIONS
     
     class Meta:
         model = Application
@@ -169,6 +154,29 @@ class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ApplicationEventSerializer(serializers.ModelSerializer):
+    """応募タイムライン（イベント）シリアライザー
+
+    実行者名は団体メンバーにのみ開示する（context['show_actor']）。
+    """
+
+    event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ApplicationEvent
+        fields = [
+            'id', 'event_type', 'event_type_display', 'from_status', 'to_status',
+            'actor_type', 'actor_name', 'note', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_actor_name(self, obj):
+        if not self.context.get('show_actor') or obj.actor is None:
+            return None
+        return obj.actor.username
+
+
 class MessageSerializer(serializers.ModelSerializer):
     """メッセージシリアライザー
     
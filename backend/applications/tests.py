@@ -0,0 +1,243 @@
+"""
+応募・メッセージのテスト
+
+- 一覧のクエリ数の回帰テスト（埋め込みの猫情報・応募者・送信者の N+1 が無いこと）
+- 既読化と未読カウンター
+- リアルタイム配信の提供条件と購読中の権限の再確認
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from cats.models import Cat
+from cats.tests import MEDIA_ROOT, create_cats, create_shelter
+from shelters.models import ShelterUser
+from .models import Application, Message
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    API_CACHE={'ENABLED': False},
+    CAT_IMAGE_VARIANTS={'ENABLED': False},
+)
+class ApplicationListQueryCountTests(TestCase):
+    """一覧のクエリ数は応募・メッセージの件数に関わらず一定"""
+
+    def setUp(self):
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=shelter, user=self.staff, role='admin')
+        self.client = APIClient()
+
+        self.applications = []
+        for i, cat in enumerate(create_cats(shelter, 6)):
+            adopter = User.objects.create_user(f'adopter{i}', f'adopter{i}@example.com', 'pw')
+            application = Application.objects.create(cat=cat, applicant=adopter, term_agreement=True)
+            Message.objects.create(application=application, sender=adopter, sender_type='user', content='はじめまして')
+            Message.objects.create(application=application, sender=self.staff, sender_type='shelter', content='どうぞ')
+            self.applications.append(application)
+
+    def test_application_list_for_shelter(self):
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/applications/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(row['cat_detail']['primary_image'] for row in results))
+
+    def test_application_list_for_applicant(self):
+        application = self.applications[0]
+        self.client.force_authenticate(application.applicant)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/applications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_message_list(self):
+        application = self.applications[0]
+        for i in range(8):
+            sender = self.staff if i % 2 else application.applicant
+            Message.objects.create(
+                application=application, sender=sender,
+                sender_type='shelter' if i % 2 else 'user', content=f'メッセージ{i}',
+            )
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/messages/?application={application.pk}')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(results), 10)
+        self.assertEqual({row['sender_info']['username'] for row in results}, {'staff', 'adopter0'})
+
+
+class MarkAsReadTests(TestCase):
+    """既読化は未読カウンターを既読にした件数だけ減らす"""
+
+    def setUp(self):
+        shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=shelter, user=self.staff, role='admin')
+        self.adopter = User.objects.create_user('adopter', 'adopter@example.com', 'pw')
+        cat = Cat.objects.create(shelter=shelter, name='たま')
+        self.application = Application.objects.create(cat=cat, applicant=self.adopter, term_agreement=True)
+        for i in range(3):
+            Message.objects.create(
+                application=self.application, sender=self.adopter, sender_type='user', content=f'メッセージ{i}'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_decrements_by_marked_count(self):
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.shelter_unread_count, 3)
+        # 既読化と同時に届いたメッセージ（カウンターの加算のみ反映済み）を再現する
+        Application.objects.filter(pk=self.application.pk).update(shelter_unread_count=F('shelter_unread_count') + 1)
+
+        response = self.client.post('/api/messages/mark_as_read/', {'application_id': self.application.pk})
+        self.assertEqual(response.data['marked_read_count'], 3)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.shelter_unread_count, 1)
+
+    def test_never_goes_below_zero(self):
+        Application.objects.filter(pk=self.application.pk).update(shelter_unread_count=1)
+        self.client.post('/api/messages/mark_as_read/', {'application_id': self.application.pk})
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.shelter_unread_count, 0)
+
+    def test_forbidden_for_non_party(self):
+        stranger = User.objects.create_user('stranger', 'stranger@example.com', 'pw')
+        self.client.force_authenticate(stranger)
+        response = self.client.post('/api/messages/mark_as_read/', {'application_id': self.application.pk})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Message.objects.filter(application=self.application, read_at__isnull=False).exists())
+
+        response = self.client.post(
+            '/api/messages/', {'application_id': self.application.pk, 'content': 'こんにちは'}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Message.objects.filter(application=self.application).count(), 3)
+
+
+class MessageStreamTests(TestCase):
+    """リアルタイム配信の提供条件と購読中の権限の再確認"""
+
+    def setUp(self):
+        shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=shelter, user=self.staff, role='admin')
+        adopter = User.objects.create_user('adopter', 'adopter@example.com', 'pw')
+        cat = Cat.objects.create(shelter=shelter, name='たま')
+        self.application = Application.objects.create(cat=cat, applicant=adopter, term_agreement=True)
+
+    async def _open(self):
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.staff)))()
+        return await AsyncClient().get(
+            f'/api/messages/stream/?application={self.application.pk}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    async def test_unavailable_without_cross_process_delivery(self):
+        with self.settings(REALTIME={**settings.REALTIME, 'ENABLED': False}):
+            response = await self._open()
+        self.assertEqual(response.status_code, 503)
+
+    async def test_closes_when_access_is_revoked(self):
+        import asyncio
+        from asgiref.sync import sync_to_async
+
+        with self.settings(REALTIME={**settings.REALTIME, 'ENABLED': True, 'KEEPALIVE_SECONDS': 0.1}):
+            response = await self._open()
+            self.assertEqual(response.status_code, 200)
+            stream = response.streaming_content.__aiter__()
+            await stream.__anext__()  # retry
+            self.assertEqual(await asyncio.wait_for(stream.__anext__(), 2), b': keepalive\n\n')
+
+            await sync_to_async(ShelterUser.objects.filter(user=self.staff).delete)()
+            with self.assertRaises(StopAsyncIteration):
+                while True:
+                    await asyncio.wait_for(stream.__anext__(), 2)
+
+
+class TransitionTests(TestCase):
+    """一括のステータス変更も状態遷移マップに従う"""
+
+    def setUp(self):
+        shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=shelter, user=self.staff, role='admin')
+        self.cat = Cat.objects.create(shelter=shelter, name='たま')
+        self.applications = {}
+        for status in ('pending', 'reviewing', 'trial'):
+            adopter = User.objects.create_user(status, f'{status}@example.com', 'pw')
+            self.applications[status] = Application.objects.create(
+                cat=self.cat, applicant=adopter, term_agreement=True, status=status
+            )
+
+    def test_rejects_disallowed_transition(self):
+        from django.core.exceptions import ValidationError
+
+        with self.assertRaises(ValidationError):
+            Application.objects.filter(cat=self.cat).transition('accepted')
+        statuses = set(Application.objects.filter(cat=self.cat).values_list('status', flat=True))
+        self.assertEqual(statuses, {'pending', 'reviewing', 'trial'})
+
+    def test_auto_reject_on_accept_skips_disallowed(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        accepted = self.applications['trial']
+        response = client.patch(
+            f'/api/applications/{accepted.pk}/status/', {'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        for application in self.applications.values():
+            application.refresh_from_db()
+        self.assertEqual(self.applications['trial'].status, 'accepted')
+        self.assertEqual(self.applications['reviewing'].status, 'rejected')
+        self.assertEqual(self.applications['pending'].status, 'pending')
+
+
+class ExportTests(TestCase):
+    """CSV の書き出しで数式として解釈される値を無害化する"""
+
+    def setUp(self):
+        shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=shelter, user=self.staff, role='admin')
+        adopter = User.objects.create_user('adopter', 'adopter@example.com', 'pw', address='=1+1')
+        cat = Cat.objects.create(shelter=shelter, name='たま')
+        self.application = Application.objects.create(cat=cat, applicant=adopter, term_agreement=True)
+        for content in ('=HYPERLINK("http://example.com")', '+1', '-1', '@SUM(A1)', '\tx', '\rx', 'ねこ'):
+            Message.objects.create(application=self.application, sender=adopter, sender_type='user', content=content)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _export(self, path, fmt='csv'):
+        response = self.client.get(path, {'format': fmt})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    def test_csv_escapes_formula_prefixes(self):
+        import csv
+        import io
+
+        rows = list(csv.reader(io.StringIO(self._export('/api/messages/export/'), newline='')))
+        contents = {cell for row in rows[1:] for cell in row}
+        for escaped in ('\'=HYPERLINK("http://example.com")', "'+1", "'-1", "'@SUM(A1)", "'\tx", "'\rx", 'ねこ'):
+            self.assertIn(escaped, contents)
+        self.assertNotIn('=HYPERLINK("http://example.com")', contents)
+
+        rows = list(csv.reader(io.StringIO(self._export('/api/applications/export/'), newline='')))
+        self.assertIn("'=1+1", rows[1])
+
+    def test_jsonl_keeps_original_values(self):
+        self.assertIn('"=HYPERLINK', self._export('/api/messages/export/', fmt='jsonl').replace('\\"', '"'))
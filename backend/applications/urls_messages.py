@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import MessageViewSet
+from .views import MessageExportView, MessageViewSet, message_stream
 
 urlpatterns = [
     path('', MessageViewSet.as_view({'get': 'list', 'post': 'create'}), name='message-list'),
+    path('stream/', message_stream, name='message-stream'),
+    path('export/', MessageExportView.as_view(), name='message-export'),
+    path('mark_as_read/', MessageViewSet.as_view({'post': 'mark_as_read'}), name='message-mark-as-read'),
     path('<int:pk>/', MessageViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='message-detail'),
 ]
@@ -1,13 +1,29 @@
 from rest_framework import viewsets, permissions, status, filters
 from django.utils import timezone
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
+from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db import models as django_models, transaction
-from .models import Application, Message
-from shelters.models import Shelter, ShelterUser
+from django.db.models import Case, F, Prefetch, Value, When
+from .models import ACTIVE_STATUSES, Application, ApplicationEvent, Message
+from cats.models import Cat
+from shelters.models import Shelter
+from shelters.membership import get_membership
+from config.cache import cat_version_key, favorites_version_key, get_versions, shelter_version_key
+from config.conditional import conditional, make_etag, request_signature
+from config.fields import SparseFieldsMixin
+from config.pagination import (
+    ApplicationEventKeysetPagination,
+    ApplicationKeysetPagination,
+    MessageKeysetPagination,
+)
+from .events import actor_type_for, emit, event_batch
+from .realtime import publish_read
 from .serializers import (
+    ApplicationEventSerializer,
     ApplicationSerializer,
     ApplicationDetailForOwnerSerializer,
     ApplicationDetailForShelterSerializer,
@@ -17,10 +33,11 @@ from .serializers import (
 )
 
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """応募管理 ViewSet"""
     
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApplicationKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -30,17 +47,75 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         
         # 2. 保護団体ユーザーの場合、自団体の猫への応募も含める
         if user.user_type == 'shelter':
-            shelter_ids = ShelterUser.objects.filter(
-                user=user, 
-                is_active=True
-            ).values_list('shelter_id', flat=True)
-            
             queryset = queryset | Application.objects.filter(
-                shelter_id__in=shelter_ids,
+                shelter_id__in=get_membership(self.request).shelter_ids,
                 is_hidden_by_shelter=False
             )
+
+        # タイムラインは閲覧権限の確認のみ（猫情報は不要）
+        if self.action == 'timeline':
+            return queryset.distinct().only('id', 'applicant_id', 'shelter_id', 'status')
             
-        return queryset.distinct().order_by('-applied_at')
+        queryset = queryset.distinct().order_by('-applied_at')
+
+        # ?fields= / ?expand= で返さない応募者・猫・団体は読み込まない
+        # （詳細表示は ETag・権限判定で応募者を参照するため常に読み込む）
+        selection = self.field_selection
+        if self.action == 'retrieve' or selection.includes('applicant_info', nested=True):
+            queryset = queryset.select_related('applicant')
+
+        # 一覧に埋め込む猫情報（メイン画像・お気に入り状態）をまとめて取得
+        if selection.includes('cat_detail', nested=True):
+            cats = Cat.objects.with_list_data(
+                user,
+                shelter=(
+                    selection.includes('cat_detail.shelter', nested=True)
+                    or selection.includes('cat_detail.shelter_name')
+                ),
+                favorites=selection.includes('cat_detail.is_favorited'),
+            )
+            queryset = queryset.prefetch_related(Prefetch('cat', queryset=cats))
+        return queryset
+
+    def get_object(self):
+        # 詳細表示では get_serializer_class() と retrieve() の両方で参照するため、1回だけ取得する
+        if self.action != 'retrieve':
+            return super().get_object()
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def retrieve(self, request, *args, **kwargs):
+        """応募詳細（ETag が一致すれば本文を作らずに 304 Not Modified を返す）
+
+        ETag は応募（ステータス・updated_at・未読数）・応募者の updated_at・猫と団体とお気に入りの
+        バージョン・閲覧者から作る。未読数は updated_at を更新せずに変わるため Last-Modified は付けない。
+        """
+        # 閲覧権限の確認と、団体が開いた場合の pending → reviewing の自動更新を先に行う
+        serializer_class = self.get_serializer_class()
+        instance = self.get_object()
+
+        def render():
+            serializer = serializer_class(instance, context=self.get_serializer_context())
+            return Response(self.field_selection.prune(serializer).data)
+
+        # 団体ユーザーの応募者は所属団体の情報も含むため、検証子を作らない
+        if instance.applicant.user_type == 'shelter':
+            return render()
+
+        user = request.user
+        versions = get_versions(
+            cat_version_key(instance.cat_id),
+            shelter_version_key(instance.shelter_id),
+            favorites_version_key(user.pk),
+        )
+        etag = make_etag(
+            'application', instance.pk, instance.status, instance.updated_at.isoformat(),
+            instance.applicant_unread_count, instance.shelter_unread_count,
+            instance.applicant.updated_at.isoformat(), serializer_class.__name__, f'user:{user.pk}',
+            *request_signature(request), *versions,
+        )
+        return conditional(request, etag, None, render, per_user=True)
 
     def get_serializer_class(self):
         # archiveアクション用
@@ -58,6 +133,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         # 3. ステータス更新時 (アクション)
         if self.action == 'update_status':
             return ApplicationStatusUpdateSerializer
+
+        if self.action == 'timeline':
+            return ApplicationEventSerializer
             
         # 4. 詳細表示時 (retrieve)
         if self.action == 'retrieve':
@@ -65,19 +143,17 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             user = self.request.user
             
             # アクセス者が保護団体メンバーかどうか判定
-            is_shelter_member = False
-            if user.user_type == 'shelter':
-                is_shelter_member = ShelterUser.objects.filter(
-                    user=user,
-                    shelter_id=instance.shelter_id,
-                    is_active=True
-                ).exists()
+            is_shelter_member = (
+                user.user_type == 'shelter'
+                and get_membership(self.request).is_member(instance.shelter_id)
+            )
             
             if is_shelter_member:
                 # 自動ステータス更新: pending(新着) の状態で団体が見たら reviewing(チャット中) にする
                 if instance.status == 'pending':
-                    instance.status = 'reviewing'
-                    instance.save()
+                    with transaction.atomic(), event_batch(actor=user, actor_type=actor_type_for(user, True)):
+                        instance.status = 'reviewing'
+                        instance.save()
                 
                 return ApplicationDetailForShelterSerializer
             elif instance.applicant == user:
@@ -100,18 +176,18 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                     {"detail": "進行中の応募は削除（非表示）できません。"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            application.is_hidden_by_applicant = True
-            application.save()
+            with transaction.atomic():
+                application.is_hidden_by_applicant = True
+                application.save()
+                emit(application.pk, 'archived', note='応募者が履歴を非表示にしました',
+                     actor=user, actor_type=actor_type_for(user))
             return Response({"detail": "履歴を非表示にしました。"})
             
         # 2. 保護団体メンバーの場合
-        is_shelter_member = False
-        if user.user_type == 'shelter':
-            is_shelter_member = ShelterUser.objects.filter(
-                user=user,
-                shelter_id=application.shelter_id,
-                is_active=True
-            ).exists()
+        is_shelter_member = (
+            user.user_type == 'shelter'
+            and get_membership(request).is_member(application.shelter_id)
+        )
             
         if is_shelter_member:
             # 完了・却下・キャンセル済みのみ非表示可能
@@ -120,8 +196,11 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                     {"detail": "進行中の応募は削除（非表示）できません。"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            application.is_hidden_by_shelter = True
-            application.save()
+            with transaction.atomic():
+                application.is_hidden_by_shelter = True
+                application.save()
+                emit(application.pk, 'archived', note='団体が履歴を非表示にしました',
+                     actor=user, actor_type=actor_type_for(user, True))
             return Response({"detail": "履歴を非表示にしました。"})
             
         return Response({"detail": "権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
@@ -155,7 +234,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                     'detail': '既に応募済みです。メッセージ画面へ移動します。'
                 }, status=status.HTTP_200_OK)
 
-            self.perform_create(serializer)
+            with event_batch(actor=user, actor_type=actor_type_for(user)):
+                self.perform_create(serializer)
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -178,13 +258,10 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # 権限チェック: 保護団体メンバーのみステータス変更可能
-        is_shelter_member = False
-        if user.user_type == 'shelter':
-            is_shelter_member = ShelterUser.objects.filter(
-                user=user,
-                shelter_id=application.shelter_id,
-                is_active=True
-            ).exists()
+        is_shelter_member = (
+            user.user_type == 'shelter'
+            and get_membership(request).is_member(application.shelter_id)
+        )
             
         if not is_shelter_member:
              return Response(
@@ -193,12 +270,23 @@ class ApplicationViewSet(viewsets.ModelViewSet):
              )
         
         # select_for_update で競合防止（同時更新を直列化）
-        with transaction.atomic():
+        # 履歴（ApplicationEvent）は同じトランザクション内でまとめて保存する
+        with transaction.atomic(), event_batch(actor=user, actor_type=actor_type_for(user, True)):
             application = Application.objects.select_for_update().get(pk=application.pk)
             
+            previous_status = application.status
             serializer = self.get_serializer(application, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+
+            # 譲渡成立時は同じ猫への他の進行中の応募をまとめてお断りにする
+            if application.status == 'accepted' and previous_status != 'accepted':
+                Application.objects.filter(
+                    cat_id=application.cat_id, status__in=ACTIVE_STATUSES
+                ).exclude(pk=application.pk).transition(
+                    'rejected', note='他の応募者との譲渡が成立したため自動でお断りしました', actor_type='system',
+                    skip_disallowed=True,
+                )
         
         # レスポンスに現在状態 + 次に可能なアクションを含める
         return Response({
@@ -211,13 +299,41 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             ),
         })
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """応募の履歴（ステータス変更・アーカイブ・システムイベント）を古い順に返す
+
+        キーセットページネーション（?cursor=&page_size=）。cursor 未指定時は先頭ページ。
+        応募者には団体側のアーカイブ・メモと実行者名を表示しない。
+        """
+        application = self.get_object()
+        user = request.user
+        is_shelter_member = (
+            user.user_type == 'shelter'
+            and get_membership(request).is_member(application.shelter_id)
+        )
+
+        events = ApplicationEvent.objects.filter(application_id=application.pk)
+        if is_shelter_member:
+            events = events.select_related('actor')
+        else:
+            events = events.exclude(event_type='note').exclude(event_type='archived', actor_type='shelter')
+
+        paginator = ApplicationEventKeysetPagination()
+        page = paginator.paginate_queryset(events.order_by('created_at', 'id'), request, view=self)
+        serializer = self.get_serializer(page, many=True, context={
+            **self.get_serializer_context(), 'show_actor': is_shelter_member,
+        })
+        return paginator.get_paginated_response(serializer.data)
+
 
 class MessageViewSet(viewsets.ModelViewSet):
     """メッセージ管理 ViewSet"""
     
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None  # チャットなので全件取得（または独自に制御）
+    # cursor 指定時はキーセット方式（差分ポーリング対応）、未指定時は従来通り全件取得
+    pagination_class = MessageKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -237,10 +353,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         
         # 2. 自分が保護団体メンバーであるメッセージ
         if user.user_type == 'shelter':
-            shelter_ids = ShelterUser.objects.filter(
-                user=user, 
-                is_active=True
-            ).values_list('shelter_id', flat=True)
+            shelter_ids = get_membership(self.request).shelter_ids
             
             # Application.shelter_id を利用して高速化
             shelter_q = django_models.Q(application__shelter_id__in=shelter_ids)
@@ -251,7 +364,8 @@ class MessageViewSet(viewsets.ModelViewSet):
             # 一般ユーザーは自分の応募のみ
             queryset = queryset.filter(applicant_q)
             
-        return queryset.order_by('created_at')
+        # sender_info（送信者）をまとめて取得する
+        return queryset.select_related('sender').order_by('created_at')
 
     @action(detail=False, methods=['post'])
     def mark_as_read(self, request):
@@ -264,17 +378,14 @@ class MessageViewSet(viewsets.ModelViewSet):
         application = get_object_or_404(Application, pk=application_id)
         
         # 権限チェック
-        is_applicant = (application.applicant == user)
-        is_shelter_member = False
-        if user.user_type == 'shelter':
-            is_shelter_member = ShelterUser.objects.filter(
-                user=user, 
-                shelter_id=application.shelter_id, 
-                is_active=True
-            ).exists()
+        is_applicant = (application.applicant_id == user.id)
+        is_shelter_member = (
+            user.user_type == 'shelter'
+            and get_membership(request).is_member(application.shelter_id)
+        )
             
         if not (is_applicant or is_shelter_member):
-             raise permissions.PermissionDenied("権限がありません。")
+             raise PermissionDenied("権限がありません。")
              
         # 未読メッセージを抽出
         target_messages = Message.objects.filter(
@@ -289,7 +400,22 @@ class MessageViewSet(viewsets.ModelViewSet):
             # 団体の場合：ユーザーからのメッセージを既読にする
             target_messages = target_messages.filter(sender_type='user')
             
-        updated_count = target_messages.update(read_at=timezone.now())
+        # 未読カウンターは既読にした件数だけ減らす（0 にリセットすると、既読化の直後に届いた
+        # メッセージが未読のままカウンターだけ 0 になるため）。
+        # 符号なし列（MySQL）で負の値を経由しないよう、引き算は件数以上の場合のみ行う
+        counter = 'applicant_unread_count' if is_applicant else 'shelter_unread_count'
+        read_at = timezone.now()
+        with transaction.atomic():
+            updated_count = target_messages.update(read_at=read_at)
+            if updated_count:
+                Application.objects.filter(pk=application.pk).update(**{counter: Case(
+                    When(**{f'{counter}__gte': updated_count}, then=F(counter) - updated_count),
+                    default=Value(0),
+                )})
+
+        # 相手側へ既読通知を配信
+        if updated_count:
+            publish_read(application.pk, 'applicant' if is_applicant else 'shelter', updated_count, read_at)
         
         return Response({"marked_read_count": updated_count}, status=status.HTTP_200_OK)
 
@@ -308,27 +434,19 @@ class MessageViewSet(viewsets.ModelViewSet):
         application = get_object_or_404(Application, pk=application_id)
         
         # 権限チェック
-        is_applicant = (application.applicant == user)
-        is_shelter_member = False
-        
-        if user.user_type == 'shelter':
-            is_shelter_member = ShelterUser.objects.filter(
-                user=user,
-                shelter_id=application.shelter_id, # 冗長フィールドを活用
-                is_active=True
-            ).exists()
+        is_applicant = (application.applicant_id == user.id)
+        membership = get_membership(self.request)
+        is_shelter_member = (
+            user.user_type == 'shelter'
+            and membership.is_member(application.shelter_id) # 冗長フィールドを活用
+        )
             
         if not (is_applicant or is_shelter_member):
-             raise permissions.PermissionDenied("この応募にメッセージを送信する権限がありません。")
+             raise PermissionDenied("この応募にメッセージを送信する権限がありません。")
         
         # スタッフ権限の制限: チャットは閲覧のみ可能
         if is_shelter_member and not user.is_superuser:
-            shelter_user = ShelterUser.objects.filter(
-                user=user,
-                shelter_id=application.shelter_id,
-                is_active=True
-            ).first()
-            if shelter_user and shelter_user.role == 'staff':
+            if membership.is_staff_only(application.shelter_id):
                 raise PermissionDenied("スタッフ権限ではメッセージを送信できません。")
         
         # 送信者種別を判定して保存 (Admin > Shelter > User)
@@ -345,3 +463,229 @@ class MessageViewSet(viewsets.ModelViewSet):
             application=application,
             sender_type=sender_type
         )
+
+
+class ShelterExportView(APIView):
+    """保護団体向けの書き出し（CSV / JSONL のストリーミング、applications.export）の共通処理
+
+    クエリパラメータ: format（csv / jsonl。既定 csv）、shelter（所属団体の1つに絞る。省略時は全所属団体）、
+    status（応募のステータス。カンマ区切りで複数可）、date_from / date_to（YYYY-MM-DD。両端を含む）
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=csv は DRF のレンダラー指定（URL_FORMAT_OVERRIDE）と同じ名前のため、
+        # 一致するレンダラーが無くても 404 にせず、エラー応答は既定のレンダラーで返す
+        return super().perform_content_negotiation(request, force=True)
+
+    def get_shelter_ids(self, request):
+        if request.user.user_type != 'shelter':
+            raise PermissionDenied("保護団体アカウントでログインしてください。")
+        membership = get_membership(request)
+        shelter_id = request.query_params.get('shelter')
+        if not shelter_id:
+            if not membership.shelter_ids:
+                raise PermissionDenied("有効な保護団体に所属していません。")
+            return membership.shelter_ids
+        if not shelter_id.isdigit() or not membership.is_member(int(shelter_id)):
+            raise PermissionDenied("この保護団体のデータを書き出す権限がありません。")
+        return [int(shelter_id)]
+
+    def get_filters(self, request):
+        import datetime
+        from .export import FORMATS
+
+        params = request.query_params
+        errors = {}
+        fmt = params.get('format') or 'csv'
+        if fmt not in FORMATS:
+            errors['format'] = f'形式は {" / ".join(FORMATS)} のいずれかを指定してください。'
+
+        statuses = [value for value in params.get('status', '').split(',') if value]
+        unknown = set(statuses) - {value for value, _ in Application.STATUS_CHOICES}
+        if unknown:
+            errors['status'] = f'不明なステータスです: {", ".join(sorted(unknown))}'
+
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            value = params.get(name)
+            try:
+                dates[name] = datetime.date.fromisoformat(value) if value else None
+            except ValueError:
+                errors[name] = '日付は YYYY-MM-DD の形式で指定してください。'
+        if errors:
+            raise ValidationError(errors)
+        return fmt, statuses, dates['date_from'], dates['date_to']
+
+
+class ApplicationExportView(ShelterExportView):
+    """受け取った応募の書き出し（GET /api/applications/export/）
+
+    応募者の連絡先・プロフィール（UserPrivateSerializer と同じ情報）と同意事項を含む。
+    団体側で非表示にした応募は含めない。
+    """
+
+    def get(self, request, *args, **kwargs):
+        from .export import application_columns, application_queryset, streaming_response
+
+        shelter_ids = self.get_shelter_ids(request)
+        fmt, statuses, date_from, date_to = self.get_filters(request)
+        queryset = application_queryset(shelter_ids, statuses, date_from, date_to)
+        return streaming_response(request, fmt, application_columns(), queryset, 'applications')
+
+
+class MessageExportView(ShelterExportView):
+    """受け取った応募のメッセージ（チャット履歴）の書き出し（GET /api/messages/export/）
+
+    共通のパラメータに加えて application（応募ID）で1つの応募に絞れる。
+    status は応募のステータス、日付は送信日で絞り込む。
+    """
+
+    def get(self, request, *args, **kwargs):
+        from .export import message_columns, message_queryset, streaming_response
+
+        shelter_ids = self.get_shelter_ids(request)
+        fmt, statuses, date_from, date_to = self.get_filters(request)
+        application_id = request.query_params.get('application')
+        if application_id is not None and not application_id.isdigit():
+            raise ValidationError({'application': 'applicationパラメータが不正です。'})
+        queryset = message_queryset(
+            shelter_ids, int(application_id) if application_id else None, statuses, date_from, date_to
+        )
+        return streaming_response(request, fmt, message_columns(), queryset, 'messages')
+
+
+# ─────────────────────────────────────────────────────────────
+# リアルタイム配信（Server-Sent Events）
+# ─────────────────────────────────────────────────────────────
+
+def _authenticate_stream(request):
+    """API と同じ JWT（Authorization ヘッダー / HttpOnly Cookie）で認証する"""
+    from accounts.authentication import JWTCookieAuthentication
+
+    result = JWTCookieAuthentication().authenticate(request)
+    return result[0] if result else None
+
+
+def _get_stream_application(user, application_id):
+    """購読可能な応募（応募者本人 または 団体メンバー）を返す"""
+    application = Application.objects.filter(pk=application_id).first()
+    if application is None:
+        return None
+    if application.applicant_id == user.id:
+        return application
+    if user.user_type == 'shelter' and get_membership(None, user=user).is_member(application.shelter_id):
+        return application
+    return None
+
+
+def _stream_still_allowed(user_id, application_id):
+    """購読中の閲覧権限の再確認（退会・無効化・団体からの除外・応募の削除で False）"""
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+    return user is not None and _get_stream_application(user, application_id) is not None
+
+
+def _message_backlog(application_id, after_id):
+    """再接続時の取りこぼし分（after_id より後のメッセージ）"""
+    from .realtime import message_event
+
+    messages = Message.objects.filter(
+        application_id=application_id, id__gt=after_id
+    ).select_related('sender').order_by('id')[:200]
+    return [message_event(message) for message in messages]
+
+
+async def message_stream(request):
+    """応募チャットのイベントストリーム（GET /api/messages/stream/?application=<id>）
+
+    新着メッセージ・既読通知・ステータス変更を text/event-stream で配信する。
+    Last-Event-ID（または ?last_event_id=）を受け取った場合は、それ以降のメッセージを先に送る。
+    ストリームは REALTIME['MAX_STREAM_SECONDS'] で閉じ、クライアント（EventSource）は自動で再接続する。
+    閲覧権限は購読開始時に加えて REALTIME['KEEPALIVE_SECONDS'] ごとに再確認し、失われたら閉じる。
+    ASGI サーバーでのみ動作する（WSGI・REALTIME['ENABLED'] が False の場合は 503 を返し、クライアントはポーリングを続ける）。
+    """
+    import asyncio
+    import json
+
+    from asgiref.sync import sync_to_async
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+    from config.realtime import CLOSE, application_channel, broker, format_sse
+
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+    config = getattr(settings, 'REALTIME', {})
+    if not isinstance(request, ASGIRequest) or not config.get('ENABLED', True):
+        return JsonResponse({'detail': 'リアルタイム配信は利用できません。'}, status=503)
+
+    user = await sync_to_async(_authenticate_stream)(request)
+    if user is None:
+        return JsonResponse({'detail': '認証情報が含まれていません。'}, status=401)
+
+    try:
+        application_id = int(request.GET.get('application', ''))
+        last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return JsonResponse({'application': 'applicationパラメータが不正です。'}, status=400)
+
+    application = await sync_to_async(_get_stream_application)(user, application_id)
+    if application is None:
+        return JsonResponse({'detail': 'この応募を表示する権限がないか、存在しません。'}, status=404)
+
+    keepalive = config.get('KEEPALIVE_SECONDS', 15)
+    max_seconds = config.get('MAX_STREAM_SECONDS', 300)
+
+    async def event_stream():
+        nonlocal last_id
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        next_check = loop.time() + keepalive
+
+        # 購読を開始してから取りこぼし分を取得する（その間の新着は last_id で重複除去）
+        async with broker.subscribe(application_channel(application_id)) as queue:
+            yield f'retry: {config.get("RETRY_MILLISECONDS", 3000)}\n\n'
+
+            if last_id is not None:
+                for event in await sync_to_async(_message_backlog)(application_id, last_id):
+                    last_id = event['id']
+                    yield format_sse(json.dumps(event, ensure_ascii=False), 'message', event['id'])
+
+            while True:
+                now = loop.time()
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                # 購読中に閲覧権限を失った場合（団体からの除外・アカウント無効化など）は閉じる
+                if now >= next_check:
+                    if not await sync_to_async(_stream_still_allowed)(user.pk, application_id):
+                        break
+                    next_check = now + keepalive
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), timeout=max(0, min(next_check - now, remaining))
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if payload is CLOSE:
+                    break
+
+                event = json.loads(payload)
+                if event['type'] == 'message':
+                    if last_id is not None and event['id'] <= last_id:
+                        continue
+                    last_id = event['id']
+                    yield format_sse(payload, 'message', event['id'])
+                else:
+                    yield format_sse(payload, event['type'])
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx 等のリバースプロキシでバッファリングさせない
+    response['X-Accel-Buffering'] = 'no'
+    return response
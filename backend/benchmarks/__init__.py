@@ -0,0 +1,3 @@
+"""
+API のベンチマーク（python -m benchmarks で実行）
+"""
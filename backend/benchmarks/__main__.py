@@ -0,0 +1,109 @@
+"""
+ベンチマークの実行
+
+    # 新しいテスト用データベースを作成し、generate_dataset で固定シードのデータを入れて計測する
+    python -m benchmarks api
+
+    # ベースラインと比較（クエリ数の増加・p95 の劣化があれば終了コード 1）
+    python -m benchmarks api --baseline benchmarks/baseline.json
+
+    # ベースラインを更新する
+    python -m benchmarks api --output benchmarks/baseline.json
+
+    # 別のマシンのベースラインと比較する場合はクエリ数のみを判定する
+    python -m benchmarks api --baseline benchmarks/baseline.json --ignore-latency
+
+    # 既にデータを入れた開発用データベースに対して計測する（書き込みはロールバックされる）
+    python -m benchmarks api --use-existing-db
+
+    # 監査ログの書き込みオーバーヘッド（無効・有効の比較）
+    python -m benchmarks audit
+
+    # JSON のレンダリング・パース（json / orjson）と圧縮（gzip / brotli）の時間・バイト数
+    python -m benchmarks serialization
+
+backend/ ディレクトリで実行する。DJANGO_SETTINGS_MODULE が未指定なら config.settings を使う。
+"""
+import argparse
+import os
+import platform
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks')
+    parser.add_argument('suite', choices=['api', 'audit', 'serialization'], help='実行するベンチマーク')
+    parser.add_argument('--iterations', type=int, default=100, help='シナリオごとの計測回数（デフォルト: 100）')
+    parser.add_argument('--warmup', type=int, default=10, help='計測前の空実行回数（デフォルト: 10）')
+    parser.add_argument('--only', nargs='+', help='指定したシナリオのみ実行する')
+    parser.add_argument('--scale', type=float, default=1.0, help='生成するデータ量の倍率（デフォルト: 1.0）')
+    parser.add_argument('--seed', type=int, default=42, help='データ生成の乱数シード（デフォルト: 42）')
+    parser.add_argument('--with-cache', action='store_true', help='公開APIのレスポンスキャッシュを有効にして計測する')
+    parser.add_argument('--use-existing-db', action='store_true', help='テスト用データベースを作らず現在のデータベースで計測する')
+    parser.add_argument('--baseline', help='比較するベースライン JSON')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='p95 の許容劣化率（デフォルト: 0.5 = +50%%）')
+    parser.add_argument('--ignore-latency', action='store_true', help='ベースライン比較でクエリ数のみを判定する')
+    parser.add_argument('--output', help='結果を JSON で保存する')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+
+    from . import api, audit, serialization
+    from .harness import compare, format_table, load_baseline, save_results
+
+    old_config = None
+    if not args.use_existing_db:
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        print('Generating dataset...')
+        call_command('generate_dataset', seed=args.seed, no_images=True, **api.dataset_options(args.scale))
+
+    try:
+        print('Running scenarios...')
+        suite = {'api': api, 'audit': audit, 'serialization': serialization}[args.suite]
+        results = suite.run(
+            args.iterations, args.warmup, only=args.only, use_cache=args.with_cache, stdout=sys.stdout
+        )
+    finally:
+        if old_config is not None:
+            teardown_databases(old_config, verbosity=0)
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    print()
+    print(format_table(results, baseline))
+
+    if args.output:
+        from django.db import connection
+
+        save_results(args.output, results, {
+            'suite': args.suite,
+            'iterations': args.iterations,
+            'scale': args.scale,
+            'seed': args.seed,
+            'cache': args.with_cache,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        })
+        print(f'\nSaved results to {args.output}')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, None if args.ignore_latency else args.tolerance)
+        if regressions:
+            print('\nRegressions:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
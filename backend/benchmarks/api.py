@@ -0,0 +1,205 @@
+"""
+主要な API 利用シナリオのベンチマーク
+
+アプリ全体（ミドルウェア・JWT 認証・DRF）を通して以下を計測する。
+
+- 匿名ユーザーの一覧閲覧（検索・絞り込み・ファセット）と猫の詳細
+- お気に入りのトグル、応募の作成
+- 団体による応募ステータスの更新と受信箱（応募一覧）
+- チャットの送信・読み込み・差分ポーリング
+
+書き込みを伴うシナリオは1回ごとにロールバックし、毎回同じ状態から計測する。
+"""
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+# 新規データベースに生成するデータ量（--scale で倍率を指定）
+DATASET = {
+    'shelters': 40,
+    'cats': 2000,
+    'users': 1000,
+    'applications': 4000,
+    'messages': 40000,
+    'favorites': 5000,
+}
+
+
+def dataset_options(scale):
+    return {name: max(1, int(count * scale)) for name, count in DATASET.items()}
+
+
+def benchmark_settings(use_cache=False):
+    """計測用の設定
+
+    - レート制限を無効にする（匿名ユーザーの制限にすぐ達するため）
+    - 既定では公開APIのレスポンスキャッシュを無効にし、毎回ビューの処理とクエリ数を計測する
+    """
+    from django.conf import settings
+
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []},
+        API_CACHE={**getattr(settings, 'API_CACHE', {}), 'ENABLED': use_cache},
+    )
+
+
+def _client(user=None):
+    client = APIClient()
+    if user is not None:
+        # 実際のリクエストと同じく JWT の検証・ユーザー取得まで含めて計測する
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+def _cycle(values, iteration):
+    return values[iteration % len(values)]
+
+
+class Fixtures:
+    """計測に使うユーザー・猫・応募をデータベースから決定的に選ぶ"""
+
+    def __init__(self):
+        from accounts.models import User
+        from applications.models import Application
+        from cats.models import PublicCat
+        from shelters.models import ShelterUser
+
+        self.public_cat_ids = list(PublicCat.objects.order_by('pk').values_list('pk', flat=True)[:200])
+        if not self.public_cat_ids:
+            raise RuntimeError('公開中の猫がいません。generate_dataset でデータを作成してください')
+
+        # 検索語: よくある猫の名前と都道府県
+        self.search_terms = list(
+            PublicCat.objects.values_list('name', flat=True)
+            .annotate(count=Count('pk')).order_by('-count', 'name')[:10]
+        )
+        self.prefectures = list(
+            PublicCat.objects.values_list('shelter_prefecture', flat=True)
+            .annotate(count=Count('pk')).order_by('-count', 'shelter_prefecture')[:5]
+        )
+
+        # 応募が最も多い団体の管理者（受信箱・ステータス更新）
+        busiest = (
+            Application.objects.values('shelter_id').annotate(count=Count('pk'))
+            .order_by('-count', 'shelter_id').first()
+        )
+        if busiest is None:
+            raise RuntimeError('応募がありません。generate_dataset でデータを作成してください')
+        member = (
+            ShelterUser.objects.filter(shelter_id=busiest['shelter_id'], role='admin', is_active=True)
+            .select_related('user').order_by('pk').first()
+        )
+        self.shelter_admin = member.user
+        self.pending_application_ids = list(
+            Application.objects.filter(shelter_id=busiest['shelter_id'], status='pending')
+            .order_by('pk').values_list('pk', flat=True)[:100]
+        )
+
+        # メッセージが最も多い応募（チャット）
+        chat = (
+            Application.objects.annotate(message_count=Count('messages'))
+            .order_by('-message_count', 'pk').select_related('applicant').first()
+        )
+        self.chat_application_id = chat.pk
+        self.chat_user = chat.applicant
+
+        # 進行中の応募が無い応募者（応募作成・お気に入り）
+        self.adopter = (
+            User.objects.filter(user_type='adopter')
+            .exclude(applications__status__in=['pending', 'reviewing', 'accepted'])
+            .order_by('pk').first()
+        )
+        # 募集中の猫（お気に入り・応募は募集終了の猫を受け付けない）
+        self.open_cat_ids = list(
+            PublicCat.objects.filter(status='open').order_by('pk').values_list('pk', flat=True)[:300]
+        )
+        applied = set(Application.objects.filter(applicant=self.adopter).values_list('cat_id', flat=True))
+        self.applicable_cat_ids = [cat_id for cat_id in self.open_cat_ids if cat_id not in applied]
+
+        self.chat_poll_url = self._tail_cursor_url()
+
+    def _tail_cursor_url(self):
+        """チャットの最後までページを進めた next（新着のみを取得するポーリング用 URL）"""
+        client = _client(self.chat_user)
+        url = f'/api/messages/?application={self.chat_application_id}&cursor=&page_size=200'
+        while True:
+            data = client.get(url).json()
+            if not data['results']:
+                return url
+            url = data['next']
+
+
+def build_scenarios(fixtures):
+    """シナリオの一覧（名前順ではなく実行順）"""
+    from .harness import Scenario
+
+    anonymous = _client()
+    adopter = _client(fixtures.adopter)
+    chat_user = _client(fixtures.chat_user)
+    shelter_admin = _client(fixtures.shelter_admin)
+
+    def browse_search(i):
+        params = {
+            'search': _cycle(fixtures.search_terms, i),
+            'gender': _cycle(['male', 'female'], i),
+            'prefecture': _cycle(fixtures.prefectures, i),
+        }
+        return anonymous.get('/api/cats/', params)
+
+    def application_create(i):
+        return adopter.post('/api/applications/', {
+            'cat': _cycle(fixtures.applicable_cat_ids, i),
+            'message': 'よろしくお願いします。',
+            'term_agreement': True,
+            'lifelong_care_agreement': True,
+            'spay_neuter_agreement': True,
+            'medical_cost_understanding': True,
+            'family_consent': True,
+        }, format='json')
+
+    scenarios = [
+        Scenario('browse_list', lambda i: anonymous.get('/api/cats/')),
+        Scenario('browse_list_cursor', lambda i: anonymous.get('/api/cats/', {'cursor': ''})),
+        Scenario('browse_search', browse_search),
+        Scenario('browse_facets', lambda i: anonymous.get(
+            '/api/cats/facets/', {'prefecture': _cycle(fixtures.prefectures, i)}
+        )),
+        Scenario('cat_detail', lambda i: anonymous.get(f'/api/cats/{_cycle(fixtures.public_cat_ids, i)}/')),
+        Scenario('favorite_toggle', lambda i: adopter.post(
+            '/api/favorites/toggle/', {'cat': _cycle(fixtures.open_cat_ids, i)}, format='json'
+        ), rollback=True, expected_status=(200, 201)),
+        Scenario('application_create', application_create, rollback=True, expected_status=(200, 201)),
+        Scenario('shelter_inbox', lambda i: shelter_admin.get('/api/applications/', {'cursor': ''})),
+        Scenario('chat_send', lambda i: chat_user.post('/api/messages/', {
+            'application_id': fixtures.chat_application_id, 'content': f'メッセージ {i}',
+        }, format='json'), rollback=True, expected_status=(201,)),
+        Scenario('chat_load', lambda i: chat_user.get(
+            '/api/messages/', {'application': fixtures.chat_application_id, 'cursor': ''}
+        )),
+        Scenario('chat_poll', lambda i: chat_user.get(fixtures.chat_poll_url)),
+    ]
+    if fixtures.pending_application_ids:
+        scenarios.insert(-3, Scenario('application_status', lambda i: shelter_admin.patch(
+            f'/api/applications/{_cycle(fixtures.pending_application_ids, i)}/status/',
+            {'status': 'reviewing'}, format='json',
+        ), rollback=True))
+    if not fixtures.applicable_cat_ids:
+        scenarios = [scenario for scenario in scenarios if scenario.name != 'application_create']
+    return scenarios
+
+
+def run(iterations, warmup, only=None, use_cache=False, stdout=None):
+    """全シナリオを計測して {シナリオ名: 結果} を返す"""
+    from .harness import measure
+
+    results = {}
+    with benchmark_settings(use_cache):
+        fixtures = Fixtures()
+        for scenario in build_scenarios(fixtures):
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = measure(scenario, iterations, warmup)
+            if stdout:
+                stdout.write(f'  {scenario.name}: done\n')
+    return results
@@ -0,0 +1,82 @@
+"""
+監査ログ（accounts.audit）の書き込みオーバーヘッドのベンチマーク
+
+同じ書き込みを監査ログの無効・有効で計測し、1回あたりの増分を比較する。
+監査ログはトランザクション確定後に保存されるため、書き込みはロールバックせずに確定させ、
+リクエストと同じく audit_buffer() の終了時の保存（bulk_create）まで含めて計測する。
+
+- cat_save: 猫の名前の更新
+- application_save: 応募のメッセージの更新
+- message_edit: チャットメッセージの編集
+"""
+import itertools
+
+from django.conf import settings
+from django.test import override_settings
+
+
+def audit_settings(enabled):
+    return override_settings(AUDIT_LOG={**getattr(settings, 'AUDIT_LOG', {}), 'ENABLED': enabled})
+
+
+class Fixtures:
+    """書き込み対象の猫・応募・メッセージをデータベースから決定的に選ぶ"""
+
+    def __init__(self):
+        from applications.models import Application, Message
+        from cats.models import Cat
+
+        self.cat_ids = list(Cat.objects.order_by('pk').values_list('pk', flat=True)[:100])
+        self.application_ids = list(Application.objects.order_by('pk').values_list('pk', flat=True)[:100])
+        self.message_ids = list(Message.objects.order_by('pk').values_list('pk', flat=True)[:100])
+        if not (self.cat_ids and self.application_ids and self.message_ids):
+            raise RuntimeError('データがありません。generate_dataset でデータを作成してください')
+
+
+def build_scenarios(fixtures):
+    from accounts.audit import audit_buffer
+    from applications.models import Application, Message
+    from cats.models import Cat
+
+    from .api import _cycle
+    from .harness import Done, Scenario
+
+    def save(model, ids, field, value):
+        # 無効・有効の計測で同じ値を書き込むと差分が無く記録されないため、実行ごとに異なる値にする
+        counter = itertools.count()
+
+        def run(i):
+            with audit_buffer():
+                instance = model.objects.get(pk=_cycle(ids, i))
+                setattr(instance, field, f'{value} {next(counter)}')
+                instance.save()
+            return Done()
+        return run
+
+    return [
+        Scenario('cat_save', save(Cat, fixtures.cat_ids, 'name', 'ねこ')),
+        Scenario('application_save', save(Application, fixtures.application_ids, 'message', 'よろしくお願いします')),
+        Scenario('message_edit', save(Message, fixtures.message_ids, 'content', 'メッセージ')),
+    ]
+
+
+def run(iterations, warmup, only=None, use_cache=False, stdout=None):
+    """監査ログの無効（<名前>）・有効（<名前>_audit）で計測して {シナリオ名: 結果} を返す"""
+    from .harness import measure
+
+    results = {}
+    fixtures = Fixtures()
+    for scenario in build_scenarios(fixtures):
+        if only and scenario.name not in only:
+            continue
+        with audit_settings(False):
+            base = results[scenario.name] = measure(scenario, iterations, warmup)
+        with audit_settings(True):
+            audited = results[f'{scenario.name}_audit'] = measure(scenario, iterations, warmup)
+        if stdout:
+            overhead = audited['p50_ms'] - base['p50_ms']
+            stdout.write(
+                f'  {scenario.name}: p50 {base["p50_ms"]:.2f}ms -> {audited["p50_ms"]:.2f}ms '
+                f'({overhead:+.2f}ms per write), queries {base["queries_mean"]:g} -> {audited["queries_mean"]:g}\n'
+            )
+    return results
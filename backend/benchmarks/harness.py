@@ -0,0 +1,139 @@
+"""
+ベンチマークの計測・集計・ベースライン比較
+
+シナリオ（1リクエスト分の処理）を繰り返し実行し、
+レイテンシ（p50/p95/p99）・スループット・1リクエストあたりの SQL クエリ数を集計する。
+結果は JSON で保存でき、保存済みのベースラインと比較して劣化を検出する。
+"""
+import json
+import math
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Rollback(Exception):
+    """計測後に書き込みを取り消すための例外"""
+
+
+def percentile(values, p):
+    """最近傍法のパーセンタイル（values はソート済み）"""
+    if not values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(values)) - 1)
+    return values[index]
+
+
+class Done:
+    """HTTP 以外の処理（モデルの保存・レンダリングなど）を計測するシナリオの戻り値"""
+
+    status_code = 200
+
+
+class Scenario:
+    """計測対象の1操作
+
+    run(iteration) は1回分の処理を行い、レスポンス（status_code を持つもの）を返す。
+    rollback=True の場合は1回ごとに書き込みを取り消し、毎回同じ状態から計測する
+    （トランザクション確定後の処理（on_commit）は実行されない）。
+    """
+
+    def __init__(self, name, run, rollback=False, expected_status=(200,)):
+        self.name = name
+        self.run = run
+        self.rollback = rollback
+        self.expected_status = expected_status
+
+    def execute(self, iteration):
+        if not self.rollback:
+            return self.run(iteration)
+        response = None
+        try:
+            with transaction.atomic():
+                response = self.run(iteration)
+                raise Rollback
+        except Rollback:
+            pass
+        return response
+
+
+def measure(scenario, iterations, warmup=0):
+    """シナリオを実行して計測結果の dict を返す"""
+    for iteration in range(warmup):
+        scenario.execute(iteration)
+
+    latencies = []
+    queries = []
+    for iteration in range(warmup, warmup + iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = scenario.execute(iteration)
+            elapsed = time.perf_counter() - started
+        status_code = getattr(response, 'status_code', None)
+        if status_code not in scenario.expected_status:
+            body = getattr(response, 'content', b'')[:300].decode('utf-8', 'replace')
+            raise AssertionError(f'{scenario.name}: unexpected status {status_code}: {body}')
+        latencies.append(elapsed * 1000)
+        # 計測用のセーブポイント操作は数えない
+        queries.append(sum(1 for query in context.captured_queries if 'SAVEPOINT' not in query['sql']))
+
+    latencies.sort()
+    total_seconds = sum(latencies) / 1000
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'throughput_rps': round(iterations / total_seconds, 1) if total_seconds else 0.0,
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else 0,
+        'queries_max': max(queries) if queries else 0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """ベースラインと比較して劣化の一覧（文字列）を返す
+
+    - クエリ数: ベースラインの最大値を1つでも超えたら劣化
+    - レイテンシ: p95 がベースラインの (1 + tolerance) 倍を超えたら劣化
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries_max'] > base['queries_max']:
+            regressions.append(f"{name}: queries {base['queries_max']} -> {result['queries_max']}")
+        if tolerance is not None and result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f}ms -> {result['p95_ms']:.1f}ms")
+    return regressions
+
+
+def format_table(results, baseline=None):
+    header = f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}"
+    lines = [header, '-' * len(header)]
+    for name, result in results.items():
+        queries = f"{result['queries_mean']:g}"
+        if result['queries_max'] != result['queries_mean']:
+            queries += f"/{result['queries_max']}"
+        line = (
+            f"{name:<28}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+            f"{result['throughput_rps']:>10.1f}{queries:>10}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            change = (result['p95_ms'] / base['p95_ms'] - 1) * 100 if base['p95_ms'] else 0
+            line += f"   (p95 {change:+.0f}% vs baseline)"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_results(path, results, meta):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+        f.write('\n')
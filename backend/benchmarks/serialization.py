@@ -0,0 +1,111 @@
+"""
+JSON のシリアライズ・圧縮のベンチマーク
+
+一覧 API のレスポンスデータ（response.data）を一度取得し、レンダリング・パース・圧縮だけを計測する。
+DRF 標準（json）と orjson（config.renderers / config.parsers）を比較し、転送量（バイト数）も出力する。
+
+- <対象>_render_json / <対象>_render_orjson: JSONRenderer / FastJSONRenderer での生成
+- <対象>_parse_json / <対象>_parse_orjson: JSONParser / FastJSONParser での読み込み
+- <対象>_gzip / <対象>_br: config.compression での圧縮（br は Brotli がある場合のみ）
+
+対象:
+- cats: 猫一覧（匿名・cursor・100件）
+- applications: 団体の応募一覧（団体管理者・cursor・100件）
+"""
+import io
+
+from .api import _client, benchmark_settings
+
+PAGE_SIZE = 100
+
+
+def load_payloads(fixtures):
+    """{対象名: response.data}"""
+    anonymous = _client()
+    shelter_admin = _client(fixtures.shelter_admin)
+    payloads = {}
+    for name, client, url in (
+        ('cats', anonymous, '/api/cats/'),
+        ('applications', shelter_admin, '/api/applications/'),
+    ):
+        response = client.get(url, {'cursor': '', 'page_size': PAGE_SIZE})
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: unexpected status {response.status_code}')
+        payloads[name] = response.data
+    return payloads
+
+
+def build_scenarios(payloads):
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from config import compression
+    from config.parsers import FastJSONParser
+    from config.renderers import FastJSONRenderer
+
+    from .harness import Done, Scenario
+
+    def render(renderer, data):
+        def run(i):
+            renderer.render(data, 'application/json', {})
+            return Done()
+        return run
+
+    def parse(parser, content):
+        def run(i):
+            parser.parse(io.BytesIO(content), 'application/json', {})
+            return Done()
+        return run
+
+    def compress(content, encoding):
+        def run(i):
+            compression.compress(content, encoding)
+            return Done()
+        return run
+
+    scenarios = []
+    sizes = {}
+    for name, data in payloads.items():
+        content = JSONRenderer().render(data, 'application/json', {})
+        sizes[name] = {'identity': len(content)}
+        scenarios += [
+            Scenario(f'{name}_render_json', render(JSONRenderer(), data)),
+            Scenario(f'{name}_render_orjson', render(FastJSONRenderer(), data)),
+            Scenario(f'{name}_parse_json', parse(JSONParser(), content)),
+            Scenario(f'{name}_parse_orjson', parse(FastJSONParser(), content)),
+            Scenario(f'{name}_gzip', compress(content, 'gzip')),
+        ]
+        sizes[name]['gzip'] = len(compression.compress(content, 'gzip'))
+        if compression.brotli is not None:
+            scenarios.append(Scenario(f'{name}_br', compress(content, 'br')))
+            sizes[name]['br'] = len(compression.compress(content, 'br'))
+    return scenarios, sizes
+
+
+def run(iterations, warmup, only=None, use_cache=False, stdout=None):
+    """全シナリオを計測して {シナリオ名: 結果} を返す（圧縮のシナリオは圧縮後のバイト数も含む）"""
+    from .api import Fixtures
+    from .harness import measure
+
+    results = {}
+    with benchmark_settings(use_cache):
+        payloads = load_payloads(Fixtures())
+    scenarios, sizes = build_scenarios(payloads)
+
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = measure(scenario, iterations, warmup)
+        target, _, kind = scenario.name.partition('_')
+        if kind in sizes[target]:
+            results[scenario.name]['bytes'] = sizes[target][kind]
+        if kind.startswith('render_'):
+            results[scenario.name]['bytes'] = sizes[target]['identity']
+
+    if stdout:
+        for target, size in sizes.items():
+            detail = ', '.join(
+                f'{encoding} {count:,} bytes ({count / size["identity"]:.0%})' for encoding, count in size.items()
+            )
+            stdout.write(f'  {target}: {detail}\n')
+    return results
@@ -5,3 +5,6 @@ class CatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cats'
     verbose_name = '保護猫管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
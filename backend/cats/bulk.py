@@ -0,0 +1,172 @@
+"""
+保護猫の一括作成・更新（POST /api/cats/bulk/）
+
+団体メンバーが複数の猫の公開設定・ステータス・項目をまとめて変更・登録する。
+
+- 所属団体は1回だけ取得し（get_membership）、更新対象の猫は1クエリでまとめて読み込む
+- 各項目は単体の API と同じ CatCreateUpdateSerializer と Cat.clean() で検証する（スタッフ権限の制限も同じ）。
+  失敗した項目は結果に理由を返し、他の項目は反映する
+- 反映は1トランザクションの bulk_update / bulk_create で行う。Cat.save() とシグナルが行う処理
+  （検索用ドキュメント・相性ベクトル・公開カタログ・キャッシュ無効化・監査ログ）はここでまとめて行う
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from shelters.membership import get_membership
+from .models import Cat
+
+BATCH_SIZE = 500
+
+# 一括処理では変更しない外部キー（Model.full_clean() の存在確認クエリを省く）
+FULL_CLEAN_EXCLUDE = ['shelter', 'primary_image']
+
+
+def _error(index, errors, cat_id=None):
+    return {'index': index, 'id': cat_id, 'status': 'error', 'errors': errors}
+
+
+def _prepare(cat):
+    """Cat.save() と同じく検証し、派生フィールドを計算する（失敗時は ValidationError）"""
+    from .matching import encode_cat
+    from .search import build_search_document
+
+    cat.full_clean(exclude=FULL_CLEAN_EXCLUDE, validate_unique=False, validate_constraints=False)
+    cat.search_document = build_search_document(cat)
+    cat.match_vector = encode_cat(cat)
+
+
+def _after_write(cats, created, update_fields=None):
+    """Cat の保存時のシグナルの処理をまとめて行う（公開カタログ・キャッシュ無効化・監査ログ）"""
+    from accounts.audit import record_instances
+    from config.cache import bump_many_cat_versions
+    from .catalog import sync_public_cats
+
+    sync_public_cats([cat.pk for cat in cats])
+    bump_many_cat_versions((cat.pk, cat.shelter_id) for cat in cats)
+    record_instances(Cat, cats, created=created, update_fields=update_fields)
+
+
+class CatValidator:
+    """CatCreateUpdateSerializer による項目ごとの検証
+
+    項目ごとにシリアライザーを作るとフィールドの構築が毎回走るため、1つのシリアライザーを使い回す。
+    """
+
+    def __init__(self, context, partial=False):
+        from .serializers import CatCreateUpdateSerializer
+
+        self.serializer = CatCreateUpdateSerializer(context=context, partial=partial)
+
+    def validate(self, data, instance=None):
+        """(validated_data, None) または (None, エラー) を返す"""
+        from rest_framework import serializers
+
+        self.serializer.instance = instance
+        try:
+            return self.serializer.run_validation(data), None
+        except serializers.ValidationError as exc:
+            return None, serializers.as_serializer_error(exc)
+
+
+def bulk_update_cats(request, items):
+    """items（[{"id": 猫ID, 項目: 値, ...}, ...]）を反映し、項目ごとの結果を返す"""
+    membership = get_membership(request)
+    validator = CatValidator({'request': request}, partial=True)
+    results = [None] * len(items)
+
+    indexes = {}
+    for index, item in enumerate(items):
+        cat_id = item.get('id')
+        if not isinstance(cat_id, int) or isinstance(cat_id, bool):
+            results[index] = _error(index, {'id': ['猫のIDを指定してください。']})
+        elif cat_id in indexes:
+            results[index] = _error(index, {'id': ['同じ猫が複数回指定されています。']}, cat_id)
+        else:
+            indexes[cat_id] = index
+
+    cats = Cat.objects.select_related('shelter').in_bulk(list(indexes))
+    changed = []
+    fields = set()
+    for cat_id, index in indexes.items():
+        cat = cats.get(cat_id)
+        if cat is None or not membership.is_member(cat.shelter_id):
+            results[index] = _error(index, {'id': ['保護猫が見つからないか、編集する権限がありません。']}, cat_id)
+            continue
+
+        data = {name: value for name, value in items[index].items() if name != 'id'}
+        validated_data, errors = validator.validate(data, instance=cat)
+        if errors is not None:
+            results[index] = _error(index, errors, cat_id)
+            continue
+        changes = validator.serializer.permitted_changes(cat, dict(validated_data))
+        for name, value in changes.items():
+            setattr(cat, name, value)
+        try:
+            _prepare(cat)
+        except DjangoValidationError as e:
+            results[index] = _error(index, e.message_dict, cat_id)
+            continue
+        changed.append(cat)
+        fields.update(changes)
+        results[index] = {'index': index, 'id': cat_id, 'status': 'updated'}
+
+    if changed:
+        # bulk_update は auto_now を更新しないため明示的に設定する
+        now = timezone.now()
+        for cat in changed:
+            cat.updated_at = now
+        update_fields = sorted(fields)
+        with transaction.atomic():
+            Cat.objects.bulk_update(
+                changed, [*update_fields, *Cat.DERIVED_FIELDS, 'updated_at'], batch_size=BATCH_SIZE
+            )
+            _after_write(changed, created=False, update_fields=update_fields)
+    return results
+
+
+def validate_new_cat(validator, item, shelter):
+    """新規登録のレコードを検証し、(保存前の Cat, None) または (None, エラー) を返す"""
+    validated_data, errors = validator.validate(item)
+    if errors is not None:
+        return None, errors
+    cat = Cat(shelter=shelter, **validated_data)
+    try:
+        _prepare(cat)
+    except DjangoValidationError as e:
+        return None, e.message_dict
+    return cat, None
+
+
+def save_new_cats(cats):
+    """validate_new_cat() で検証済みの Cat をまとめて登録する（呼び出し側のトランザクション内で使う）"""
+    if not cats:
+        return
+    if connection.features.can_return_rows_from_bulk_insert:
+        Cat.objects.bulk_create(cats, batch_size=BATCH_SIZE)
+        _after_write(cats, created=True)
+    else:
+        # bulk_create で ID が返らないデータベース（MySQL）では1件ずつ保存する（シグナルで同期される）
+        for cat in cats:
+            cat.save()
+
+
+def bulk_create_cats(request, items):
+    """items（CatCreateUpdateSerializer と同じ形式のレコード）を所属団体の猫として登録し、項目ごとの結果を返す"""
+    shelter = get_membership(request).primary_shelter
+    validator = CatValidator({'request': request})
+    results = [None] * len(items)
+
+    created = []
+    for index, item in enumerate(items):
+        cat, errors = validate_new_cat(validator, item, shelter)
+        if errors is not None:
+            results[index] = _error(index, errors)
+        else:
+            created.append((index, cat))
+
+    with transaction.atomic():
+        save_new_cats([cat for _, cat in created])
+    for index, cat in created:
+        results[index] = {'index': index, 'id': cat.pk, 'status': 'created'}
+    return results
@@ -0,0 +1,96 @@
+"""
+公開カタログ（PublicCat）の更新
+
+一般公開の一覧・絞り込み・件数は PublicCat から読み込む。
+公開条件（猫の公開設定・団体の公開プロフィール・団体の審査状況）を満たす猫だけを保持し、
+団体名・所在地を複製しておくことで、一覧のたびに Cat と Shelter を結合して条件を再評価しない。
+
+更新は書き込みと同じトランザクション内で行う（差分のみ）:
+- Cat の保存（signals）・ステータス同期（Application.sync_cat_statuses）
+- CatImage の保存・削除によるメイン画像の変更（Cat.refresh_primary_images）
+- Shelter の保存（signals: 所属猫をまとめて更新）
+Cat / Shelter の削除は外部キーの CASCADE で削除される。
+全件の再構築は rebuild_public_catalog コマンドで行う。
+"""
+from django.db import connection
+
+BATCH_SIZE = 500
+
+
+def public_cat_queryset():
+    """公開条件を満たす猫"""
+    from .models import Cat
+
+    return Cat.objects.filter(
+        is_public=True,
+        shelter__public_profile_enabled=True,
+        shelter__verification_status='approved'
+    )
+
+
+def build_public_cat(cat):
+    from .models import PublicCat
+
+    entry = PublicCat(
+        cat_id=cat.pk,
+        shelter_id=cat.shelter_id,
+        shelter_name=cat.shelter.name,
+        shelter_prefecture=cat.shelter.prefecture,
+        shelter_city=cat.shelter.city or '',
+    )
+    for field in PublicCat.COPIED_FIELDS:
+        setattr(entry, field, getattr(cat, field))
+    return entry
+
+
+def sync_public_cats(cat_ids):
+    """指定した猫の公開カタログの行を作成・更新・削除する（BATCH_SIZE 件ごとに3クエリ）"""
+    from .models import PublicCat
+
+    cat_ids = list(cat_ids)
+    update_fields = [
+        'shelter', 'shelter_name', 'shelter_prefecture', 'shelter_city', *PublicCat.COPIED_FIELDS
+    ]
+    # MySQL は ON DUPLICATE KEY UPDATE のため対象の一意キーを指定できない
+    unique_fields = ['cat'] if connection.features.supports_update_conflicts_with_target else None
+
+    for start in range(0, len(cat_ids), BATCH_SIZE):
+        chunk = cat_ids[start:start + BATCH_SIZE]
+        cats = public_cat_queryset().filter(pk__in=chunk).select_related('shelter').only(
+            'shelter__name', 'shelter__prefecture', 'shelter__city', 'shelter_id', *PublicCat.COPIED_FIELDS
+        )
+        entries = [build_public_cat(cat) for cat in cats]
+        public_ids = [entry.cat_id for entry in entries]
+
+        PublicCat.objects.filter(cat_id__in=chunk).exclude(cat_id__in=public_ids).delete()
+        if entries:
+            PublicCat.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+
+
+def sync_shelter_public_cats(shelter_id):
+    """団体の変更時: 所属猫をまとめて更新する（公開状態・団体名・所在地）"""
+    from .models import Cat
+
+    sync_public_cats(Cat.objects.filter(shelter_id=shelter_id).values_list('pk', flat=True))
+
+
+def rebuild_public_catalog(batch_size=BATCH_SIZE):
+    """全ての猫について公開カタログを再構築する。処理した猫の数を返す"""
+    from .models import Cat
+
+    last_id = 0
+    total = 0
+    while True:
+        cat_ids = list(
+            Cat.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not cat_ids:
+            return total
+        sync_public_cats(cat_ids)
+        total += len(cat_ids)
+        last_id = cat_ids[-1]
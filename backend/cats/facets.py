@@ -0,0 +1,126 @@
+"""
+保護猫一覧の絞り込み条件と、条件ごとの件数（ファセット）の集計
+
+一覧API（CatListCreateView）と件数API（CatFacetsView）で同じ絞り込み条件を使う。
+どちらも公開カタログ（PublicCat）に対して適用する。
+
+件数は「その条件以外の現在の絞り込み」を適用した上で、選択肢ごとに数える
+（例: 性別=オス で絞り込み中でも、性別の各選択肢の件数は性別以外の条件で数える）。
+1ファセットにつき GROUP BY 1クエリ + 合計1クエリの固定クエリ数で集計する。
+"""
+from django.db.models import Count
+
+from .models import PublicCat
+from .search import split_terms
+
+# クエリパラメータ名 → 絞り込み対象フィールド（PublicCat）
+FACET_FIELDS = {
+    'gender': 'gender',
+    'age_category': 'age_category',
+    'prefecture': 'shelter_prefecture',
+    'activity_level': 'activity_level',
+    'affection_level': 'affection_level',
+    'maintenance_level': 'maintenance_level',
+    'status': 'status',
+}
+
+# 複数選択（繰り返し指定・カンマ区切り）に対応するファセット
+MULTI_VALUE_FACETS = {'prefecture'}
+
+
+def _is_valid_value(name, value):
+    """値がフィールドの選択肢（選択肢の無いフィールドは型）に合うか"""
+    from django.core.exceptions import ValidationError
+
+    field = PublicCat._meta.get_field(FACET_FIELDS[name])
+    if field.choices:
+        return value in {str(choice) for choice, _label in field.choices}
+    try:
+        field.to_python(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def parse_facet_filters(query_params):
+    """クエリパラメータから絞り込み条件 {ファセット名: [値, ...]} を取り出す
+
+    選択肢・型に合わない値（例: affection_level=abc）は無視する。
+    """
+    filters = {}
+    for name in FACET_FIELDS:
+        if name in MULTI_VALUE_FACETS:
+            # カンマ区切り（frontendから single string で送られた場合）も考慮し、重複・空文字を除去
+            values = []
+            for value in query_params.getlist(name):
+                values.extend(part for part in value.split(',') if part)
+            values = sorted(set(values))
+        else:
+            value = query_params.get(name)
+            values = [value] if value else []
+        values = [value for value in values if _is_valid_value(name, value)]
+        if values:
+            filters[name] = values
+    return filters
+
+
+def apply_facet_filters(queryset, filters, exclude=None):
+    """絞り込み条件を適用する（exclude に指定したファセットの条件は適用しない）"""
+    for name, values in filters.items():
+        if name == exclude:
+            continue
+        field = FACET_FIELDS[name]
+        if len(values) == 1:
+            queryset = queryset.filter(**{field: values[0]})
+        else:
+            queryset = queryset.filter(**{f'{field}__in': values})
+    return queryset
+
+
+def facet_signature(search, shelter_id, filters):
+    """キャッシュキー用に絞り込み条件を正規化した文字列"""
+    parts = [
+        f'search={" ".join(split_terms(search or ""))}',
+        f'shelter_id={shelter_id or ""}',
+    ]
+    parts.extend(f'{name}={",".join(values)}' for name, values in sorted(filters.items()))
+    return '&'.join(parts)
+
+
+def _choices(name):
+    return PublicCat._meta.get_field(FACET_FIELDS[name]).choices
+
+
+def count_facets(queryset, filters):
+    """ファセットごとの選択肢別件数と、全条件を適用した合計件数を返す
+
+    Returns:
+        dict: {'total': int, 'facets': {ファセット名: [{'value', 'label', 'count'}, ...]}}
+        選択肢のあるファセットは件数0の選択肢も選択肢の定義順で含める。都道府県は件数の多い順。
+    """
+    facets = {}
+    for name, field_name in FACET_FIELDS.items():
+        rows = (
+            apply_facet_filters(queryset, filters, exclude=name)
+            .values_list(field_name)
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        counts = dict(rows)
+        choices = _choices(name)
+        if choices:
+            facets[name] = [
+                {'value': value, 'label': str(label), 'count': counts.get(value, 0)}
+                for value, label in choices
+            ]
+        else:
+            facets[name] = [
+                {'value': value, 'label': value, 'count': count}
+                for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+                if value
+            ]
+
+    return {
+        'total': apply_facet_filters(queryset, filters).count(),
+        'facets': facets,
+    }
@@ -0,0 +1,208 @@
+"""
+保護猫画像の派生画像（サムネイル・WebP/AVIF）の生成
+
+CatImage の保存時（トランザクション確定後）にバックグラウンドスレッドで生成し、
+元画像と同じストレージ・同じディレクトリに保存する（ローカル / R2 の S3Boto3Storage 共通）。
+
+    cats/abc.jpg
+    cats/abc_320w.webp, cats/abc_640w.webp, cats/abc_1280w.webp
+    cats/abc_320w.jpg,  ...
+
+生成結果（ストレージ上のファイル名）は CatImage.variants に {形式: {幅: 名前}} で保存し
+（メイン画像の場合は Cat.primary_image_variants にも複製する）、
+シリアライザーは variant_urls() / variant_srcset() で URL に変換して返す。
+生成前・失敗時は元画像のみを返す（クライアントは srcset が無ければ元画像を使う）。
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# 形式ごとの Pillow の保存パラメータと拡張子
+FORMATS = {
+    'avif': {'format': 'AVIF', 'ext': 'avif', 'params': {'quality': 55}},
+    'webp': {'format': 'WEBP', 'ext': 'webp', 'params': {'quality': 80, 'method': 4}},
+    'jpeg': {'format': 'JPEG', 'ext': 'jpg', 'params': {'quality': 82, 'optimize': True, 'progressive': True}},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _config(name, default):
+    return getattr(settings, 'CAT_IMAGE_VARIANTS', {}).get(name, default)
+
+
+def variant_widths():
+    return sorted(_config('WIDTHS', (320, 640, 1280)))
+
+
+def variant_formats():
+    """生成する形式（Pillow が AVIF に対応していない環境では AVIF を除外）"""
+    formats = []
+    for name in _config('FORMATS', ('webp', 'jpeg')):
+        if name == 'avif' and not features.check('avif'):
+            continue
+        if name in FORMATS:
+            formats.append(name)
+    return formats
+
+
+def variant_name(original_name, width, format_name):
+    """元画像の隣に置く派生画像のファイル名（例: cats/abc.jpg → cats/abc_320w.webp）"""
+    root, _ = os.path.splitext(original_name)
+    return f'{root}_{width}w.{FORMATS[format_name]["ext"]}'
+
+
+def _target_widths(original_width):
+    """元画像より大きい幅は生成しない（元画像が最小幅未満なら元の幅で1枚だけ作る）"""
+    widths = [width for width in variant_widths() if width < original_width]
+    return widths or [original_width]
+
+
+def _encode(image, format_name):
+    spec = FORMATS[format_name]
+    if format_name == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, spec['format'], **spec['params'])
+    return buffer.getvalue()
+
+
+def generate_variants(cat_image):
+    """派生画像を生成して保存し、{形式: {幅: ファイル名}} を返す"""
+    field = cat_image.image
+    storage = field.storage
+
+    with field.open('rb') as source:
+        original = Image.open(source)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'transparency' in original.info or original.mode.endswith('A')
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {name: {} for name in variant_formats()}
+    for width in _target_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for format_name in variants:
+            name = variant_name(field.name, width, format_name)
+            if storage.exists(name):
+                storage.delete(name)
+            saved_name = storage.save(name, ContentFile(_encode(resized, format_name)))
+            variants[format_name][str(width)] = saved_name
+    return variants
+
+
+def delete_variants(variants, storage):
+    for names in (variants or {}).values():
+        for name in names.values():
+            try:
+                storage.delete(name)
+            except Exception:
+                logger.warning(f'Failed to delete image variant: {name}')
+
+
+def process_cat_image(image_id):
+    """CatImage の派生画像を生成して CatImage.variants を更新する"""
+    from config.cache import bump_cat_versions
+    from .models import Cat, CatImage
+
+    cat_image = CatImage.objects.select_related('cat').filter(pk=image_id).first()
+    if cat_image is None or not cat_image.image:
+        return None
+
+    previous = cat_image.variants
+    try:
+        variants = generate_variants(cat_image)
+    except Exception:
+        logger.exception(f'Failed to generate image variants: cat_image={image_id}')
+        return None
+
+    # 生成中に画像が差し替えられていないことを確認してから保存する（save() は経由しない）
+    updated = CatImage.objects.filter(pk=image_id, image=cat_image.image.name).update(variants=variants)
+    if not updated:
+        delete_variants(variants, cat_image.image.storage)
+        return None
+
+    # 古い形式・幅のファイルが残らないよう、今回生成しなかったものを削除する
+    current = {name for names in variants.values() for name in names.values()}
+    stale = {
+        format_name: {width: name for width, name in names.items() if name not in current}
+        for format_name, names in (previous or {}).items()
+    }
+    delete_variants(stale, cat_image.image.storage)
+
+    if cat_image.is_primary:
+        Cat.refresh_primary_images([cat_image.cat_id])
+
+    # 派生画像の URL を含む公開APIのキャッシュを無効化
+    bump_cat_versions(cat_image.cat_id, cat_image.cat.shelter_id)
+    return variants
+
+
+def _run(image_id):
+    try:
+        process_cat_image(image_id)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_config('MAX_WORKERS', 2), thread_name_prefix='cat-image-variants'
+            )
+        return _executor
+
+
+def schedule_variants(image_id):
+    """トランザクション確定後に派生画像の生成を予約する（リクエスト処理はブロックしない）"""
+    if not _config('ENABLED', True):
+        return
+
+    def _submit():
+        if _config('ASYNC', True):
+            _get_executor().submit(_run, image_id)
+        else:
+            process_cat_image(image_id)
+
+    transaction.on_commit(_submit)
+
+
+# --- シリアライザー向け ---
+
+def variant_urls(variants, request=None):
+    """CatImage.variants / Cat.primary_image_variants を {形式: {幅: URL}} に変換する（未生成なら空 dict）"""
+    if not variants:
+        return {}
+    from .models import CatImage
+
+    storage = CatImage._meta.get_field('image').storage
+    urls = {}
+    for format_name, names in variants.items():
+        urls[format_name] = {}
+        for width, name in sorted(names.items(), key=lambda item: int(item[0])):
+            url = storage.url(name)
+            urls[format_name][width] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def variant_srcset(variants, request=None):
+    """{形式: "URL 320w, URL 640w, ..."}（<img srcset> / <source srcset> にそのまま使える形式）"""
+    return {
+        format_name: ', '.join(f'{url} {width}w' for width, url in urls.items())
+        for format_name, urls in variant_urls(variants, request).items()
+    }
@@ -0,0 +1,239 @@
+"""
+保護猫の一括取り込み（CSV / JSONL）
+
+他のシステムや表計算ソフトで管理していた猫の一覧を、所属団体の猫として登録する。
+API（POST /api/cats/import/）とマネジメントコマンド（import_cats）から使う。
+
+- ファイルは1行ずつ読み込み、CHUNK_SIZE 行ごとに検証して bulk_create する（ファイルの大きさに関わらずメモリは一定）
+- 列名は Cat のフィールド名（gender）または項目名（性別）。選択肢は値（male）または表示名（オス）で指定できる
+- 真偽値は true / false・1 / 0・はい / いいえ・可 / 不可 など。空のセルは未指定（既定値）として扱う
+- 各行は単体の登録 API と同じ検証（CatCreateUpdateSerializer・Cat.clean()）を行い、失敗した行は行番号と理由を返す
+- チャンクごとに確定する（途中でファイルの読み込みに失敗しても、それまでのチャンクは登録済み）。
+  dry_run=True は検証のみ行い、登録しない
+"""
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .bulk import CatValidator, save_new_cats, validate_new_cat
+from .models import Cat
+
+CHUNK_SIZE = 500
+
+# 返すエラーの最大件数（件数は全行分を数える）
+MAX_ERRORS = 1000
+
+TRUE_VALUES = {'true', '1', 'yes', 'y', 'on', 'はい', '可', '○', '◯', 'あり', '有'}
+FALSE_VALUES = {'false', '0', 'no', 'n', 'off', 'いいえ', '不可', '×', 'なし', '無'}
+
+FORMATS = ('csv', 'jsonl')
+
+
+def import_fields():
+    from .serializers import CatCreateUpdateSerializer
+
+    return [name for name in CatCreateUpdateSerializer.Meta.fields if name != 'id']
+
+
+def _normalize(text):
+    return str(text).strip().lower()
+
+
+def build_column_map():
+    """{正規化した列名: フィールド名}（フィールド名と項目名の両方）"""
+    columns = {}
+    for name in import_fields():
+        field = Cat._meta.get_field(name)
+        columns[_normalize(name)] = name
+        columns.setdefault(_normalize(field.verbose_name), name)
+    return columns
+
+
+def build_choice_maps():
+    """{フィールド名: {正規化した値・表示名: 値}}"""
+    maps = {}
+    for name in import_fields():
+        field = Cat._meta.get_field(name)
+        if field.choices:
+            choices = {}
+            for value, label in field.flatchoices:
+                choices[_normalize(value)] = value
+                choices.setdefault(_normalize(label), value)
+            maps[name] = choices
+    return maps
+
+
+def is_text_encoding(encoding):
+    """文字コードとして使えるか（base64 などテキスト以外のコーデックは不可）"""
+    try:
+        return codecs.lookup(encoding)._is_text_encoding
+    except LookupError:
+        return False
+
+
+def detect_format(filename):
+    return 'jsonl' if str(filename).lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class ImportResult:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.unknown_columns = []
+        self.aborted = None
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'total': self.total,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'unknown_columns': self.unknown_columns,
+            'aborted': self.aborted,
+        }
+
+
+class RowConverter:
+    """1行（列名: 値）を CatCreateUpdateSerializer の入力に変換する"""
+
+    def __init__(self):
+        self.column_map = build_column_map()
+        self.choice_maps = build_choice_maps()
+        self.boolean_fields = {
+            name for name in import_fields() if Cat._meta.get_field(name).get_internal_type() == 'BooleanField'
+        }
+        self.unknown_columns = []
+
+    def convert(self, record):
+        item, errors = {}, {}
+        for column, value in record.items():
+            if column is None:
+                # CSV で見出しより列が多い行
+                errors['row'] = ['見出しより列が多い行です。']
+                continue
+            name = self.column_map.get(_normalize(column))
+            if name is None:
+                if column not in self.unknown_columns:
+                    self.unknown_columns.append(column)
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+                if value == '':
+                    continue
+            if value is None:
+                continue
+            try:
+                item[name] = self.convert_value(name, value)
+            except ValueError as e:
+                errors[name] = [str(e)]
+        return item, errors
+
+    def convert_value(self, name, value):
+        if name in self.boolean_fields and isinstance(value, str):
+            normalized = _normalize(value)
+            if normalized in TRUE_VALUES:
+                return True
+            if normalized in FALSE_VALUES:
+                return False
+            raise ValueError(f'「{value}」は はい / いいえ（true / false）で指定してください。')
+        choices = self.choice_maps.get(name)
+        if choices is not None and not isinstance(value, bool):
+            normalized = _normalize(value)
+            if normalized in choices:
+                return choices[normalized]
+            raise ValueError(f'「{value}」は選択肢にありません。')
+        return value
+
+
+def read_records(stream, fmt='csv', encoding='utf-8-sig'):
+    """(行番号, レコード, エラー) を1行ずつ返す（stream はバイナリのファイル）"""
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    try:
+        if fmt == 'jsonl':
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, None, {'row': [f'JSON として読み込めません: {e.msg}']}
+                    continue
+                if not isinstance(record, dict):
+                    yield number, None, {'row': ['1行に1つの JSON オブジェクトを指定してください。']}
+                    continue
+                yield number, record, None
+        else:
+            reader = csv.DictReader(text)
+            for record in reader:
+                # 見出しが1行目のため、データ行はファイル上の行番号（複数行のセルは最終行）
+                yield reader.line_num, record, None
+    finally:
+        # 元のファイルは呼び出し側が閉じる
+        text.detach()
+
+
+def import_cats(stream, shelter, fmt='csv', encoding='utf-8-sig', request=None,
+                chunk_size=CHUNK_SIZE, dry_run=False, progress=None):
+    """ファイルの猫を shelter の猫として登録し、ImportResult を返す
+
+    request を指定した場合は、登録 API と同じくスタッフ権限の制限を適用する。
+    progress(result) はチャンクごとに呼ばれる。
+    """
+    from accounts.audit import audit_buffer, client_ip
+
+    if not is_text_encoding(encoding):
+        raise LookupError(f'unknown text encoding: {encoding}')
+    result = ImportResult(dry_run=dry_run)
+    converter = RowConverter()
+    validator = CatValidator({'request': request})
+    actor = request.user if request is not None else None
+    ip_address = client_ip(request) if request is not None else None
+    chunk = []
+
+    def flush():
+        cats = []
+        for number, item, errors in chunk:
+            if errors is None:
+                cat, errors = validate_new_cat(validator, item, shelter)
+            if errors:
+                result.add_error(number, errors)
+            else:
+                cats.append(cat)
+        if cats and not dry_run:
+            # 監査ログもチャンクごとに1回の bulk_create で保存する
+            with audit_buffer(actor=actor, ip_address=ip_address), transaction.atomic():
+                save_new_cats(cats)
+        result.created += len(cats)
+        chunk.clear()
+        if progress:
+            progress(result)
+
+    try:
+        for number, record, errors in read_records(stream, fmt, encoding):
+            result.total += 1
+            item = None
+            if errors is None:
+                item, errors = converter.convert(record)
+            # 変換のエラーも検証のエラーと同じく行番号順に記録する
+            chunk.append((number, item, errors or None))
+            if len(chunk) >= chunk_size:
+                flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        result.aborted = f'ファイルを読み込めませんでした（文字コード・形式を確認してください）: {e}'
+    if chunk:
+        flush()
+    result.unknown_columns = converter.unknown_columns
+    return result
@@ -0,0 +1,41 @@
+"""
+猫のメイン画像フィールド（Cat.primary_image 等）を CatImage から再計算するマネジメントコマンド
+
+通常は CatImage の保存・削除時に自動更新される。
+画像を SQL で直接変更した場合などの整合性回復に使用する。
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cats.models import Cat
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized primary image fields on cats in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1バッチで処理する猫の数（デフォルト: 500）',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            cat_ids = list(
+                Cat.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not cat_ids:
+                break
+            with transaction.atomic():
+                Cat.refresh_primary_images(cat_ids)
+            total += len(cat_ids)
+            last_id = cat_ids[-1]
+            self.stdout.write(f'  {total} 匹処理しました（ID {last_id} まで）')
+
+        self.stdout.write(self.style.SUCCESS(f'\n合計 {total} 匹の猫のメイン画像を更新しました'))
@@ -45,6 +45,9 @@ class Command(BaseCommand):
                     self.style.SUCCESS(f'✓ {cat.name} (ID:{cat.id}): メイン画像OK')
                 )
 
+        # 画像を修正しなかった猫も含め、猫側のメイン画像フィールドを実際の画像に合わせる
+        Cat.refresh_primary_images(cats.values_list('id', flat=True))
+
         self.stdout.write(
             self.style.SUCCESS(f'\n合計 {fixed_count} 匹の猫の画像設定を修正しました')
         )
@@ -0,0 +1,625 @@
+"""
+負荷試験・性能計測用の大量データを生成するマネジメントコマンド
+
+保護団体・スタッフ・応募者（プロフィール付き）・保護猫・猫画像・応募・メッセージ・お気に入りを
+現実に近い偏り（団体ごとの猫数・猫の人気・やり取りの多い応募など）で生成する。
+同じ --seed と件数を指定すれば毎回同じデータになる。
+
+    python manage.py generate_dataset --cats 100000 --users 50000 --applications 200000 \\
+        --messages 1000000 --favorites 300000
+
+- 保存は bulk_create をバッチ単位で行い、モデルの save() とシグナルは経由しない。
+  そのため検索用ドキュメント・マッチング用ベクトル・未読数・猫のステータス・メイン画像・
+  公開カタログ（PublicCat）は生成時に計算し、最後にまとめて反映する。
+- 画像は Pillow でローカル生成してストレージに保存する（派生画像は generate_image_variants で生成）。
+- 既存データとは別に追加する（ユーザー名は --prefix で始まる連番）。
+"""
+import io
+import random
+import time
+from array import array
+from bisect import bisect
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from accounts.models import ApplicantProfile, User
+from applications.models import ACTIVE_STATUSES, Application, Message
+from cats.catalog import sync_public_cats
+from cats.matching import encode_cat
+from cats.models import Cat, CatImage
+from cats.search import build_search_document
+from config.cache import CATALOG_VERSION_KEY, SHELTER_LIST_VERSION_KEY, bump_versions
+from favorites.models import Favorite
+from shelters.models import Shelter, ShelterUser
+
+# 都道府県（おおよその人口比）と市区町村
+PREFECTURES = {
+    '東京都': (14.0, ['世田谷区', '練馬区', '大田区', '杉並区', '八王子市']),
+    '神奈川県': (9.2, ['横浜市', '川崎市', '相模原市', '藤沢市']),
+    '大阪府': (8.8, ['大阪市', '堺市', '東大阪市', '豊中市']),
+    '愛知県': (7.5, ['名古屋市', '豊田市', '岡崎市']),
+    '埼玉県': (7.3, ['さいたま市', '川口市', '川越市']),
+    '千葉県': (6.3, ['千葉市', '船橋市', '松戸市']),
+    '兵庫県': (5.4, ['神戸市', '姫路市', '西宮市']),
+    '北海道': (5.1, ['札幌市', '旭川市', '函館市']),
+    '福岡県': (5.1, ['福岡市', '北九州市', '久留米市']),
+    '静岡県': (3.6, ['静岡市', '浜松市']),
+    '茨城県': (2.8, ['水戸市', 'つくば市']),
+    '広島県': (2.7, ['広島市', '福山市']),
+    '京都府': (2.5, ['京都市', '宇治市']),
+    '宮城県': (2.3, ['仙台市', '石巻市']),
+    '新潟県': (2.1, ['新潟市', '長岡市']),
+    '長野県': (2.0, ['長野市', '松本市']),
+    '沖縄県': (1.5, ['那覇市', '沖縄市']),
+}
+
+CAT_NAMES = [
+    'ミケ', 'タマ', 'クロ', 'シロ', 'チャトラ', 'ハチ', 'モモ', 'レオ', 'ソラ', 'ルナ',
+    'ココ', 'ムギ', 'キナコ', 'サバ', 'コタロウ', 'マル', 'ハナ', 'ユキ', 'トラ', 'ミルク',
+    'あずき', 'おもち', 'こむぎ', 'だいず', 'ごま', 'くるみ', 'みかん', 'のり', 'てん', 'ぽんず',
+]
+BREEDS = [('雑種', 80), ('アメリカンショートヘア', 5), ('スコティッシュフォールド', 4), ('ロシアンブルー', 3),
+          ('マンチカン', 3), ('ペルシャ', 2), ('メインクーン', 2), ('ノルウェージャンフォレストキャット', 1)]
+COLORS = [('キジトラ', 20), ('茶トラ', 15), ('サバトラ', 12), ('黒', 12), ('白', 8), ('三毛', 10),
+          ('ハチワレ', 10), ('サビ', 6), ('グレー', 5), ('ポインテッド', 2)]
+# 画像の毛色（RGB）
+COAT_RGB = [(60, 60, 60), (240, 240, 235), (215, 140, 60), (150, 140, 130), (120, 95, 70), (200, 190, 170)]
+
+PERSONALITY_PHRASES = [
+    '人懐っこく甘えん坊です。', 'おっとりしたマイペースな性格です。', '好奇心旺盛で遊ぶのが大好きです。',
+    '最初は少し人見知りですが、慣れると膝に乗ってきます。', '他の猫とも仲良く過ごせます。',
+    '抱っこが好きです。', 'おもちゃへの反応がとても良いです。', '静かな環境を好みます。',
+]
+DESCRIPTION_PHRASES = [
+    '保護されてから元気に過ごしています。', '食欲旺盛で健康状態は良好です。',
+    'ワクチン接種済みです。', '初めて猫を迎える方にもおすすめです。',
+    '先住猫のいるご家庭でも大丈夫です。', 'ゆっくり信頼関係を築いてくださる方を募集しています。',
+]
+MESSAGE_PHRASES = [
+    'ご応募ありがとうございます。', 'お見合いの日程を調整させてください。', '来週末はいかがでしょうか。',
+    '承知しました。よろしくお願いいたします。', '先住猫はいません。', '室内飼いを予定しています。',
+    'トライアルの準備物についてご案内します。', '写真を拝見しました。とても可愛いです。',
+    'ご質問ありがとうございます。', '本日はありがとうございました。', '様子はいかがですか？',
+]
+
+# 応募ステータスの分布（進行中の応募が多く、成立は一部）
+APPLICATION_STATUSES = [
+    ('pending', 35), ('reviewing', 20), ('trial', 5), ('accepted', 8), ('rejected', 20), ('cancelled', 12),
+]
+# 年齢区分ごとの人気（応募・お気に入りの集まりやすさ）
+AGE_POPULARITY = {'kitten': 3.0, 'adult': 1.0, 'senior': 0.5, 'unknown': 0.8}
+
+# 生成データの期間（現在から遡る日数）
+HISTORY_DAYS = 730
+
+
+def _weighted(pairs):
+    """[(値, 重み), ...] → (値のリスト, 累積重み)"""
+    pairs = list(pairs)
+    values = [value for value, _ in pairs]
+    return values, list(accumulate(weight for _, weight in pairs))
+
+
+def _choices(model, field_name):
+    return [value for value, _ in model._meta.get_field(field_name).choices]
+
+
+def _zipf_weights(count, exponent, rng):
+    """順位の -exponent 乗に比例する重み（順位はランダムに割り当てる）の累積和"""
+    weights = [1.0 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    return list(accumulate(weights))
+
+
+def _pick(rng, values, cum_weights):
+    return values[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def _pick_index(rng, cum_weights):
+    return bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+@contextmanager
+def _manual_timestamps(*models):
+    """auto_now / auto_now_add を一時的に無効にし、生成した日時をそのまま保存する"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _render_cat_image(seed, size):
+    """猫のシルエット風の JPEG を生成する（seed ごとに色・配置が決まる）"""
+    rng = random.Random(seed)
+    width, height = size
+    background = tuple(rng.randint(170, 245) for _ in range(3))
+    coat = rng.choice(COAT_RGB)
+    image = Image.new('RGB', size, background)
+    draw = ImageDraw.Draw(image)
+
+    cx = width * rng.uniform(0.4, 0.6)
+    cy = height * rng.uniform(0.55, 0.65)
+    body_w, body_h = width * rng.uniform(0.25, 0.35), height * rng.uniform(0.22, 0.3)
+    head_r = min(width, height) * rng.uniform(0.14, 0.18)
+    hx, hy = cx + body_w * rng.choice((-0.8, 0.8)), cy - body_h * 0.9
+
+    draw.ellipse((cx - body_w, cy - body_h, cx + body_w, cy + body_h), fill=coat)
+    draw.ellipse((hx - head_r, hy - head_r, hx + head_r, hy + head_r), fill=coat)
+    for side in (-1, 1):
+        ear_x = hx + side * head_r * 0.6
+        draw.polygon(
+            [(ear_x - head_r * 0.35, hy - head_r * 0.6), (ear_x + head_r * 0.35, hy - head_r * 0.6),
+             (ear_x + side * head_r * 0.2, hy - head_r * 1.5)],
+            fill=coat,
+        )
+        eye_x = hx + side * head_r * 0.4
+        draw.ellipse((eye_x - 4, hy - 6, eye_x + 4, hy + 2), fill=(40, 120, 60))
+    tail_x = cx - (hx - cx)
+    draw.line((tail_x, cy, tail_x - (hx - cx) * 0.4, cy - body_h * 1.4), fill=coat, width=max(4, width // 40))
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=75)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, deterministic dataset (shelters, cats, users, applications, messages, favorites)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shelters', type=int, default=50, help='保護団体数（デフォルト: 50）')
+        parser.add_argument('--cats', type=int, default=1000, help='保護猫の数（デフォルト: 1000）')
+        parser.add_argument('--users', type=int, default=1000, help='応募者ユーザー数（デフォルト: 1000）')
+        parser.add_argument('--applications', type=int, default=2000, help='応募数（デフォルト: 2000）')
+        parser.add_argument('--messages', type=int, default=10000, help='メッセージ数（デフォルト: 10000）')
+        parser.add_argument('--favorites', type=int, default=5000, help='お気に入り数（デフォルト: 5000）')
+        parser.add_argument('--seed', type=int, default=42, help='乱数シード（デフォルト: 42）')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create の1バッチの件数（デフォルト: 5000）')
+        parser.add_argument('--prefix', default='gen', help='生成するユーザー名の接頭辞（デフォルト: gen）')
+        parser.add_argument('--password', default='password123', help='生成するユーザー共通のパスワード')
+        parser.add_argument('--no-images', action='store_true', help='猫画像を生成しない')
+        parser.add_argument('--image-size', default='480x360', help='生成する画像のサイズ（デフォルト: 480x360）')
+        parser.add_argument('--image-workers', type=int, default=4, help='画像生成の並列数（デフォルト: 4）')
+
+    def handle(self, *args, **options):
+        if options['shelters'] < 1 or options['cats'] < 1 or options['users'] < 1:
+            raise CommandError('--shelters, --cats, --users は1以上を指定してください')
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"ユーザー名が {options['prefix']}_ で始まるユーザーが既に存在します。--prefix を変更してください"
+            )
+        try:
+            width, height = (int(value) for value in options['image_size'].lower().split('x'))
+        except ValueError:
+            raise CommandError('--image-size は 幅x高さ（例: 480x360）で指定してください')
+
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ja_JP')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.now = timezone.now()
+        self.password = make_password(options['password'])
+        self.with_images = not options['no_images']
+
+        steps = [
+            ('保護団体・スタッフ', lambda: self.create_shelters(options['shelters'])),
+            ('保護猫', lambda: self.create_cats(options['cats'])),
+            ('猫画像', lambda: self.create_images(
+                (width, height), options['seed'], options['image_workers']
+            ) if self.with_images else 0),
+            ('応募者・プロフィール', lambda: self.create_applicants(options['users'])),
+            ('応募', lambda: self.create_applications(options['applications'])),
+            ('メッセージ', lambda: self.create_messages(options['messages'])),
+            ('お気に入り', lambda: self.create_favorites(options['favorites'])),
+            ('猫のステータス・公開カタログ', self.finalize_cats),
+        ]
+        started = time.monotonic()
+        with _manual_timestamps(Shelter, Cat, CatImage, Application, Message, Favorite, User):
+            for label, step in steps:
+                step_started = time.monotonic()
+                with transaction.atomic():
+                    count = step()
+                self.stdout.write(f'  {label}: {count} 件 ({time.monotonic() - step_started:.1f}s)')
+
+        bump_versions(CATALOG_VERSION_KEY, SHELTER_LIST_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(f'データを生成しました ({time.monotonic() - started:.1f}s)'))
+
+    # --- 共通 ---
+
+    def bulk_insert(self, model, objects):
+        """objects をバッチ単位で bulk_create し、採番された主キーを生成順に返す"""
+        pks = array('q')
+        batch = []
+
+        def flush():
+            if not batch:
+                return
+            if not connection.features.can_return_rows_from_bulk_insert:
+                last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            model.objects.bulk_create(batch)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # 主キーを返さないバックエンド（MySQL）では採番結果を読み直す
+                pks.extend(
+                    model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:len(batch)]
+                )
+            else:
+                pks.extend(obj.pk for obj in batch)
+            batch.clear()
+
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                flush()
+        flush()
+        return pks
+
+    def random_datetime(self, after=None):
+        """after（省略時は期間の始め）から現在までの日時（直近ほど多い）"""
+        start = after or self.now - timedelta(days=HISTORY_DAYS)
+        span = (self.now - start).total_seconds()
+        return start + timedelta(seconds=span * self.rng.random() ** 0.5)
+
+    def create_users(self, count, user_type, start):
+        rng = self.rng
+        last_names = [self.fake.last_name() for _ in range(200)]
+        first_names = [self.fake.first_name() for _ in range(200)]
+
+        def users():
+            for number in range(start, start + count):
+                username = f'{self.prefix}_{user_type}_{number:07d}'
+                joined = self.random_datetime()
+                yield User(
+                    username=username,
+                    email=f'{username}@example.com',
+                    password=self.password,
+                    user_type=user_type,
+                    last_name=rng.choice(last_names),
+                    first_name=rng.choice(first_names),
+                    is_email_verified=True,
+                    date_joined=joined,
+                    created_at=joined,
+                    updated_at=joined,
+                )
+
+        return self.bulk_insert(User, users())
+
+    # --- 各データの生成 ---
+
+    def create_shelters(self, count):
+        rng = self.rng
+        prefectures, prefecture_weights = _weighted((name, weight) for name, (weight, _) in PREFECTURES.items())
+        self.shelter_meta = []  # (prefecture, city, name)
+
+        def shelters():
+            for number in range(count):
+                prefecture = _pick(rng, prefectures, prefecture_weights)
+                city = rng.choice(PREFECTURES[prefecture][1])
+                name = f'保護猫カフェ {city}{self.fake.last_name()}{number + 1}'
+                created = self.random_datetime()
+                # 一部の団体は審査中・公開停止（公開カタログに載らない猫を含める）
+                approved = rng.random() < 0.9
+                self.shelter_meta.append((prefecture, city, name))
+                yield Shelter(
+                    name=name,
+                    prefecture=prefecture,
+                    city=city,
+                    address=f'{prefecture}{city}{rng.randint(1, 9)}-{rng.randint(1, 30)}-{rng.randint(1, 20)}',
+                    postcode=f'{rng.randint(100, 999)}-{rng.randint(0, 9999):04d}',
+                    email=f'shelter{number + 1}@example.com',
+                    phone=f'0{rng.randint(3, 99)}-{rng.randint(100, 9999)}-{rng.randint(1000, 9999)}',
+                    representative=self.fake.name(),
+                    business_hours='11:00〜19:00（火曜定休）',
+                    description=f'{prefecture}{city}で保護猫の譲渡活動をしています。',
+                    public_profile_enabled=approved,
+                    verification_status='approved' if approved else rng.choice(['pending', 'need_fix']),
+                    contact_verified=approved,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self.shelter_ids = self.bulk_insert(Shelter, shelters())
+
+        # 団体ごとに管理者1名 + スタッフ0〜3名
+        staff_counts = [1 + rng.choice((0, 0, 1, 1, 2, 3)) for _ in self.shelter_ids]
+        staff_ids = self.create_users(sum(staff_counts), 'shelter', 1)
+        self.shelter_staff = []
+        memberships = []
+        position = 0
+        for shelter_id, staff_count in zip(self.shelter_ids, staff_counts):
+            members = list(staff_ids[position:position + staff_count])
+            position += staff_count
+            self.shelter_staff.append(members)
+            memberships.extend(
+                ShelterUser(shelter_id=shelter_id, user_id=user_id, role='admin' if index == 0 else 'staff')
+                for index, user_id in enumerate(members)
+            )
+        self.bulk_insert(ShelterUser, memberships)
+        return len(self.shelter_ids) + len(staff_ids)
+
+    def create_cats(self, count):
+        rng = self.rng
+        shelter_weights = _zipf_weights(len(self.shelter_ids), 1.1, rng)
+        ages, age_weights = _weighted([('kitten', 35), ('adult', 45), ('senior', 15), ('unknown', 5)])
+        genders, gender_weights = _weighted([('male', 48), ('female', 48), ('unknown', 4)])
+        affections, affection_weights = _weighted([(1, 5), (2, 15), (3, 35), (4, 30), (5, 15)])
+        activities, activity_weights = _weighted([('active', 30), ('normal', 40), ('calm', 25), ('unknown', 5)])
+        maintenances, maintenance_weights = _weighted([('easy', 40), ('normal', 45), ('hard', 15)])
+        breeds, breed_weights = _weighted(BREEDS)
+        colors, color_weights = _weighted(COLORS)
+        sizes = _choices(Cat, 'size')
+        vaccinations = _choices(Cat, 'vaccination_status')
+        spay_neuters = _choices(Cat, 'spay_neuter_status')
+        shelters = [
+            Shelter(pk=shelter_id, name=name, prefecture=prefecture, city=city)
+            for shelter_id, (prefecture, city, name) in zip(self.shelter_ids, self.shelter_meta)
+        ]
+
+        # 応募・お気に入りの生成で使う猫ごとの属性（生成順）
+        self.cat_shelter = array('l')
+        self.cat_created = []
+        popularity = []
+
+        def cats():
+            for _ in range(count):
+                shelter_index = _pick_index(rng, shelter_weights)
+                age = _pick(rng, ages, age_weights)
+                created = self.random_datetime()
+                cat = Cat(
+                    shelter_id=self.shelter_ids[shelter_index],
+                    name=rng.choice(CAT_NAMES),
+                    gender=_pick(rng, genders, gender_weights),
+                    age_category=age,
+                    estimated_age={'kitten': f'{rng.randint(2, 11)}ヶ月', 'adult': f'{rng.randint(1, 7)}歳',
+                                   'senior': f'{rng.randint(8, 16)}歳'}.get(age, ''),
+                    breed=_pick(rng, breeds, breed_weights),
+                    size=rng.choice(sizes),
+                    color=_pick(rng, colors, color_weights),
+                    spay_neuter_status=rng.choice(spay_neuters),
+                    vaccination_status=rng.choice(vaccinations),
+                    affection_level=_pick(rng, affections, affection_weights),
+                    activity_level=_pick(rng, activities, activity_weights),
+                    maintenance_level=_pick(rng, maintenances, maintenance_weights),
+                    is_single_ok=rng.random() < 0.6,
+                    is_elderly_ok=rng.random() < 0.3,
+                    personality=''.join(rng.sample(PERSONALITY_PHRASES, 2)),
+                    description=''.join(rng.sample(DESCRIPTION_PHRASES, 3)),
+                    is_public=rng.random() < 0.9,
+                    transfer_fee=rng.choice((0, 10000, 20000, 30000, 35000)),
+                    created_at=created,
+                    updated_at=created,
+                )
+                # save() を経由しないため派生フィールドをここで計算する
+                cat.search_document = build_search_document(cat, shelters[shelter_index])
+                cat.match_vector = encode_cat(cat)
+                self.cat_shelter.append(shelter_index)
+                self.cat_created.append(created)
+                popularity.append(AGE_POPULARITY[age] * rng.uniform(0.2, 1.8))
+                yield cat
+
+        self.cat_ids = self.bulk_insert(Cat, cats())
+        self.cat_weights = list(accumulate(popularity))
+        return len(self.cat_ids)
+
+    def create_images(self, size, seed, workers):
+        """猫1匹につき1〜4枚の画像を生成する（1枚目がメイン画像）
+
+        --no-images の有無で他のデータが変わらないよう、画像には別の乱数列を使う。
+        """
+        rng = random.Random(f'{seed}:images')
+        storage = CatImage._meta.get_field('image').storage
+        counts, count_weights = _weighted([(1, 45), (2, 30), (3, 15), (4, 10)])
+        plan = [
+            (cat_index, number)
+            for cat_index in range(len(self.cat_ids))
+            for number in range(_pick(rng, counts, count_weights))
+        ]
+
+        def render(item):
+            cat_index, number = item
+            name = f'cats/{self.prefix}_{self.cat_ids[cat_index]}_{number}.jpg'
+            return storage.save(name, ContentFile(_render_cat_image(f'{seed}:{cat_index}:{number}', size)))
+
+        def images():
+            # 画像ごとに独立したシードで描画するため、並列に生成しても結果は変わらない
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                for (cat_index, number), name in zip(plan, executor.map(render, plan, chunksize=64)):
+                    yield CatImage(
+                        cat_id=self.cat_ids[cat_index],
+                        image=name,
+                        is_primary=number == 0,
+                        sort_order=number,
+                        created_at=self.cat_created[cat_index],
+                    )
+
+        return len(self.bulk_insert(CatImage, images()))
+
+    def create_applicants(self, count):
+        rng = self.rng
+        self.applicant_ids = self.create_users(count, 'adopter', 1)
+        prefectures, prefecture_weights = _weighted((name, weight) for name, (weight, _) in PREFECTURES.items())
+        choice_fields = {
+            field.name: [value for value, _ in field.choices]
+            for field in ApplicantProfile._meta.concrete_fields if field.choices
+        }
+
+        def profiles():
+            # 8割の応募者がプロフィールを入力済み
+            for user_id in self.applicant_ids:
+                if rng.random() >= 0.8:
+                    continue
+                values = {name: rng.choice(options) for name, options in choice_fields.items()}
+                yield ApplicantProfile(
+                    user_id=user_id,
+                    age=min(80, max(20, int(rng.gauss(40, 12)))),
+                    residence_area=_pick(rng, prefectures, prefecture_weights),
+                    pet_policy_confirmed=True,
+                    indoors_agreement=True,
+                    **values,
+                )
+
+        return len(self.applicant_ids) + len(self.bulk_insert(ApplicantProfile, profiles()))
+
+    def create_applications(self, count):
+        rng = self.rng
+        statuses, status_weights = _weighted(APPLICATION_STATUSES)
+        # 応募を繰り返す人は一部に偏る
+        applicant_weights = _zipf_weights(len(self.applicant_ids), 0.6, rng)
+        pairs = set()
+        # 成立・トライアル中の応募は1匹につき1件まで
+        settled = set()
+
+        self.app_meta = []  # (applicant_index, shelter_index, applied_at)
+        self.status_counts = {}
+
+        def applications():
+            attempts = 0
+            while len(self.app_meta) < count and attempts < count * 10:
+                attempts += 1
+                cat_index = _pick_index(rng, self.cat_weights)
+                applicant_index = _pick_index(rng, applicant_weights)
+                if (cat_index, applicant_index) in pairs:
+                    continue
+                pairs.add((cat_index, applicant_index))
+
+                status = _pick(rng, statuses, status_weights)
+                if status in ('accepted', 'trial'):
+                    if cat_index in settled:
+                        status = 'rejected'
+                    else:
+                        settled.add(cat_index)
+                applied_at = self.random_datetime(after=self.cat_created[cat_index])
+                shelter_index = self.cat_shelter[cat_index]
+                self.app_meta.append((applicant_index, shelter_index, applied_at))
+                counts = self.status_counts.setdefault(cat_index, {})
+                counts[status] = counts.get(status, 0) + 1
+                yield Application(
+                    cat_id=self.cat_ids[cat_index],
+                    applicant_id=self.applicant_ids[applicant_index],
+                    shelter_id=self.shelter_ids[shelter_index],
+                    status=status,
+                    message=rng.choice(MESSAGE_PHRASES),
+                    term_agreement=True,
+                    lifelong_care_agreement=True,
+                    spay_neuter_agreement=True,
+                    medical_cost_understanding=True,
+                    emergency_contact_available=rng.random() < 0.8,
+                    family_consent=True,
+                    cafe_data_sharing_consent=True,
+                    applied_at=applied_at,
+                    updated_at=applied_at,
+                )
+
+        self.application_ids = self.bulk_insert(Application, applications())
+        return len(self.application_ids)
+
+    def create_messages(self, count):
+        if not self.application_ids or count < 1:
+            return 0
+        rng = self.rng
+        # やり取りの量は応募ごとに大きく偏る（パレート分布）
+        thread_weights = list(accumulate(rng.paretovariate(1.2) for _ in self.application_ids))
+        applicant_unread = array('l', [0]) * len(self.application_ids)
+        shelter_unread = array('l', [0]) * len(self.application_ids)
+
+        def messages():
+            for _ in range(count):
+                app_index = _pick_index(rng, thread_weights)
+                applicant_index, shelter_index, applied_at = self.app_meta[app_index]
+                created = min(self.now, applied_at + timedelta(seconds=rng.randint(60, 30 * 24 * 3600)))
+                from_applicant = rng.random() < 0.55
+                # 直近のメッセージほど未読が多い
+                unread = ((self.now - created) < timedelta(days=7) and rng.random() < 0.5) or rng.random() < 0.03
+                if unread:
+                    counters = shelter_unread if from_applicant else applicant_unread
+                    counters[app_index] += 1
+                yield Message(
+                    application_id=self.application_ids[app_index],
+                    sender_id=(
+                        self.applicant_ids[applicant_index] if from_applicant
+                        else rng.choice(self.shelter_staff[shelter_index])
+                    ),
+                    sender_type='user' if from_applicant else 'shelter',
+                    content=''.join(rng.sample(MESSAGE_PHRASES, rng.randint(1, 3))),
+                    created_at=created,
+                    read_at=None if unread else created + timedelta(minutes=rng.randint(1, 24 * 60)),
+                )
+
+        total = len(self.bulk_insert(Message, messages()))
+
+        # save() を経由しないため未読カウンターをまとめて設定する（同じ件数の組ごとに1クエリ）
+        groups = {}
+        for index, application_id in enumerate(self.application_ids):
+            counts = (applicant_unread[index], shelter_unread[index])
+            if counts != (0, 0):
+                groups.setdefault(counts, []).append(application_id)
+        for (applicant_count, shelter_count), application_ids in groups.items():
+            for start in range(0, len(application_ids), self.batch_size):
+                Application.objects.filter(pk__in=application_ids[start:start + self.batch_size]).update(
+                    applicant_unread_count=applicant_count, shelter_unread_count=shelter_count,
+                )
+        return total
+
+    def create_favorites(self, count):
+        rng = self.rng
+        user_weights = _zipf_weights(len(self.applicant_ids), 0.8, rng)
+        pairs = set()
+
+        def favorites():
+            attempts = 0
+            while len(pairs) < count and attempts < count * 10:
+                attempts += 1
+                cat_index = _pick_index(rng, self.cat_weights)
+                user_index = _pick_index(rng, user_weights)
+                if (cat_index, user_index) in pairs:
+                    continue
+                pairs.add((cat_index, user_index))
+                yield Favorite(
+                    user_id=self.applicant_ids[user_index],
+                    cat_id=self.cat_ids[cat_index],
+                    created_at=self.random_datetime(after=self.cat_created[cat_index]),
+                )
+
+        return len(self.bulk_insert(Favorite, favorites()))
+
+    def finalize_cats(self):
+        """応募状況から猫のステータスを決め、メイン画像と公開カタログを反映する"""
+        changes = {}
+        for cat_index, counts in self.status_counts.items():
+            counts = dict(counts, active=sum(counts.get(status, 0) for status in ACTIVE_STATUSES))
+            for status in ('accepted', 'trial', 'reviewing'):
+                counts.setdefault(status, 0)
+            new_status = Application.derive_cat_status(counts, None)
+            if new_status:
+                changes.setdefault(new_status, []).append(self.cat_ids[cat_index])
+
+        for new_status, cat_ids in changes.items():
+            for start in range(0, len(cat_ids), self.batch_size):
+                Cat.objects.filter(pk__in=cat_ids[start:start + self.batch_size]).update(status=new_status)
+
+        # メイン画像の反映（refresh_primary_images は公開カタログも更新する）
+        for start in range(0, len(self.cat_ids), 500):
+            cat_ids = self.cat_ids[start:start + 500]
+            if self.with_images:
+                Cat.refresh_primary_images(cat_ids)
+            else:
+                sync_public_cats(cat_ids)
+        return len(self.cat_ids)
@@ -0,0 +1,43 @@
+"""
+保護猫画像の派生画像（サムネイル・WebP/AVIF）を生成するマネジメントコマンド
+
+既存画像のバックフィルや、幅・形式の設定（CAT_IMAGE_VARIANTS）変更後の再生成に使用する。
+"""
+from django.core.management.base import BaseCommand
+
+from cats.images import process_cat_image
+from cats.models import CatImage
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/AVIF/JPEG variants for cat images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='生成済みの画像も含めて全て再生成する（既定は未生成の画像のみ）',
+        )
+        parser.add_argument(
+            '--cat',
+            type=int,
+            help='指定した猫IDの画像のみ処理する',
+        )
+
+    def handle(self, *args, **options):
+        queryset = CatImage.objects.exclude(image='').order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(variants={})
+        if options['cat']:
+            queryset = queryset.filter(cat_id=options['cat'])
+
+        generated = 0
+        failed = 0
+        for image_id in queryset.values_list('id', flat=True).iterator():
+            if process_cat_image(image_id):
+                generated += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠ CatImage {image_id}: 派生画像を生成できませんでした'))
+
+        self.stdout.write(self.style.SUCCESS(f'\n{generated} 枚の画像の派生画像を生成しました（失敗: {failed} 枚）'))
@@ -0,0 +1,70 @@
+"""
+CSV / JSONL ファイルの猫を保護団体の猫として一括登録するマネジメントコマンド（cats.importer）
+
+    python manage.py import_cats cats.csv --shelter 12
+    python manage.py import_cats cats.csv --shelter 12 --encoding cp932 --dry-run
+    python manage.py import_cats cats.jsonl --shelter 12 --errors errors.jsonl
+
+ファイルは1行ずつ読み込み、チャンクごとに検証・登録する。行ごとのエラーは --errors のファイル（JSONL）に書き出す。
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cats.importer import CHUNK_SIZE, FORMATS, MAX_ERRORS, detect_format, import_cats, is_text_encoding
+from shelters.models import Shelter
+
+
+class Command(BaseCommand):
+    help = 'Import cats from a CSV or JSONL file into a shelter in validated chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='取り込むファイル（CSV または JSONL）')
+        parser.add_argument('--shelter', type=int, required=True, help='登録先の保護団体ID')
+        parser.add_argument('--format', choices=FORMATS, help='ファイル形式（省略時は拡張子から判定）')
+        parser.add_argument('--encoding', default='utf-8-sig', help='文字コード（デフォルト: utf-8-sig。Shift_JIS は cp932）')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'1回に検証・登録する行数（デフォルト: {CHUNK_SIZE}）')
+        parser.add_argument('--dry-run', action='store_true', help='検証のみ行い、登録しない')
+        parser.add_argument('--errors', help='行ごとのエラーを書き出すファイル（JSONL）')
+
+    def handle(self, *args, **options):
+        try:
+            shelter = Shelter.objects.get(pk=options['shelter'])
+        except Shelter.DoesNotExist:
+            raise CommandError(f'保護団体（ID {options["shelter"]}）が見つかりません')
+        if not is_text_encoding(options['encoding']):
+            raise CommandError(f'文字コード「{options["encoding"]}」は使用できません')
+        fmt = options['format'] or detect_format(options['path'])
+
+        def progress(result):
+            self.stdout.write(f'  {result.total} 行処理しました（登録 {result.created} / エラー {result.failed}）')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                result = import_cats(
+                    f, shelter, fmt=fmt, encoding=options['encoding'],
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run'], progress=progress,
+                )
+        except OSError as e:
+            raise CommandError(f'ファイルを開けません: {e}')
+
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', encoding='utf-8') as f:
+                for error in result.errors:
+                    f.write(json.dumps(error, ensure_ascii=False) + '\n')
+            if result.failed > len(result.errors):
+                self.stdout.write(self.style.WARNING(f'エラーは先頭の {MAX_ERRORS} 件のみ書き出しました'))
+        else:
+            for error in result.errors[:20]:
+                self.stdout.write(f'  {error["row"]} 行目: {json.dumps(error["errors"], ensure_ascii=False)}')
+
+        if result.unknown_columns:
+            self.stdout.write(self.style.WARNING(f'取り込まなかった列: {", ".join(result.unknown_columns)}'))
+        if result.aborted:
+            self.stdout.write(self.style.ERROR(result.aborted))
+
+        verb = '登録できます（dry-run）' if result.dry_run else '登録しました'
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{result.total} 行中 {result.created} 匹を{verb}（エラー {result.failed} 行）'
+        ))
@@ -0,0 +1,34 @@
+"""
+公開カタログ（PublicCat）を再構築するマネジメントコマンド
+
+通常は Cat / Shelter / CatImage の保存時に差分更新される。
+SQL で直接データを変更した場合や、公開条件の変更時に全件を作り直すために使用する。
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cats.catalog import BATCH_SIZE, rebuild_public_catalog
+from cats.models import PublicCat
+from config.cache import CATALOG_VERSION_KEY, bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized public cat catalog used by the public cat list'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'1バッチで処理する猫の数（デフォルト: {BATCH_SIZE}）',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_public_catalog(batch_size=options['batch_size'])
+            # 一覧のキャッシュを作り直す
+            bump_versions(CATALOG_VERSION_KEY)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} 匹の猫を確認し、公開カタログを再構築しました（公開中: {PublicCat.objects.count()} 匹）'
+        ))
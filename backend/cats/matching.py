@@ -0,0 +1,132 @@
+"""
+保護猫と里親希望者の相性スコアリング
+
+猫の特徴（甘えん坊度・活発さ・お手入れ難易度・譲渡条件）と
+応募者プロフィール（留守時間・在宅頻度・飼育経験・距離感・家の雰囲気・来客頻度・婚姻状況）を
+0〜1 の数値ベクトルに変換し、NumPy で全候補猫を一括スコアリングする。
+
+猫のベクトルは Cat.save() 時に Cat.match_vector（float32 のバイト列）へ保存され、
+リクエストごとには再計算しない。
+"""
+import numpy as np
+
+# --- 猫の特徴ベクトル ---
+CAT_FEATURES = ('affection', 'activity', 'maintenance', 'single_ok', 'elderly_ok')
+CAT_VECTOR_DTYPE = np.float32
+
+ACTIVITY_VALUES = {'calm': 0.0, 'normal': 0.5, 'active': 1.0, 'unknown': 0.5}
+MAINTENANCE_VALUES = {'easy': 0.0, 'normal': 0.5, 'hard': 1.0}
+
+# --- 応募者の特徴ベクトル ---
+PROFILE_FEATURES = (
+    'desired_affection', 'home_energy', 'experience', 'presence', 'visitors', 'is_single', 'is_elderly',
+)
+NEUTRAL = 0.5
+
+CAT_DISTANCE_VALUES = {'clingy': 1.0, 'moderate': 0.5, 'watchful': 0.0}
+HOME_ATMOSPHERE_VALUES = {'quiet': 0.0, 'normal': 0.5, 'lively': 1.0}
+CAT_EXPERIENCE_VALUES = {'none': 0.0, 'one': 0.5, 'multiple': 1.0}
+ABSENCE_TIME_VALUES = {'less_than_4': 1.0, '4_to_8': 0.66, '8_to_12': 0.33, 'more_than_12': 0.0}
+HOME_FREQUENCY_VALUES = {'high': 1.0, 'medium': 0.5, 'low': 0.0}
+VISITOR_FREQUENCY_VALUES = {'high': 1.0, 'medium': 0.5, 'low': 0.0}
+
+# 高齢者とみなす年齢（Cat.is_elderly_ok の判定に使用）
+ELDERLY_AGE = 60
+
+# スコアの重み（合計 1.0）
+WEIGHTS = {
+    'affection': 0.30,
+    'activity': 0.25,
+    'maintenance': 0.20,
+    'presence': 0.15,
+    'visitors': 0.10,
+}
+
+
+def encode_cat(cat):
+    """Cat を特徴ベクトル（float32 のバイト列）に変換する"""
+    vector = np.array([
+        (cat.affection_level - 1) / 4.0,
+        ACTIVITY_VALUES.get(cat.activity_level, NEUTRAL),
+        MAINTENANCE_VALUES.get(cat.maintenance_level, NEUTRAL),
+        1.0 if cat.is_single_ok else 0.0,
+        1.0 if cat.is_elderly_ok else 0.0,
+    ], dtype=CAT_VECTOR_DTYPE)
+    return vector.tobytes()
+
+
+def decode_cats(raw_vectors):
+    """バイト列のリストを (猫数 × 特徴数) の行列に変換する"""
+    if not raw_vectors:
+        return np.empty((0, len(CAT_FEATURES)), dtype=CAT_VECTOR_DTYPE)
+    buffer = b''.join(bytes(raw) for raw in raw_vectors)
+    return np.frombuffer(buffer, dtype=CAT_VECTOR_DTYPE).reshape(-1, len(CAT_FEATURES))
+
+
+def encode_profile(profile):
+    """ApplicantProfile を特徴ベクトルに変換する（未回答の項目は中立値）"""
+    if profile is None:
+        return np.array([NEUTRAL] * 5 + [0.0, 0.0], dtype=CAT_VECTOR_DTYPE)
+
+    absence = ABSENCE_TIME_VALUES.get(profile.absence_time)
+    home = HOME_FREQUENCY_VALUES.get(profile.home_frequency)
+    known = [value for value in (absence, home) if value is not None]
+    presence = sum(known) / len(known) if known else NEUTRAL
+
+    return np.array([
+        CAT_DISTANCE_VALUES.get(profile.cat_distance, NEUTRAL),
+        HOME_ATMOSPHERE_VALUES.get(profile.home_atmosphere, NEUTRAL),
+        CAT_EXPERIENCE_VALUES.get(profile.cat_experience, NEUTRAL),
+        presence,
+        VISITOR_FREQUENCY_VALUES.get(profile.visitor_frequency, NEUTRAL),
+        1.0 if profile.marital_status == 'single' else 0.0,
+        1.0 if profile.age is not None and profile.age >= ELDERLY_AGE else 0.0,
+    ], dtype=CAT_VECTOR_DTYPE)
+
+
+def score_cats(profile_vector, cat_matrix):
+    """全候補猫の相性スコア（0〜100）を一括計算する
+
+    譲渡条件（単身者・高齢者）を満たさない猫は -1 を返す。
+    """
+    affection = cat_matrix[:, 0]
+    activity = cat_matrix[:, 1]
+    maintenance = cat_matrix[:, 2]
+    single_ok = cat_matrix[:, 3]
+    elderly_ok = cat_matrix[:, 4]
+    desired_affection, home_energy, experience, presence, visitors, is_single, is_elderly = profile_vector
+
+    score = (
+        WEIGHTS['affection'] * (1.0 - np.abs(affection - desired_affection))
+        + WEIGHTS['activity'] * (1.0 - np.abs(activity - home_energy))
+        # 経験を超えるお手入れ難易度のみ減点
+        + WEIGHTS['maintenance'] * (1.0 - np.maximum(0.0, maintenance - experience))
+        # 甘えん坊・活発な猫ほど在宅時間が必要
+        + WEIGHTS['presence'] * (1.0 - np.maximum(0.0, (affection + activity) / 2.0 - presence))
+        # 怖がりな猫ほど来客の多い家は負担
+        + WEIGHTS['visitors'] * (1.0 - (1.0 - affection) * visitors)
+    ) * 100.0
+
+    eligible = ((single_ok >= 0.5) | (is_single < 0.5)) & ((elderly_ok >= 0.5) | (is_elderly < 0.5))
+    return np.where(eligible, score, -1.0)
+
+
+def recommend_cats(profile, queryset, limit=20):
+    """候補猫の中から相性の良い順に (cat_id, score) を最大 limit 件返す"""
+    rows = [row for row in queryset.values_list('id', 'match_vector') if row[1]]
+    if not rows:
+        return []
+
+    cat_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    scores = score_cats(encode_profile(profile), decode_cats([row[1] for row in rows]))
+
+    eligible = np.flatnonzero(scores >= 0)
+    if eligible.size == 0:
+        return []
+    # 上位 limit 件のみ部分ソート
+    if eligible.size > limit:
+        top = eligible[np.argpartition(-scores[eligible], limit - 1)[:limit]]
+    else:
+        top = eligible
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return [(int(cat_ids[i]), round(float(scores[i]), 1)) for i in top]
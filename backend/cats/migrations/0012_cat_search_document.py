@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:45
+
+import unicodedata
+
+from django.db import migrations, models
+
+# このマイグレーション時点の cats.search.build_search_document() の複製
+# （アプリのコードが変わっても、このマイグレーションの結果が変わらないようにする）
+CAT_SEARCH_FIELDS = ['name', 'breed', 'color', 'personality', 'description', 'other_terms']
+SHELTER_SEARCH_FIELDS = ['name', 'prefecture', 'city']
+
+
+def build_search_document(cat):
+    parts = [getattr(cat, field) for field in CAT_SEARCH_FIELDS]
+    parts += [getattr(cat.shelter, field) for field in SHELTER_SEARCH_FIELDS]
+    return unicodedata.normalize('NFKC', ' '.join(part for part in parts if part)).lower()
+
+
+def backfill_search_documents(apps, schema_editor):
+    Cat = apps.get_model('cats', 'Cat')
+    batch = []
+    for cat in Cat.objects.select_related('shelter').iterator(chunk_size=500):
+        cat.search_document = build_search_document(cat)
+        batch.append(cat)
+        if len(batch) >= 500:
+            Cat.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Cat.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX cats_cat_search_trgm_idx ON cats_cat '
+            'USING gin (search_document gin_trgm_ops)'
+        )
+    elif vendor == 'mysql':
+        # 日本語は空白で分かち書きされないため ngram パーサーを使用する
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX cats_cat_search_ft_idx ON cats_cat (search_document) '
+            'WITH PARSER ngram'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS cats_cat_search_trgm_idx')
+    elif vendor == 'mysql':
+        schema_editor.execute('DROP INDEX cats_cat_search_ft_idx ON cats_cat')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0011_alter_cat_is_elderly_ok_alter_cat_is_single_ok_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='名前・品種・性格・団体名などを正規化して連結したもの（自動更新）', verbose_name='検索用ドキュメント'),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:02
+
+import struct
+
+from django.db import migrations, models
+
+# このマイグレーション時点の cats.matching.encode_cat() の複製
+# （アプリのコードが変わっても、このマイグレーションの結果が変わらないようにする）
+# float32 × 5 のネイティブバイトオーダーのバイト列で、numpy の ndarray.tobytes() と同じ
+ACTIVITY_VALUES = {'calm': 0.0, 'normal': 0.5, 'active': 1.0, 'unknown': 0.5}
+MAINTENANCE_VALUES = {'easy': 0.0, 'normal': 0.5, 'hard': 1.0}
+NEUTRAL = 0.5
+
+
+def encode_cat(cat):
+    return struct.pack(
+        '=5f',
+        (cat.affection_level - 1) / 4.0,
+        ACTIVITY_VALUES.get(cat.activity_level, NEUTRAL),
+        MAINTENANCE_VALUES.get(cat.maintenance_level, NEUTRAL),
+        1.0 if cat.is_single_ok else 0.0,
+        1.0 if cat.is_elderly_ok else 0.0,
+    )
+
+
+def backfill_match_vectors(apps, schema_editor):
+    Cat = apps.get_model('cats', 'Cat')
+    batch = []
+    for cat in Cat.objects.iterator(chunk_size=500):
+        cat.match_vector = encode_cat(cat)
+        batch.append(cat)
+        if len(batch) >= 500:
+            Cat.objects.bulk_update(batch, ['match_vector'])
+            batch = []
+    if batch:
+        Cat.objects.bulk_update(batch, ['match_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0012_cat_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='match_vector',
+            field=models.BinaryField(help_text='甘えん坊度・活発さ・お手入れ難易度・譲渡条件を数値化したもの（自動更新）', null=True, verbose_name='相性特徴ベクトル'),
+        ),
+        migrations.RunPython(backfill_match_vectors, migrations.RunPython.noop),
+    ]
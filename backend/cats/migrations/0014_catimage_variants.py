@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0013_cat_match_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='サムネイル・WebP等のファイル名 {形式: {幅: ファイル名}}（自動生成）', verbose_name='派生画像'),
+        ),
+    ]
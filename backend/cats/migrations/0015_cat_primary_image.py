@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 14:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_primary_images(apps, schema_editor):
+    Cat = apps.get_model('cats', 'Cat')
+    CatImage = apps.get_model('cats', 'CatImage')
+    cat_ids = list(Cat.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(cat_ids), 500):
+        chunk = cat_ids[start:start + 500]
+        primaries = {}
+        images = (
+            CatImage.objects.filter(cat_id__in=chunk, is_primary=True)
+            .order_by('cat_id', 'sort_order', 'created_at')
+            .values_list('cat_id', 'id', 'image', 'variants')
+        )
+        for cat_id, image_id, name, variants in images:
+            primaries.setdefault(cat_id, (image_id, name or '', variants or {}))
+        cats = [
+            Cat(pk=cat_id, primary_image_id=image_id, primary_image_name=name, primary_image_variants=variants)
+            for cat_id, (image_id, name, variants) in primaries.items()
+        ]
+        Cat.objects.bulk_update(cats, ['primary_image', 'primary_image_name', 'primary_image_variants'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0014_catimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cat',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cats.catimage', verbose_name='メイン画像'),
+        ),
+        migrations.AddField(
+            model_name='cat',
+            name='primary_image_name',
+            field=models.CharField(blank=True, default='', editable=False, help_text='一覧表示で画像テーブルを参照しないための複製（自動更新）', max_length=255, verbose_name='メイン画像ファイル名'),
+        ),
+        migrations.AddField(
+            model_name='cat',
+            name='primary_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='CatImage.variants の複製（自動更新）', verbose_name='メイン画像の派生画像'),
+        ),
+        migrations.RunPython(backfill_primary_images, migrations.RunPython.noop),
+    ]
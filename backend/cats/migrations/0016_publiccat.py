@@ -0,0 +1,104 @@
+# Generated by Django 4.2.30 on 2026-10-17 14:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+COPIED_FIELDS = [
+    'name', 'gender', 'age_category', 'estimated_age', 'breed', 'size', 'color',
+    'activity_level', 'affection_level', 'maintenance_level', 'status',
+    'search_document', 'primary_image_name', 'primary_image_variants', 'created_at',
+]
+
+
+def backfill_public_cats(apps, schema_editor):
+    Cat = apps.get_model('cats', 'Cat')
+    PublicCat = apps.get_model('cats', 'PublicCat')
+    cats = Cat.objects.filter(
+        is_public=True,
+        shelter__public_profile_enabled=True,
+        shelter__verification_status='approved',
+    ).select_related('shelter')
+    batch = []
+    for cat in cats.iterator(chunk_size=500):
+        entry = PublicCat(
+            cat_id=cat.pk,
+            shelter_id=cat.shelter_id,
+            shelter_name=cat.shelter.name,
+            shelter_prefecture=cat.shelter.prefecture,
+            shelter_city=cat.shelter.city or '',
+        )
+        for field in COPIED_FIELDS:
+            setattr(entry, field, getattr(cat, field))
+        batch.append(entry)
+        if len(batch) >= 500:
+            PublicCat.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PublicCat.objects.bulk_create(batch)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX cats_publiccat_search_trgm_idx ON cats_publiccat '
+            'USING gin (search_document gin_trgm_ops)'
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX cats_publiccat_search_ft_idx ON cats_publiccat (search_document) '
+            'WITH PARSER ngram'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS cats_publiccat_search_trgm_idx')
+    elif vendor == 'mysql':
+        schema_editor.execute('DROP INDEX cats_publiccat_search_ft_idx ON cats_publiccat')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shelters', '0007_shelter_header_image_shelter_logo_image_and_more'),
+        ('cats', '0015_cat_primary_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicCat',
+            fields=[
+                ('cat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='public_entry', serialize=False, to='cats.cat', verbose_name='保護猫')),
+                ('shelter_name', models.CharField(max_length=200, verbose_name='団体名')),
+                ('shelter_prefecture', models.CharField(max_length=50, verbose_name='都道府県')),
+                ('shelter_city', models.CharField(blank=True, max_length=100, verbose_name='市区町村')),
+                ('name', models.CharField(max_length=100, verbose_name='名前')),
+                ('gender', models.CharField(choices=[('male', 'オス'), ('female', 'メス'), ('unknown', '不明')], max_length=10, verbose_name='性別')),
+                ('age_category', models.CharField(choices=[('kitten', '子猫'), ('adult', '成猫'), ('senior', 'シニア猫'), ('unknown', '不明')], max_length=20, verbose_name='年齢区分')),
+                ('estimated_age', models.CharField(blank=True, max_length=100, verbose_name='推定年齢')),
+                ('breed', models.CharField(blank=True, max_length=100, verbose_name='品種')),
+                ('size', models.CharField(blank=True, max_length=10, verbose_name='サイズ')),
+                ('color', models.CharField(blank=True, max_length=100, verbose_name='毛色')),
+                ('activity_level', models.CharField(choices=[('active', '活発'), ('normal', '普通'), ('calm', 'おっとり'), ('unknown', '不明')], max_length=20, verbose_name='活動量')),
+                ('affection_level', models.PositiveSmallIntegerField(choices=[(5, 'とろとろ甘えん坊（膝乗り・抱っこ大好き）'), (4, '甘えん坊（ナデナデ大好き）'), (3, 'ツンデレ・気まぐれ（気が向くと甘える）'), (2, 'クール・マイペース（適度な距離感）'), (1, '怖がり・修行中（ゆっくり仲良くなろう）')], verbose_name='甘えん坊度')),
+                ('maintenance_level', models.CharField(choices=[('easy', '初心者でも安心（協力的）'), ('normal', '少しコツが必要（普通）'), ('hard', '経験者向き（要練習）')], max_length=20, verbose_name='お手入れ')),
+                ('status', models.CharField(choices=[('open', '募集中'), ('paused', '一時停止'), ('in_review', '審査中'), ('trial', 'トライアル中'), ('adopted', '譲渡済み')], max_length=20, verbose_name='ステータス')),
+                ('search_document', models.TextField(blank=True, default='', verbose_name='検索用ドキュメント')),
+                ('primary_image_name', models.CharField(blank=True, default='', max_length=255, verbose_name='メイン画像ファイル名')),
+                ('primary_image_variants', models.JSONField(blank=True, default=dict, verbose_name='メイン画像の派生画像')),
+                ('created_at', models.DateTimeField(verbose_name='登録日時')),
+                ('shelter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='public_cats', to='shelters.shelter', verbose_name='保護団体')),
+            ],
+            options={
+                'verbose_name': '公開中の保護猫',
+                'verbose_name_plural': '公開中の保護猫',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at', '-cat'], name='publiccat_created_idx'), models.Index(fields=['gender', '-created_at'], name='publiccat_gender_idx'), models.Index(fields=['age_category', '-created_at'], name='publiccat_age_idx'), models.Index(fields=['shelter_prefecture', '-created_at'], name='publiccat_pref_idx'), models.Index(fields=['activity_level', '-created_at'], name='publiccat_activity_idx'), models.Index(fields=['affection_level', '-created_at'], name='publiccat_affection_idx'), models.Index(fields=['maintenance_level', '-created_at'], name='publiccat_maint_idx'), models.Index(fields=['status', '-created_at'], name='publiccat_status_idx'), models.Index(fields=['shelter', '-created_at'], name='publiccat_shelter_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_public_cats, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
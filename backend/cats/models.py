@@ -1,5 +1,6 @@
 from django.db import models
 from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from shelters.models import Shelter
@@ -7,6 +8,33 @@ from shelters.models import Shelter
 User = get_user_model()
 
 
+class CatQuerySet(models.QuerySet):
+    """保護猫クエリセット（一覧表示用の一括取得ヘルパー付き）"""
+
+    def with_list_data(self, user=None, shelter=True, favorites=True):
+        """一覧表示に必要なデータをページ単位でまとめて取得する（N+1対策）
+
+        - 団体: select_related（shelter=False で省略）
+        - メイン画像: Cat 自体に非正規化済み（primary_image_name / primary_image_variants）
+        - お気に入り状態: EXISTS サブクエリで annotate (favorited_by_user)（favorites=False で省略）
+        """
+        from favorites.models import Favorite
+
+        queryset = self.select_related('shelter') if shelter else self.all()
+
+        if not favorites:
+            return queryset
+        if user is not None and user.is_authenticated:
+            return queryset.annotate(
+                favorited_by_user=Exists(
+                    Favorite.objects.filter(user=user, cat=OuterRef('pk'))
+                )
+            )
+        return queryset.annotate(
+            favorited_by_user=Value(False, output_field=BooleanField())
+        )
+
+
 class Cat(models.Model):
     """保護猫モデル（保護猫カフェ向け詳細版）"""
     
@@ -276,7 +304,52 @@ class Cat(models.Model):
         auto_now=True,
         verbose_name='更新日時'
     )
-    
+
+    # --- 検索用（cats.search で管理） ---
+    search_document = models.TextField(
+        blank=True,
+        editable=False,
+        default='',
+        verbose_name='検索用ドキュメント',
+        help_text='名前・品種・性格・団体名などを正規化して連結したもの（自動更新）'
+    )
+
+    # --- 相性スコア用（cats.matching で管理） ---
+    match_vector = models.BinaryField(
+        null=True,
+        editable=False,
+        verbose_name='相性特徴ベクトル',
+        help_text='甘えん坊度・活発さ・お手入れ難易度・譲渡条件を数値化したもの（自動更新）'
+    )
+
+    # --- メイン画像（CatImage の保存・削除時に Cat.refresh_primary_images で更新） ---
+    primary_image = models.ForeignKey(
+        'CatImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name='メイン画像'
+    )
+    primary_image_name = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='メイン画像ファイル名',
+        help_text='一覧表示で画像テーブルを参照しないための複製（自動更新）'
+    )
+    primary_image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='メイン画像の派生画像',
+        help_text='CatImage.variants の複製（自動更新）'
+    )
+
+    objects = CatQuerySet.as_manager()
+
     class Meta:
         verbose_name = '保護猫'
         verbose_name_plural = '保護猫'
@@ -296,17 +369,67 @@ class Cat(models.Model):
                     'is_public': '所属団体が「承認済み」でないため、公開設定を有効にできません。下書きとして保存してください。'
                 })
         
+    # 保存時に自動計算される派生フィールド
+    DERIVED_FIELDS = ['search_document', 'match_vector']
+
+    # CatImage 側から更新されるフィールド（読み込み後に画像が変わっても Cat.save() で古い値に戻さない）
+    PRIMARY_IMAGE_FIELDS = ['primary_image', 'primary_image_name', 'primary_image_variants']
+
     def save(self, *args, **kwargs):
+        from .matching import encode_cat
+        from .search import build_search_document
+
         self.full_clean()
+        self.search_document = build_search_document(self)
+        self.match_vector = encode_cat(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            excluded = set(self.PRIMARY_IMAGE_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in excluded and field.attname not in excluded
+            ]
         super().save(*args, **kwargs)
 
+    @classmethod
+    def refresh_primary_images(cls, cat_ids):
+        """指定した猫のメイン画像フィールドを CatImage から再計算する（猫の数に関わらず2クエリ）
+
+        メイン画像が複数ある場合は sort_order, created_at で最初のものを採用する。
+        公開カタログ（PublicCat）の行も合わせて更新する。
+        """
+        cat_ids = set(cat_ids)
+        if not cat_ids:
+            return
+
+        primaries = {}
+        images = (
+            CatImage.objects.filter(cat_id__in=cat_ids, is_primary=True)
+            .order_by('cat_id', 'sort_order', 'created_at')
+            .values_list('cat_id', 'id', 'image', 'variants')
+        )
+        for cat_id, image_id, name, variants in images:
+            primaries.setdefault(cat_id, (image_id, name or '', variants or {}))
+
+        cats = []
+        for cat_id in cat_ids:
+            image_id, name, variants = primaries.get(cat_id, (None, '', {}))
+            cats.append(cls(
+                pk=cat_id, primary_image_id=image_id,
+                primary_image_name=name, primary_image_variants=variants,
+            ))
+        cls.objects.bulk_update(cats, cls.PRIMARY_IMAGE_FIELDS, batch_size=500)
+
+        from .catalog import sync_public_cats
+        sync_public_cats(cat_ids)
+
     @property
     def primary_image_url(self):
         """メイン画像URLを返す（無ければプレースホルダ）"""
-        # メイン画像を取得（複数ある場合は sort_order, created_at で決定）
-        primary_image = self.images.filter(is_primary=True).order_by('sort_order', 'created_at').first()
-        if primary_image and primary_image.image and hasattr(primary_image.image, 'url'):
-            return primary_image.image.url
+        if self.primary_image_name:
+            return CatImage._meta.get_field('image').storage.url(self.primary_image_name)
         
         # メイン画像が無い場合はプレースホルダ
         return settings.STATIC_URL + 'images/placeholder_cat.svg'
@@ -348,6 +471,13 @@ class CatImage(models.Model):
         blank=True,
         verbose_name='キャプション'
     )
+    variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='派生画像',
+        help_text='サムネイル・WebP等のファイル名 {形式: {幅: ファイル名}}（自動生成）'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='アップロード日時'
@@ -365,16 +495,15 @@ class CatImage(models.Model):
         return f"{self.cat.name}の画像"
     
     def save(self, *args, **kwargs):
-        """メイン画像を1枚に制限"""
+        """メイン画像を1枚に制限し、猫側のメイン画像フィールドを同じトランザクションで更新する"""
         self.full_clean()
         
-        if self.is_primary:
-            with transaction.atomic():
+        with transaction.atomic():
+            if self.is_primary:
                 Cat.objects.select_for_update().get(pk=self.cat_id)
                 CatImage.objects.filter( cat_id=self.cat_id, is_primary=True ).exclude(pk=self.pk).update(is_primary=False)
-                super().save(*args, **kwargs)
-        else:
             super().save(*args, **kwargs)
+            Cat.refresh_primary_images([self.cat_id])
 
 
 class CatVideo(models.Model):
@@ -414,3 +543,99 @@ class CatVideo(models.Model):
     
     def __str__(self):
         return f"{self.cat.name}の動画"
+
+
+class PublicCatQuerySet(models.QuerySet):
+    """公開カタログのクエリセット"""
+
+    def with_favorites(self, user=None):
+        """お気に入り状態を EXISTS サブクエリで annotate する (favorited_by_user)"""
+        from favorites.models import Favorite
+
+        if user is not None and user.is_authenticated:
+            return self.annotate(
+                favorited_by_user=Exists(
+                    Favorite.objects.filter(user=user, cat=OuterRef('cat_id'))
+                )
+            )
+        return self.annotate(
+            favorited_by_user=Value(False, output_field=BooleanField())
+        )
+
+
+class PublicCat(models.Model):
+    """一般公開中の保護猫の一覧表示用テーブル（読み取り専用の非正規化モデル）
+
+    公開条件（猫が公開設定 ON・団体が公開プロフィール有効かつ承認済み）を満たす猫のみを保持し、
+    一覧表示・絞り込みに使う項目と団体名・所在地を複製する。
+    Cat / Shelter / CatImage の変更時に cats.catalog.sync_public_cats() で更新される。
+    """
+
+    cat = models.OneToOneField(
+        Cat,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='public_entry',
+        verbose_name='保護猫'
+    )
+    shelter = models.ForeignKey(
+        Shelter,
+        on_delete=models.CASCADE,
+        related_name='public_cats',
+        verbose_name='保護団体'
+    )
+    shelter_name = models.CharField(max_length=200, verbose_name='団体名')
+    shelter_prefecture = models.CharField(max_length=50, verbose_name='都道府県')
+    shelter_city = models.CharField(max_length=100, blank=True, verbose_name='市区町村')
+
+    name = models.CharField(max_length=100, verbose_name='名前')
+    gender = models.CharField(max_length=10, choices=Cat.GENDER_CHOICES, verbose_name='性別')
+    age_category = models.CharField(max_length=20, choices=Cat.AGE_CATEGORY_CHOICES, verbose_name='年齢区分')
+    estimated_age = models.CharField(max_length=100, blank=True, verbose_name='推定年齢')
+    breed = models.CharField(max_length=100, blank=True, verbose_name='品種')
+    size = models.CharField(max_length=10, blank=True, verbose_name='サイズ')
+    color = models.CharField(max_length=100, blank=True, verbose_name='毛色')
+    activity_level = models.CharField(max_length=20, choices=Cat.ACTIVITY_LEVEL_CHOICES, verbose_name='活動量')
+    affection_level = models.PositiveSmallIntegerField(choices=Cat.AFFECTION_LEVEL_CHOICES, verbose_name='甘えん坊度')
+    maintenance_level = models.CharField(max_length=20, choices=Cat.MAINTENANCE_LEVEL_CHOICES, verbose_name='お手入れ')
+    status = models.CharField(max_length=20, choices=Cat.STATUS_CHOICES, verbose_name='ステータス')
+    search_document = models.TextField(blank=True, default='', verbose_name='検索用ドキュメント')
+    primary_image_name = models.CharField(max_length=255, blank=True, default='', verbose_name='メイン画像ファイル名')
+    primary_image_variants = models.JSONField(default=dict, blank=True, verbose_name='メイン画像の派生画像')
+    created_at = models.DateTimeField(verbose_name='登録日時')
+
+    objects = PublicCatQuerySet.as_manager()
+
+    # 一覧表示で Cat から複製するフィールド
+    COPIED_FIELDS = [
+        'name', 'gender', 'age_category', 'estimated_age', 'breed', 'size', 'color',
+        'activity_level', 'affection_level', 'maintenance_level', 'status',
+        'search_document', 'primary_image_name', 'primary_image_variants', 'created_at',
+    ]
+
+    class Meta:
+        verbose_name = '公開中の保護猫'
+        verbose_name_plural = '公開中の保護猫'
+        ordering = ['-created_at']
+        # 新着順（-created_at, -cat_id）と、絞り込み条件ごとの新着順
+        indexes = [
+            models.Index(fields=['-created_at', '-cat'], name='publiccat_created_idx'),
+            models.Index(fields=['gender', '-created_at'], name='publiccat_gender_idx'),
+            models.Index(fields=['age_category', '-created_at'], name='publiccat_age_idx'),
+            models.Index(fields=['shelter_prefecture', '-created_at'], name='publiccat_pref_idx'),
+            models.Index(fields=['activity_level', '-created_at'], name='publiccat_activity_idx'),
+            models.Index(fields=['affection_level', '-created_at'], name='publiccat_affection_idx'),
+            models.Index(fields=['maintenance_level', '-created_at'], name='publiccat_maint_idx'),
+            models.Index(fields=['status', '-created_at'], name='publiccat_status_idx'),
+            models.Index(fields=['shelter', '-created_at'], name='publiccat_shelter_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def primary_image_url(self):
+        """メイン画像URLを返す（無ければプレースホルダ）"""
+        if self.primary_image_name:
+            return CatImage._meta.get_field('image').storage.url(self.primary_image_name)
+        return settings.STATIC_URL + 'images/placeholder_cat.svg'
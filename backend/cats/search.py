@@ -0,0 +1,98 @@
+"""
+保護猫のキーワード検索
+
+Cat ごとに検索用ドキュメント（名前・品種・毛色・性格・紹介文・譲渡条件・団体名・所在地）を
+Cat.search_document に正規化して保持し、DBごとの全文検索インデックスで検索する。
+
+- PostgreSQL: pg_trgm の GIN インデックス + TrigramWordSimilarity でランキング
+- MySQL: FULLTEXT インデックス（ngram パーサー）+ MATCH ... AGAINST のスコアでランキング
+- その他（SQLite など）: icontains による簡易フォールバック（名前一致を優先）
+"""
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# 検索ドキュメントに含める Cat / Shelter のフィールド
+CAT_SEARCH_FIELDS = ['name', 'breed', 'color', 'personality', 'description', 'other_terms']
+SHELTER_SEARCH_FIELDS = ['name', 'prefecture', 'city']
+
+# MySQL の ngram_token_size（デフォルト2）未満の語は FULLTEXT で引けない
+MYSQL_NGRAM_TOKEN_SIZE = 2
+
+
+def normalize_text(value):
+    """全角/半角・大文字/小文字の揺れを吸収する（NFKC + 小文字化）"""
+    return unicodedata.normalize('NFKC', value or '').lower()
+
+
+def build_search_document(cat, shelter=None):
+    """Cat（と所属団体）から検索用ドキュメント文字列を組み立てる"""
+    shelter = shelter or cat.shelter
+    parts = [getattr(cat, field) for field in CAT_SEARCH_FIELDS]
+    parts += [getattr(shelter, field) for field in SHELTER_SEARCH_FIELDS]
+    return normalize_text(' '.join(part for part in parts if part))
+
+
+def split_terms(query):
+    """検索クエリを正規化して語に分割する（空白区切り、重複除去）"""
+    terms = []
+    for term in normalize_text(query).split():
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def search_cats(queryset, query):
+    """キーワードで絞り込み、関連度 search_rank を annotate したクエリセットを返す
+
+    全ての語を含む猫のみを返す（AND検索）。
+    並び順は呼び出し側で '-search_rank' を指定すること。
+    """
+    terms = split_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, terms)
+    if vendor == 'mysql' and all(len(term) >= MYSQL_NGRAM_TOKEN_SIZE for term in terms):
+        return _search_mysql(queryset, terms)
+    return _search_fallback(queryset, terms)
+
+
+def _search_postgresql(queryset, terms):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # ILIKE は GIN(gin_trgm_ops) インデックスで処理される
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+    return queryset.annotate(
+        search_rank=TrigramWordSimilarity(' '.join(terms), 'search_document')
+    )
+
+
+def _search_mysql(queryset, terms):
+    # BOOLEAN MODE で全語必須（+"語"）。語中のダブルクォートは除去する
+    against = ' '.join('+"{}"'.format(term.replace('"', '')) for term in terms)
+    # Cat と公開カタログ（PublicCat）のどちらのテーブルにも FULLTEXT インデックスがある
+    table = queryset.model._meta.db_table
+    match_sql = f'MATCH({table}.search_document) AGAINST (%s IN BOOLEAN MODE)'
+    return queryset.annotate(
+        search_rank=RawSQL(match_sql, (against,), output_field=FloatField())
+    ).filter(search_rank__gt=0)
+
+
+def _search_fallback(queryset, terms):
+    condition = Q()
+    rank = Value(0, output_field=IntegerField())
+    for term in terms:
+        condition &= Q(search_document__contains=term)
+        # 名前に含まれる語は重み付けして上位に表示する
+        rank = rank + Case(
+            When(name__icontains=term, then=Value(3)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    return queryset.filter(condition).annotate(search_rank=rank)
@@ -1,14 +1,20 @@
 from rest_framework import serializers
-from .models import Cat, CatImage, CatVideo
-from shelters.models import ShelterUser
+from .models import Cat, CatImage, CatVideo, PublicCat
+from .images import variant_srcset, variant_urls
+from shelters.membership import get_membership
 
 class CatImageSerializer(serializers.ModelSerializer):
     """保護猫画像シリアライザー"""
     image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = CatImage
-        fields = ['id', 'image', 'image_url', 'is_primary', 'sort_order', 'caption', 'created_at']
+        fields = [
+            'id', 'image', 'image_url', 'variants', 'srcset',
+            'is_primary', 'sort_order', 'caption', 'created_at'
+        ]
         read_only_fields = ['id', 'created_at']
 
     def get_image_url(self, obj):
@@ -19,6 +25,14 @@ class CatImageSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
 
+    def get_variants(self, obj):
+        """派生画像の URL {形式: {幅: URL}}（生成前は空）"""
+        return variant_urls(obj.variants, self.context.get('request'))
+
+    def get_srcset(self, obj):
+        """形式ごとの srcset 文字列 {形式: "URL 320w, ..."}（生成前は空）"""
+        return variant_srcset(obj.variants, self.context.get('request'))
+
     def validate_is_primary(self, value):
         """is_primaryフィールドの値を明示的にbooleanに変換"""
         if isinstance(value, str):
@@ -46,6 +60,7 @@ class CatListSerializer(serializers.ModelSerializer):
     """保護猫一覧用シリアライザー"""
 
     primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
     shelter_name = serializers.CharField(source='shelter.name', read_only=True)
     is_favorited = serializers.SerializerMethodField()
 
@@ -53,7 +68,7 @@ class CatListSerializer(serializers.ModelSerializer):
         model = Cat
         fields = [
             'id', 'name', 'gender', 'age_category', 'estimated_age',
-            'breed', 'size', 'color', 'status', 'primary_image',
+            'breed', 'size', 'color', 'status', 'primary_image', 'primary_image_srcset',
             'shelter_name', 'created_at', 'is_favorited'
         ]
 
@@ -66,14 +81,40 @@ class CatListSerializer(serializers.ModelSerializer):
             return image_url
         return None
 
+    def get_primary_image_srcset(self, obj):
+        """メイン画像の形式ごとの srcset（派生画像が無ければ空）"""
+        return variant_srcset(obj.primary_image_variants, self.context.get('request'))
+
     def get_is_favorited(self, obj):
         """ログイン中のユーザーがこの猫をお気に入り登録しているか"""
+        # Cat.objects.with_list_data() で annotate 済みならクエリを発行しない
+        annotated = getattr(obj, 'favorited_by_user', None)
+        if annotated is not None:
+            return bool(annotated)
+
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             from favorites.models import Favorite
             return Favorite.objects.filter(user=request.user, cat=obj).exists()
         return False
 
+class PublicCatListSerializer(CatListSerializer):
+    """一般公開一覧用シリアライザー（公開カタログ PublicCat から CatListSerializer と同じ形式で返す）"""
+
+    id = serializers.IntegerField(source='cat_id', read_only=True)
+    shelter_name = serializers.CharField(read_only=True)
+
+    class Meta(CatListSerializer.Meta):
+        model = PublicCat
+
+class RecommendedCatSerializer(CatListSerializer):
+    """おすすめ猫一覧用シリアライザー（相性スコア付き）"""
+
+    match_score = serializers.FloatField(read_only=True)
+
+    class Meta(CatListSerializer.Meta):
+        fields = CatListSerializer.Meta.fields + ['match_score']
+
 class ShelterInfoSerializer(serializers.Serializer):
     """保護団体情報シリアライザー（CatDetail用のネストされたシリアライザー）"""
     id = serializers.IntegerField(read_only=True)
@@ -96,6 +137,7 @@ class CatDetailSerializer(serializers.ModelSerializer):
     images = CatImageSerializer(many=True, read_only=True)
     videos = CatVideoSerializer(many=True, read_only=True)
     primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
 
     # 修正: Shelter情報をネストされたシリアライザーで返す
@@ -120,7 +162,7 @@ class CatDetailSerializer(serializers.ModelSerializer):
             'is_single_ok', 'is_elderly_ok', 'other_terms',
 
             'description', 'status', 'is_public',
-            'images', 'videos', 'primary_image', 'shelter', 'shelter_name',
+            'images', 'videos', 'primary_image', 'primary_image_srcset', 'shelter', 'shelter_name',
             'created_at', 'updated_at', 'is_favorited'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -134,6 +176,10 @@ class CatDetailSerializer(serializers.ModelSerializer):
             return image_url
         return None
 
+    def get_primary_image_srcset(self, obj):
+        """メイン画像の形式ごとの srcset（派生画像が無ければ空）"""
+        return variant_srcset(obj.primary_image_variants, self.context.get('request'))
+
     def get_is_favorited(self, obj):
         """ログイン中のユーザーがこの猫をお気に入り登録しているか"""
         request = self.context.get('request')
@@ -165,32 +211,24 @@ class CatCreateUpdateSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return data
 
-        from shelters.models import ShelterUser
+        membership = get_membership(request)
         
         # 団体IDの特定 (更新時はinstanceから、作成時はdataのshelterから、あるいはリクエストユーザーから)
-        shelter = None
+        shelter_id = None
         if self.instance:
-            shelter = self.instance.shelter
-        elif 'shelter' in data:
-            shelter = data['shelter']
+            shelter_id = self.instance.shelter_id
+        elif data.get('shelter'):
+            shelter_id = data['shelter'].pk
         
         # 団体が特定できない場合は、ユーザーが所属する有効な団体を取得
-        if not shelter:
-            shelter_user_obj = ShelterUser.objects.filter(user=request.user, is_active=True).first()
-            if shelter_user_obj:
-                shelter = shelter_user_obj.shelter
+        if not shelter_id:
+            shelter_id = membership.primary_shelter_id
 
-        if not shelter:
+        if not shelter_id:
             return data
 
-        shelter_user = ShelterUser.objects.filter(
-            user=request.user,
-            shelter=shelter,
-            is_active=True
-        ).first()
-
         # スタッフ権限の場合の制限
-        if shelter_user and shelter_user.role == 'staff':
+        if membership.is_staff_only(shelter_id):
             # 管理者のみが「作成・更新」両方で制限されるフィールド
             # 性格・特徴関連以外で、特に重要なもの
             strict_restricted_fields = [
@@ -250,7 +288,7 @@ class CatCreateUpdateSerializer(serializers.ModelSerializer):
                             changed_restricted_fields.append(field)
 
             if changed_restricted_fields:
-                raise ValidationError({
+                raise serializers.ValidationError({
                     field: "スタッフ権限ではこの項目を設定・変更できません。管理者に依頼してください。"
                     for field in changed_restricted_fields
                 })
@@ -265,8 +303,7 @@ class CatCreateUpdateSerializer(serializers.ModelSerializer):
         if request:
             is_admin = request.user.is_superuser
             if not is_admin:
-                shelter_user = ShelterUser.objects.filter(user=request.user, is_active=True).first()
-                if shelter_user and shelter_user.role == 'admin':
+                if get_membership(request).primary_role == 'admin':
                     is_admin = True
 
             if not is_admin:
@@ -282,19 +319,17 @@ class CatCreateUpdateSerializer(serializers.ModelSerializer):
                         self.fields[field_name].allow_blank = True
 
     def update(self, instance, validated_data):
-        """医療情報と募集詳細の変更制限"""
+        return super().update(instance, self.permitted_changes(instance, validated_data))
+
+    def permitted_changes(self, instance, validated_data):
+        """医療情報と募集詳細の変更制限（変更できない項目を validated_data から除く）"""
         request = self.context.get('request')
         
         # 管理者（システム全体or団体内）以外の場合、以下のフィールドの変更を無効化（元の値を保持）
         if request:
             is_admin = request.user.is_superuser
             if not is_admin:
-                shelter_user = ShelterUser.objects.filter(
-                    user=request.user, 
-                    shelter=instance.shelter,
-                    is_active=True
-                ).first()
-                if shelter_user and shelter_user.role == 'admin':
+                if get_membership(request).is_admin(instance.shelter_id):
                     is_admin = True
 
             if not is_admin:
@@ -312,4 +347,38 @@ class CatCreateUpdateSerializer(serializers.ModelSerializer):
                     if field in validated_data:
                         validated_data.pop(field)
 
-        return super().update(instance, validated_data)
+        return validated_data
+
+
+class CatBulkSerializer(serializers.Serializer):
+    """保護猫の一括作成・更新リクエスト
+
+    - action='update': ids と changes（全件に同じ変更）、または items（[{"id": 1, "status": "paused"}, ...]）
+    - action='create': items（CatCreateUpdateSerializer と同じ形式のレコード）
+    各項目の検証は cats.bulk で行い、項目ごとの結果を返す。
+    """
+
+    MAX_ITEMS = 200
+
+    action = serializers.ChoiceField(choices=['create', 'update'])
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    changes = serializers.DictField(required=False)
+    items = serializers.ListField(child=serializers.DictField(), required=False)
+
+    def validate(self, attrs):
+        if 'ids' in attrs:
+            if attrs['action'] != 'update' or 'items' in attrs:
+                raise serializers.ValidationError({'ids': 'ids は action=update で items の代わりに指定してください。'})
+            if not attrs.get('changes'):
+                raise serializers.ValidationError({'changes': '変更する項目を指定してください。'})
+            attrs['items'] = [{**attrs['changes'], 'id': pk} for pk in dict.fromkeys(attrs['ids'])]
+        elif 'changes' in attrs:
+            raise serializers.ValidationError({'changes': 'changes は ids と合わせて指定してください。'})
+
+        items = attrs.get('items') or []
+        if not items:
+            raise serializers.ValidationError({'items': '対象の猫を1件以上指定してください。'})
+        if len(items) > self.MAX_ITEMS:
+            raise serializers.ValidationError({'items': f'一度に指定できるのは{self.MAX_ITEMS}件までです。'})
+        attrs['items'] = items
+        return attrs
@@ -0,0 +1,114 @@
+"""
+保護猫関連のシグナルハンドラ
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cat_versions, bump_shelter_versions
+from shelters.models import Shelter
+from .catalog import sync_public_cats, sync_shelter_public_cats
+from .images import delete_variants, schedule_variants
+from .models import Cat, CatImage, CatVideo
+from .search import SHELTER_SEARCH_FIELDS, build_search_document
+
+
+def _shelter_search_values(shelter):
+    return tuple(getattr(shelter, field) for field in SHELTER_SEARCH_FIELDS)
+
+
+@receiver(post_init, sender=Shelter)
+def remember_shelter_search_values(sender, instance, **kwargs):
+    """検索対象フィールドの読み込み時の値を保持する（変更検知用）"""
+    instance._search_values = _shelter_search_values(instance)
+
+
+@receiver(post_save, sender=Shelter)
+def refresh_cat_search_documents(sender, instance, created, **kwargs):
+    """団体名・所在地が変わった場合のみ、所属猫の検索用ドキュメントを更新する"""
+    current = _shelter_search_values(instance)
+    if created or getattr(instance, '_search_values', None) == current:
+        instance._search_values = current
+        return
+
+    cats = list(Cat.objects.filter(shelter=instance).only(
+        'id', 'shelter_id', 'name', 'breed', 'color', 'personality', 'description', 'other_terms'
+    ))
+    for cat in cats:
+        cat.search_document = build_search_document(cat, shelter=instance)
+    Cat.objects.bulk_update(cats, ['search_document'], batch_size=500)
+    instance._search_values = current
+
+
+# --- 派生画像（サムネイル・WebP/AVIF）の生成（cats.images） ---
+
+@receiver(post_init, sender=CatImage)
+def remember_image_name(sender, instance, **kwargs):
+    """読み込み時の画像ファイル名を保持する（差し替え検知用）"""
+    instance._original_image_name = instance.image.name if instance.image else ''
+
+
+@receiver(post_save, sender=CatImage)
+def generate_image_variants(sender, instance, created, **kwargs):
+    """新規アップロード・画像差し替え時のみ派生画像を生成する（並び順などの変更では生成しない）"""
+    current = instance.image.name if instance.image else ''
+    if current and (created or current != getattr(instance, '_original_image_name', '')):
+        schedule_variants(instance.pk)
+    instance._original_image_name = current
+
+
+@receiver(post_delete, sender=CatImage)
+def delete_image_variants(sender, instance, **kwargs):
+    if instance.variants:
+        delete_variants(instance.variants, instance.image.storage)
+
+
+# --- 猫のメイン画像フィールドの更新（保存時は CatImage.save で更新） ---
+
+@receiver(post_delete, sender=CatImage)
+def refresh_primary_image(sender, instance, origin=None, **kwargs):
+    """メイン画像が削除されたら次のメイン画像候補に切り替える（削除と同じトランザクション内）"""
+    # 猫・団体の削除に伴うカスケード削除では何もしない（削除中の猫の行を作り直さないため）
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if instance.is_primary and origin_model is CatImage:
+        Cat.refresh_primary_images([instance.cat_id])
+
+
+# --- 公開カタログ（PublicCat）の更新（cats.catalog） ---
+
+@receiver(post_save, sender=Cat)
+def sync_public_cat(sender, instance, **kwargs):
+    sync_public_cats([instance.pk])
+
+
+@receiver(post_save, sender=Shelter)
+def sync_shelter_public_catalog(sender, instance, created, **kwargs):
+    """公開状態・団体名・所在地の変更を所属猫の行に反映する（検索用ドキュメントの更新後）"""
+    if not created:
+        sync_shelter_public_cats(instance.pk)
+
+
+# --- 公開APIキャッシュの無効化（config.cache） ---
+
+@receiver(post_save, sender=Cat)
+@receiver(post_delete, sender=Cat)
+def invalidate_cat_cache(sender, instance, **kwargs):
+    bump_cat_versions(instance.pk, instance.shelter_id)
+
+
+@receiver(post_save, sender=CatImage)
+@receiver(post_delete, sender=CatImage)
+@receiver(post_save, sender=CatVideo)
+@receiver(post_delete, sender=CatVideo)
+def invalidate_cat_media_cache(sender, instance, **kwargs):
+    # 猫ごと削除された場合（カスケード）は猫側のシグナルで無効化される
+    shelter_id = Cat.objects.filter(pk=instance.cat_id).values_list('shelter_id', flat=True).first()
+    if shelter_id is not None:
+        bump_cat_versions(instance.cat_id, shelter_id)
+
+
+@receiver(post_save, sender=Shelter)
+@receiver(post_delete, sender=Shelter)
+def invalidate_shelter_cache(sender, instance, **kwargs):
+    cat_ids = list(Cat.objects.filter(shelter_id=instance.pk).values_list('id', flat=True))
+    bump_shelter_versions(instance.pk, cat_ids)
@@ -0,0 +1,470 @@
+"""
+猫一覧のクエリ数の回帰テスト
+
+一覧のクエリ数が猫の件数に比例しない（メイン画像・お気に入り状態・団体の N+1 が無い）ことを確認する。
+"""
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from favorites.models import Favorite
+from shelters.models import Shelter, ShelterUser
+from .models import Cat, CatImage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png(name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), (200, 100, 50)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+def create_shelter(name='保護団体'):
+    return Shelter.objects.create(
+        name=name, prefecture='東京都', city='渋谷区', address='1-1',
+        verification_status='approved', public_profile_enabled=True,
+    )
+
+
+def create_cats(shelter, count, user=None):
+    cats = []
+    for i in range(count):
+        cat = Cat.objects.create(shelter=shelter, name=f'ねこ{i}', is_public=True)
+        CatImage.objects.create(cat=cat, image=png(f'cat{i}.png'), is_primary=True)
+        if user is not None and i % 2:
+            Favorite.objects.create(user=user, cat=cat)
+        cats.append(cat)
+    return cats
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    API_CACHE={'ENABLED': False},
+    CAT_IMAGE_VARIANTS={'ENABLED': False},
+)
+class CatListQueryCountTests(TestCase):
+    """一覧のクエリ数は猫の件数に関わらず一定"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        self.shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=self.shelter, user=self.staff, role='admin')
+        self.adopter = User.objects.create_user('adopter', 'adopter@example.com', 'pw')
+        create_cats(self.shelter, 10, user=self.adopter)
+        self.client = APIClient()
+
+    def test_public_cat_list(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/cats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 10)
+        self.assertTrue(all(cat['primary_image'] for cat in response.data['results']))
+
+    def test_public_cat_list_with_favorites(self):
+        self.client.force_authenticate(self.adopter)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/cats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(cat['is_favorited'] for cat in response.data['results']), 5)
+
+    def test_shelter_cat_list(self):
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/cats/my_cats/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(cat['primary_image'] for cat in results))
+        self.assertEqual(sum(cat['is_favorited'] for cat in results), 0)
+
+
+@override_settings(API_CACHE={'ENABLED': False})
+class FacetFilterTests(TestCase):
+    """選択肢・型に合わない絞り込み値は無視する"""
+
+    def setUp(self):
+        shelter = create_shelter()
+        Cat.objects.create(shelter=shelter, name='たま', is_public=True)
+        self.client = APIClient()
+
+    def test_invalid_values_are_ignored(self):
+        for path in ('/api/cats/facets/', '/api/cats/'):
+            for params in ({'affection_level': 'abc'}, {'gender': 'unknown'}, {'status': 'x'}):
+                response = self.client.get(path, params)
+                self.assertEqual(response.status_code, 200, (path, params))
+        response = self.client.get('/api/cats/facets/', {'affection_level': 'abc'})
+        self.assertEqual(response.data['total'], 1)
+
+
+class CatImportTests(TestCase):
+    """CSV / JSONL の一括取り込み（cats.importer・POST /api/cats/import/）"""
+
+    def setUp(self):
+        self.shelter = create_shelter()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=self.shelter, user=self.staff, role='admin')
+
+    def _import(self, text, **kwargs):
+        from .importer import import_cats
+
+        return import_cats(io.BytesIO(text.encode('utf-8')), self.shelter, **kwargs)
+
+    def test_maps_headers_labels_and_booleans(self):
+        result = self._import(
+            '名前（仮名OK）,性別,age_category,甘えん坊度,単身者応募可（非推奨）,is_public,メモ\n'
+            'たま,メス,Kitten,5,はい,false,x\n'
+        )
+        self.assertEqual((result.created, result.failed), (1, 0))
+        self.assertEqual(result.unknown_columns, ['メモ'])
+        cat = Cat.objects.get(shelter=self.shelter)
+        self.assertEqual(
+            (cat.name, cat.gender, cat.age_category, cat.affection_level, cat.is_single_ok, cat.is_public),
+            ('たま', 'female', 'kitten', 5, True, False),
+        )
+
+    def test_reports_errors_per_row(self):
+        result = self._import(
+            'name,gender,is_single_ok\n'
+            'たま,オス,はい\n'
+            'みけ,トラ,はい\n'
+            'くろ,メス,たぶん\n'
+            ',メス,いいえ\n'
+        )
+        self.assertEqual((result.total, result.created, result.failed), (4, 1, 3))
+        self.assertEqual([error['row'] for error in result.errors], [3, 4, 5])
+        self.assertIn('gender', result.errors[0]['errors'])
+        self.assertIn('is_single_ok', result.errors[1]['errors'])
+        self.assertIn('name', result.errors[2]['errors'])
+        self.assertEqual(list(Cat.objects.values_list('name', flat=True)), ['たま'])
+
+    def test_jsonl_reports_unreadable_lines(self):
+        result = self._import('{"name": "たま", "gender": "male"}\nnot json\n[1]\n', fmt='jsonl')
+        self.assertEqual((result.total, result.created, result.failed), (3, 1, 2))
+        self.assertEqual([error['row'] for error in result.errors], [2, 3])
+
+    def test_dry_run_does_not_save(self):
+        result = self._import('name\nたま\nみけ\n', dry_run=True)
+        self.assertEqual((result.created, result.failed, result.dry_run), (2, 0, True))
+        self.assertFalse(Cat.objects.exists())
+
+    def test_chunk_boundaries(self):
+        chunks = []
+        rows = ''.join(f'ねこ{i},{"トラ" if i == 2 else "オス"}\n' for i in range(5))
+        result = self._import(
+            'name,gender\n' + rows, chunk_size=2, progress=lambda result: chunks.append(result.total)
+        )
+        self.assertEqual(chunks, [2, 4, 5])
+        self.assertEqual((result.total, result.created, result.failed), (5, 4, 1))
+        self.assertEqual(result.errors[0]['row'], 4)
+        self.assertEqual(Cat.objects.count(), 4)
+
+    def test_api_rejects_non_text_encoding(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        for encoding in ('base64', 'no-such-encoding'):
+            upload = SimpleUploadedFile('cats.csv', b'name\n', content_type='text/csv')
+            response = client.post('/api/cats/import/', {'file': upload, 'encoding': encoding})
+            self.assertEqual(response.status_code, 400, encoding)
+            self.assertIn('encoding', response.data)
+
+    def test_api_imports_cp932_csv(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        upload = SimpleUploadedFile('cats.csv', 'name,性別\nたま,オス\n'.encode('cp932'), content_type='text/csv')
+        response = client.post('/api/cats/import/', {'file': upload, 'encoding': 'cp932'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 0))
+        self.assertEqual(Cat.objects.get().gender, 'male')
+
+
+class CatBulkTests(TestCase):
+    """保護猫の一括作成・更新（cats.bulk・POST /api/cats/bulk/）"""
+
+    def setUp(self):
+        self.shelter = create_shelter()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=self.shelter, user=self.admin, role='admin')
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=self.shelter, user=self.staff, role='staff')
+        self.cats = [
+            Cat.objects.create(shelter=self.shelter, name=f'ねこ{i}', is_public=False, status='open')
+            for i in range(3)
+        ]
+        other_shelter = create_shelter('他の団体')
+        self.other_cat = Cat.objects.create(shelter=other_shelter, name='よそのねこ', is_public=True)
+        self.client = APIClient()
+
+    def _post(self, user, data):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/cats/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_unknown_and_other_shelter_ids(self):
+        data = self._post(self.admin, {'action': 'update', 'items': [
+            {'id': self.cats[0].pk, 'name': 'たま'},
+            {'id': self.other_cat.pk, 'name': 'のっとり'},
+            {'id': 999999, 'name': 'だれ'},
+            {'name': 'IDなし'},
+        ]})
+        self.assertEqual((data['succeeded'], data['failed']), (1, 3))
+        self.assertEqual([result['status'] for result in data['results']], ['updated', 'error', 'error', 'error'])
+        self.other_cat.refresh_from_db()
+        self.assertEqual(self.other_cat.name, 'よそのねこ')
+        self.assertEqual(Cat.objects.get(pk=self.cats[0].pk).name, 'たま')
+
+    def test_non_member_cannot_update(self):
+        outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pw', user_type='shelter')
+        data = self._post(outsider, {'action': 'update', 'ids': [self.cats[0].pk], 'changes': {'name': 'x'}})
+        self.assertEqual((data['succeeded'], data['failed']), (0, 1))
+        self.assertEqual(Cat.objects.get(pk=self.cats[0].pk).name, 'ねこ0')
+
+    def test_duplicate_ids(self):
+        data = self._post(self.admin, {'action': 'update', 'items': [
+            {'id': self.cats[0].pk, 'name': '1回目'},
+            {'id': self.cats[0].pk, 'name': '2回目'},
+        ]})
+        self.assertEqual([result['status'] for result in data['results']], ['updated', 'error'])
+        self.assertIn('id', data['results'][1]['errors'])
+        self.assertEqual(Cat.objects.get(pk=self.cats[0].pk).name, '1回目')
+
+    def test_staff_restricted_fields(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        cat = self.cats[0]
+        # 制限項目を変更しようとした項目はエラー、他の項目は反映する
+        data = self._post(self.staff, {'action': 'update', 'items': [
+            {'id': cat.pk, 'status': 'paused'},
+            {'id': self.cats[1].pk, 'personality': '人懐こい'},
+        ]})
+        self.assertEqual([result['status'] for result in data['results']], ['error', 'updated'])
+        self.assertIn('status', data['results'][0]['errors'])
+        self.assertEqual(Cat.objects.get(pk=cat.pk).status, 'open')
+
+        # 値の変わらない制限項目は permitted_changes で除かれ、UPDATE の対象にならない
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._post(self.staff, {'action': 'update', 'ids': [cat.pk], 'changes': {
+                'personality': 'おっとり', 'status': 'open', 'health_notes': '',
+            }})
+        self.assertEqual(data['succeeded'], 1)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "cats_cat"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"personality"', updates[0])
+        self.assertNotIn('"status"', updates[0])
+        self.assertNotIn('"health_notes"', updates[0])
+
+        self._post(self.admin, {'action': 'update', 'ids': [cat.pk], 'changes': {'status': 'paused'}})
+        self.assertEqual(Cat.objects.get(pk=cat.pk).status, 'paused')
+
+    def test_public_catalog_follows_is_public(self):
+        from .models import PublicCat
+
+        ids = [cat.pk for cat in self.cats[:2]]
+        self._post(self.admin, {'action': 'update', 'ids': ids, 'changes': {'is_public': True}})
+        self.assertEqual(set(PublicCat.objects.filter(cat__shelter=self.shelter).values_list('cat_id', flat=True)), set(ids))
+
+        self._post(self.admin, {'action': 'update', 'ids': ids[:1], 'changes': {'is_public': False}})
+        self.assertEqual(list(PublicCat.objects.filter(cat__shelter=self.shelter).values_list('cat_id', flat=True)), ids[1:])
+
+    def test_derived_fields_cache_versions_and_audit(self):
+        from accounts.models import AuditLog
+        from config.cache import cat_version_key, get_versions
+
+        cat = self.cats[0]
+        before = get_versions(cat_version_key(cat.pk))
+        self._post(self.admin, {'action': 'update', 'items': [{'id': cat.pk, 'name': 'みけ', 'breed': 'スコティッシュ'}]})
+        cat.refresh_from_db()
+        self.assertIn('スコティッシュ', cat.search_document)
+        self.assertIsNotNone(cat.match_vector)
+        self.assertNotEqual(get_versions(cat_version_key(cat.pk)), before)
+        entry = AuditLog.objects.get(model_name='cats.Cat', object_id=cat.pk, action='update')
+        self.assertEqual(set(entry.changes), {'name', 'breed'})
+
+    def test_create(self):
+        from accounts.models import AuditLog
+        from .models import PublicCat
+
+        data = self._post(self.admin, {'action': 'create', 'items': [
+            {'name': 'しろ', 'gender': 'female', 'is_public': True},
+            {'name': 'くろ', 'gender': 'tora'},
+        ]})
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'error'])
+        cat = Cat.objects.get(pk=data['results'][0]['id'])
+        self.assertEqual((cat.shelter, cat.gender), (self.shelter, 'female'))
+        self.assertTrue(PublicCat.objects.filter(cat=cat).exists())
+        self.assertTrue(AuditLog.objects.filter(model_name='cats.Cat', object_id=cat.pk, action='create').exists())
+
+
+class ReadCacheTestMixin:
+    """キャッシュ・ETag のテスト共通（バージョンは共有キャッシュに保存される）"""
+
+    def setUp(self):
+        from config.cache import local_cache
+
+        for alias in ('default', 'shared'):
+            caches[alias].clear()
+        local_cache.clear()
+        self.shelter = create_shelter()
+        self.cat = Cat.objects.create(shelter=self.shelter, name='たま', is_public=True)
+        self.client = APIClient()
+
+    def update(self, instance, **changes):
+        # バージョンの更新はトランザクション確定後に行われる
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in changes.items():
+                setattr(instance, name, value)
+            instance.save()
+
+
+@override_settings(API_CACHE={**settings.API_CACHE, 'ENABLED': True})
+class ResponseCacheTests(ReadCacheTestMixin, TestCase):
+    """未ログインの一覧・詳細のキャッシュと、更新時のバージョン方式の無効化（config.cache）"""
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_cat_write_invalidates_list_and_detail(self):
+        detail = f'/api/cats/{self.cat.pk}/'
+        self.assertEqual(self.get('/api/cats/')['X-Cache'], 'MISS')
+        self.assertEqual(self.get(detail)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('/api/cats/')['X-Cache'], 'HIT')
+            self.assertEqual(self.get(detail)['X-Cache'], 'HIT')
+
+        self.update(self.cat, name='みけ')
+        response = self.get('/api/cats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['name'], 'みけ')
+        response = self.get(detail)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'みけ')
+
+    def test_shelter_write_invalidates_cat_and_shelter_reads(self):
+        paths = ['/api/cats/', f'/api/cats/{self.cat.pk}/', '/api/shelters/public/', f'/api/shelters/public/{self.shelter.pk}/']
+        for path in paths:
+            self.get(path)
+            self.assertEqual(self.get(path)['X-Cache'], 'HIT', path)
+
+        self.update(self.shelter, name='新しい団体名')
+        for path in paths:
+            self.assertEqual(self.get(path)['X-Cache'], 'MISS', path)
+        self.assertEqual(self.get(f'/api/shelters/public/{self.shelter.pk}/').data['name'], '新しい団体名')
+
+        # 非公開にした団体の猫は一覧・詳細から消える
+        self.update(self.shelter, public_profile_enabled=False)
+        self.assertEqual(self.get('/api/cats/').data['results'], [])
+        self.assertEqual(self.client.get(f'/api/cats/{self.cat.pk}/').status_code, 404)
+
+    def test_other_shelter_write_keeps_shelter_filtered_list(self):
+        path = f'/api/cats/?shelter_id={self.shelter.pk}'
+        self.get(path)
+        other = create_shelter('他の団体')
+        self.update(Cat(shelter=other, name='よそのねこ', is_public=True))
+        self.assertEqual(self.get(path)['X-Cache'], 'HIT')
+        self.assertEqual(self.get('/api/cats/')['X-Cache'], 'MISS')
+
+    def test_authenticated_reads_are_not_cached(self):
+        adopter = User.objects.create_user('adopter', 'adopter@example.com', 'pw')
+        Favorite.objects.create(user=adopter, cat=self.cat)
+        self.get('/api/cats/')
+        self.get('/api/cats/')
+
+        self.client.force_authenticate(adopter)
+        response = self.get('/api/cats/')
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+
+        self.client.force_authenticate(None)
+        response = self.get('/api/cats/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertFalse(response.data['results'][0]['is_favorited'])
+
+
+class ConditionalRequestTests(ReadCacheTestMixin, TestCase):
+    """ETag / If-None-Match（config.conditional）"""
+
+    def etag(self, path, user=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def revalidate(self, path, etag, user=None):
+        self.client.force_authenticate(user)
+        return self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        for path in ('/api/cats/', f'/api/cats/{self.cat.pk}/', f'/api/shelters/public/{self.shelter.pk}/'):
+            etag = self.etag(path)
+            response = self.revalidate(path, etag)
+            self.assertEqual(response.status_code, 304, path)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+
+    def test_write_changes_etag(self):
+        paths = ['/api/cats/', f'/api/cats/{self.cat.pk}/']
+        etags = [self.etag(path) for path in paths]
+        self.update(self.cat, name='みけ')
+        for path, etag in zip(paths, etags):
+            response = self.revalidate(path, etag)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertNotEqual(response['ETag'], etag)
+
+        path = f'/api/shelters/public/{self.shelter.pk}/'
+        etags = [self.etag(path) for path in (*paths, path)]
+        self.update(self.shelter, name='新しい団体名')
+        for path, etag in zip((*paths, path), etags):
+            self.assertEqual(self.revalidate(path, etag).status_code, 200, path)
+
+    def test_per_user_responses_are_not_shared(self):
+        path = f'/api/cats/{self.cat.pk}/'
+        fan = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        Favorite.objects.create(user=fan, cat=self.cat)
+
+        fan_etag = self.etag(path, fan)
+        self.assertNotIn(fan_etag, {self.etag(path), self.etag(path, other)})
+        response = self.revalidate(path, fan_etag, other)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['is_favorited'])
+        response = self.revalidate(path, fan_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+        self.assertIn('private', self.revalidate(path, fan_etag, fan)['Cache-Control'])
+
+        # お気に入りの変更で本人の ETag も変わる
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.filter(user=fan).delete()
+        self.assertEqual(self.revalidate(path, fan_etag, fan).status_code, 200)
+
+    def test_member_etag_not_valid_for_non_member(self):
+        self.update(self.cat, is_public=False)
+        path = f'/api/cats/{self.cat.pk}/'
+        staff = User.objects.create_user('staff', 'staff@example.com', 'pw', user_type='shelter')
+        ShelterUser.objects.create(shelter=self.shelter, user=staff, role='admin')
+        outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pw', user_type='shelter')
+
+        member_etag = self.etag(path, staff)
+        self.assertEqual(self.revalidate(path, member_etag, staff).status_code, 304)
+        self.assertEqual(self.revalidate(path, member_etag, outsider).status_code, 404)
+        self.assertEqual(self.revalidate(path, member_etag).status_code, 404)
@@ -1,10 +1,14 @@
 from django.urls import path
 from .views import (
     CatListCreateView,
+    CatFacetsView,
     CatDetailView,
+    CatBulkView,
+    CatImportView,
     CatImageUploadView,
     CatVideoUploadView,
-    MyCatsView
+    MyCatsView,
+    RecommendedCatsView,
 )
 from .upload import get_upload_url
 
@@ -12,6 +16,15 @@ urlpatterns = [
     # 公開・検索・登録用
     path('', CatListCreateView.as_view(), name='cat-list-create'),
 
+    # 絞り込み条件ごとの件数（検索画面用）
+    path('facets/', CatFacetsView.as_view(), name='cat-facets'),
+
+    # 一括作成・更新（団体メンバー用）
+    path('bulk/', CatBulkView.as_view(), name='cat-bulk'),
+
+    # CSV / JSONL からの一括取り込み（団体メンバー用）
+    path('import/', CatImportView.as_view(), name='cat-import'),
+
     # 詳細・更新・削除用
     path('<int:pk>/', CatDetailView.as_view(), name='cat-detail'),
 
@@ -24,6 +37,9 @@ urlpatterns = [
     # 動画アップロード
     path('<int:cat_id>/videos/', CatVideoUploadView.as_view(), name='cat-video-upload'),
 
+    # おすすめ猫一覧（相性スコア順）
+    path('recommended/', RecommendedCatsView.as_view(), name='cat-recommended'),
+
     # 自団体の猫一覧
     path('my_cats/', MyCatsView.as_view(), name='my-cats'),
 ]
@@ -2,16 +2,28 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
-from .models import Cat, CatImage, CatVideo
-from shelters.models import ShelterUser
+from .models import Cat, CatImage, CatVideo, PublicCat
+from .bulk import bulk_create_cats, bulk_update_cats
+from .search import search_cats
+from .facets import apply_facet_filters, count_facets, facet_signature, parse_facet_filters
+from config.pagination import CatKeysetPagination
+from config.cache import (
+    CachedResponseMixin, CATALOG_VERSION_KEY, cached_data, cat_version_key, shelter_version_key,
+)
+from config.conditional import ConditionalResponseMixin
+from config.fields import SparseFieldsMixin
+from shelters.membership import get_membership
 from .serializers import (
     CatListSerializer,
+    PublicCatListSerializer,
     CatDetailSerializer,
     CatCreateUpdateSerializer,
     CatImageSerializer,
-    CatVideoSerializer
+    CatVideoSerializer,
+    RecommendedCatSerializer,
+    CatBulkSerializer,
 )
+from .matching import recommend_cats
 
 
 class IsShelterMemberOrReadOnly(permissions.BasePermission):
@@ -27,105 +39,59 @@ class IsShelterMemberOrReadOnly(permissions.BasePermission):
             return True
         
         # オブジェクトのShelterに所属しているかチェック
-        return ShelterUser.objects.filter(
-            user=request.user,
-            shelter=obj.shelter,
-            is_active=True
-        ).exists()
+        return get_membership(request).is_member(obj.shelter_id)
 
 
-class CatListCreateView(generics.ListCreateAPIView):
+class CatListCreateView(SparseFieldsMixin, ConditionalResponseMixin, CachedResponseMixin, generics.ListCreateAPIView):
     """保護猫一覧・作成API"""
     
     # create(POST) は IsAuthenticated が必要だが、List(GET) は AllowAny でも良い場合がある
     # ここでは厳密に制御せず、セッション認証前提なら IsAuthenticatedOrReadOnly 的な動きになるよう調整
     # ただし今回は IsShelterMemberOrReadOnly を使っているので、GETは誰でもOK、POSTはShelterのみとなる
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CatKeysetPagination
+    cache_prefix = 'cats'
+    # is_favorited がユーザーごとに変わるため ETag にユーザーのお気に入りのバージョンを含める
+    conditional_per_user = True
+
+    def get_cache_version_keys(self, action):
+        # 団体指定の一覧はその団体のバージョンのみで無効化（他団体の更新の影響を受けない）
+        shelter_id = self.request.query_params.get('shelter_id')
+        if shelter_id:
+            return [shelter_version_key(shelter_id)]
+        return [CATALOG_VERSION_KEY]
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CatCreateUpdateSerializer
-        return CatListSerializer
+        return PublicCatListSerializer
     
     def get_queryset(self):
-        # select_related を使用してN+1問題を回避し、フィルター精度を向上
-        queryset = Cat.objects.select_related('shelter').all()
-
         # 一般公開用一覧は、"常に" 公開設定がONのもののみ表示する
         # かつ、所属する団体が公開プロフィールを有効にしており、審査が承認済みであること
-        queryset = queryset.filter(
-            is_public=True,
-            shelter__public_profile_enabled=True,
-            shelter__verification_status='approved'
-        )
+        # → 条件を満たす猫だけを団体名・メイン画像付きで保持する公開カタログ（cats.catalog）から読み込む
+        # ?fields= で is_favorited を返さない場合はお気に入りのサブクエリを省く
+        queryset = PublicCat.objects.all()
+        if self.field_selection.includes('is_favorited'):
+            queryset = queryset.with_favorites(self.request.user)
         
         # 検索フィルター (キーワード検索)
-        # 性格詳細、団体名、都道府県、市区町村も検索対象に含める
+        # 性格詳細、団体名、都道府県、市区町村も検索対象に含める（cats.search の全文検索インデックスを使用）
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(breed__icontains=search) |
-                Q(color__icontains=search) |
-                Q(personality__icontains=search) |
-                Q(description__icontains=search) |
-                Q(other_terms__icontains=search) |
-                Q(shelter__name__icontains=search) |
-                Q(shelter__prefecture__icontains=search) |
-                Q(shelter__city__icontains=search)
-            )
+            queryset = search_cats(queryset, search)
 
-        # フィルター: 性別
-        gender = self.request.query_params.get('gender', None)
-        if gender:
-             queryset = queryset.filter(gender=gender)
-
-        # フィルター: 年齢区分 (age_category)
-        age_category = self.request.query_params.get('age_category', None)
-        if age_category:
-            queryset = queryset.filter(age_category=age_category)
-
-        # フィルター: 都道府県 (shelter__prefecture) - 複数選択対応
-        prefectures = self.request.query_params.getlist('prefecture')
-        if prefectures:
-            # カンマ区切り（frontendから single string で送られた場合）も考慮
-            actual_prefectures = []
-            for p in prefectures:
-                if p:
-                    actual_prefectures.extend(p.split(','))
-            
-            # 重複除去と空文字除去
-            actual_prefectures = list(set([p for p in actual_prefectures if p]))
-            
-            if actual_prefectures:
-                queryset = queryset.filter(shelter__prefecture__in=actual_prefectures)
-
-        # フィルター: 性格区分 (activity_level)
-        activity_level = self.request.query_params.get('activity_level', None)
-        if activity_level:
-            queryset = queryset.filter(activity_level=activity_level)
-
-        # フィルター: 甘えん坊度 (affection_level)
-        affection_level = self.request.query_params.get('affection_level', None)
-        if affection_level:
-            queryset = queryset.filter(affection_level=affection_level)
-
-        # フィルター: お手入れ (maintenance_level)
-        maintenance_level = self.request.query_params.get('maintenance_level', None)
-        if maintenance_level:
-            queryset = queryset.filter(maintenance_level=maintenance_level)
+        # フィルター: 性別・年齢区分・都道府県（複数選択可）・性格・ステータスなど（cats.facets と共通）
+        queryset = apply_facet_filters(queryset, parse_facet_filters(self.request.query_params))
 
         # フィルター: 団体ID
         shelter_id = self.request.query_params.get('shelter_id', None)
         if shelter_id:
             queryset = queryset.filter(shelter_id=shelter_id)
 
-        # ステータスフィルター
-        cat_status = self.request.query_params.get('status', None)
-        
-        if cat_status:
-            queryset = queryset.filter(status=cat_status)
-        
+        # キーワード検索時は関連度順
+        if search:
+            return queryset.order_by('-search_rank', '-created_at')
         return queryset.order_by('-created_at')
     
     def perform_create(self, serializer):
@@ -135,24 +101,59 @@ class CatListCreateView(generics.ListCreateAPIView):
             raise PermissionDenied("保護団体アカウントでログインしてください。")
         
         # 所属する有効な保護団体を取得
-        shelter_user = ShelterUser.objects.filter(
-            user=user, 
-            is_active=True
-        ).first()
+        shelter = get_membership(self.request).primary_shelter
 
-        if not shelter_user:
+        if not shelter:
             raise ValidationError("有効な保護団体に所属していないため、猫を登録できません。")
             
-        serializer.save(shelter=shelter_user.shelter)
+        serializer.save(shelter=shelter)
+
 
+class CatFacetsView(generics.GenericAPIView):
+    """保護猫一覧の絞り込み条件ごとの件数API
 
-class CatDetailView(generics.RetrieveUpdateDestroyAPIView):
+    一覧API（CatListCreateView）と同じクエリパラメータを受け取り、
+    各条件の選択肢ごとの件数を返す。ユーザーに依存しないため、ログイン状態に関わらず
+    正規化した絞り込み条件ごとにキャッシュする。
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        filters = parse_facet_filters(params)
+        search = params.get('search', None)
+        shelter_id = params.get('shelter_id', None)
+
+        def compute():
+            queryset = PublicCat.objects.all()
+            if search:
+                queryset = search_cats(queryset, search)
+            if shelter_id:
+                queryset = queryset.filter(shelter_id=shelter_id)
+            return count_facets(queryset, filters)
+
+        version_keys = [shelter_version_key(shelter_id)] if shelter_id else [CATALOG_VERSION_KEY]
+        data = cached_data('cats:facets', version_keys, facet_signature(search, shelter_id, filters), compute)
+        return Response(data)
+
+
+class CatDetailView(SparseFieldsMixin, ConditionalResponseMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """保護猫詳細・更新・削除API"""
     
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_prefix = 'cat'
+    conditional_per_user = True
+
+    def get_cache_version_keys(self, action):
+        return [cat_version_key(self.kwargs['pk'])]
     
     def get_queryset(self):
-        queryset = Cat.objects.select_related('shelter').all()
+        queryset = Cat.objects.all()
+        # 団体情報を返さない場合（?fields= / ?expand=）は団体を JOIN で読み込まない
+        # 画像・動画・お気に入り状態は項目が無ければシリアライズ時のクエリ自体が発生しない
+        selection = self.field_selection
+        if selection.includes('shelter', nested=True) or selection.includes('shelter_name'):
+            queryset = queryset.select_related('shelter')
         
         # PUT/PATCH/DELETE の場合は全猫を対象（権限チェックは perform_update/destroy で行う）
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
@@ -164,9 +165,7 @@ class CatDetailView(generics.RetrieveUpdateDestroyAPIView):
         if user.is_authenticated and (user.is_superuser or user.user_type in ['shelter', 'admin']):
             # シェルターユーザー/管理者: 公開猫 + 自分の団体の非公開猫
             from django.db.models import Q
-            shelter_ids = ShelterUser.objects.filter(
-                user=user, is_active=True
-            ).values_list('shelter_id', flat=True)
+            shelter_ids = get_membership(self.request).shelter_ids
             queryset = queryset.filter(
                 Q(is_public=True) | Q(shelter_id__in=shelter_ids)
             )
@@ -194,13 +193,7 @@ class CatDetailView(generics.RetrieveUpdateDestroyAPIView):
         if not user.is_authenticated or user.user_type != 'shelter':
              raise PermissionDenied("編集権限がありません。")
 
-        is_member = ShelterUser.objects.filter(
-            user=user,
-            shelter=cat.shelter,
-            is_active=True
-        ).exists()
-        
-        if not is_member:
+        if not get_membership(self.request).is_member(cat.shelter_id):
             raise PermissionDenied("この猫を編集する権限がありません（所属団体が異なります）。")
             
         serializer.save()
@@ -211,24 +204,88 @@ class CatDetailView(generics.RetrieveUpdateDestroyAPIView):
         if not user.is_authenticated or user.user_type != 'shelter':
              raise PermissionDenied("削除権限がありません。")
 
-        is_member = ShelterUser.objects.filter(
-            user=user,
-            shelter=instance.shelter,
-            is_active=True
-        ).exists()
-        
-        if not is_member:
+        membership = get_membership(self.request)
+        if not membership.is_member(instance.shelter_id):
             raise PermissionDenied("この猫を削除する権限がありません。")
             
         # スタッフ権限の制限
         if not user.is_superuser:
-            shelter_user = ShelterUser.objects.filter(user=user, shelter=instance.shelter, is_active=True).first()
-            if shelter_user and shelter_user.role == 'staff':
+            if membership.is_staff_only(instance.shelter_id):
                 raise PermissionDenied("スタッフ権限では猫のデータを削除できません。管理者に依頼してください。")
             
         instance.delete()
 
 
+class CatBulkView(generics.GenericAPIView):
+    """保護猫の一括作成・更新API
+
+    所属団体の猫をまとめて登録・変更する（cats.bulk）。
+    項目ごとの結果を返し、失敗した項目があっても他の項目は反映する。
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CatBulkSerializer
+
+    def post(self, request, *args, **kwargs):
+        if request.user.user_type != 'shelter':
+            raise PermissionDenied("保護団体アカウントでログインしてください。")
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        items = serializer.validated_data['items']
+
+        if action == 'create':
+            if not get_membership(request).primary_shelter_id:
+                raise ValidationError("有効な保護団体に所属していないため、猫を登録できません。")
+            results = bulk_create_cats(request, items)
+        else:
+            results = bulk_update_cats(request, items)
+
+        failed = sum(1 for result in results if result['status'] == 'error')
+        return Response({
+            'action': action,
+            'succeeded': len(results) - failed,
+            'failed': failed,
+            'results': results,
+        })
+
+
+class CatImportView(generics.GenericAPIView):
+    """保護猫の一括取り込みAPI（CSV / JSONL、cats.importer）
+
+    multipart/form-data の file に CSV（Excel の「CSV UTF-8」など）または JSONL を指定する。
+    任意: format（csv / jsonl。省略時はファイル名から判定）、encoding（既定 utf-8-sig。Shift_JIS の CSV は cp932）、
+    dry_run（true で検証のみ）。行ごとのエラーを返し、正しい行は登録する。
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        from .importer import FORMATS, TRUE_VALUES, detect_format, import_cats, is_text_encoding
+
+        if request.user.user_type != 'shelter':
+            raise PermissionDenied("保護団体アカウントでログインしてください。")
+        shelter = get_membership(request).primary_shelter
+        if not shelter:
+            raise ValidationError("有効な保護団体に所属していないため、猫を登録できません。")
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'CSV または JSONL ファイルを指定してください。'})
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in FORMATS:
+            raise ValidationError({'format': f'形式は {" / ".join(FORMATS)} のいずれかを指定してください。'})
+        encoding = request.data.get('encoding') or 'utf-8-sig'
+        if not is_text_encoding(encoding):
+            raise ValidationError({'encoding': f'文字コード「{encoding}」は使用できません。'})
+        dry_run = str(request.data.get('dry_run', '')).strip().lower() in TRUE_VALUES
+
+        result = import_cats(upload.file, shelter, fmt=fmt, encoding=encoding, request=request, dry_run=dry_run)
+        return Response(result.as_dict())
+
+
 class CatImageUploadView(generics.CreateAPIView):
     """保護猫画像アップロードAPI"""
     
@@ -250,13 +307,7 @@ class CatImageUploadView(generics.CreateAPIView):
             )
         
         # 権限チェック
-        is_member = False
-        if user.user_type == 'shelter':
-            is_member = ShelterUser.objects.filter(
-                user=user,
-                shelter=cat.shelter,
-                is_active=True
-            ).exists()
+        is_member = user.user_type == 'shelter' and get_membership(request).is_member(cat.shelter_id)
         
         if not is_member:
             raise PermissionDenied('この猫の画像をアップロードする権限がありません')
@@ -299,13 +350,7 @@ class CatVideoUploadView(generics.CreateAPIView):
             )
         
         # 権限チェック
-        is_member = False
-        if user.user_type == 'shelter':
-            is_member = ShelterUser.objects.filter(
-                user=user,
-                shelter=cat.shelter,
-                is_active=True
-            ).exists()
+        is_member = user.user_type == 'shelter' and get_membership(request).is_member(cat.shelter_id)
         
         if not is_member:
             raise PermissionDenied('この猫の動画をアップロードする権限がありません')
@@ -317,26 +362,77 @@ class CatVideoUploadView(generics.CreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class MyCatsView(generics.ListAPIView):
+class MyCatsView(SparseFieldsMixin, generics.ListAPIView):
     """自分の所属する保護団体の猫一覧API"""
     
     serializer_class = CatListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
         
+        queryset = Cat.objects.with_list_data(
+            user,
+            shelter=self.field_selection.includes('shelter_name'),
+            favorites=self.field_selection.includes('is_favorited'),
+        )
+
         # スーパーユーザーは全件表示（デバッグ・管理者用）
         if user.is_superuser:
-            return Cat.objects.all().order_by('-created_at')
+            return queryset.order_by('-created_at')
 
         if user.user_type != 'shelter':
              return Cat.objects.none()
              
         # ユーザーが所属する有効な団体IDリスト
-        shelter_ids = ShelterUser.objects.filter(
-            user=user,
-            is_active=True
-        ).values_list('shelter', flat=True)
+        shelter_ids = get_membership(self.request).shelter_ids
         
-        return Cat.objects.filter(shelter__in=shelter_ids).order_by('-created_at')
+        return queryset.filter(shelter__in=shelter_ids).order_by('-created_at')
+
+
+class RecommendedCatsView(SparseFieldsMixin, generics.ListAPIView):
+    """おすすめ猫一覧API（ログインユーザーのプロフィールとの相性スコア順）"""
+
+    serializer_class = RecommendedCatSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_queryset(self):
+        from accounts.models import ApplicantProfile
+
+        user = self.request.user
+        profile = ApplicantProfile.objects.filter(user=user).first()
+
+        # 一般公開中かつ募集中の猫のみが候補
+        candidates = Cat.objects.filter(
+            status='open',
+            is_public=True,
+            shelter__public_profile_enabled=True,
+            shelter__verification_status='approved'
+        )
+        ranked = recommend_cats(profile, candidates, limit=self.get_limit())
+        scores = dict(ranked)
+
+        cats = Cat.objects.with_list_data(
+            user,
+            shelter=self.field_selection.includes('shelter_name'),
+            favorites=self.field_selection.includes('is_favorited'),
+        ).in_bulk(scores.keys())
+        results = []
+        for cat_id, score in ranked:
+            cat = cats.get(cat_id)
+            if cat is not None:
+                cat.match_score = score
+                results.append(cat)
+        return results
@@ -0,0 +1,261 @@
+"""
+公開API用のレスポンスキャッシュ
+
+2段構成:
+- プロセス内 LRU（短いTTL）: 共有キャッシュへの往復とデシリアライズを省く
+- 共有キャッシュ（settings.API_CACHE['ALIAS']: Redis またはファイルベース）: gunicorn ワーカー間で共有
+  ファイルベースは同じホスト内でのみ共有されるため、既定では REDIS_URL がある場合のみ有効にする
+
+無効化はバージョン方式。キャッシュキーに「カタログ全体 / 団体ごと / 猫ごと」のバージョンを含め、
+Cat・CatImage・CatVideo・Shelter の保存時にバージョンを更新することで、
+古いエントリーは参照されなくなる（明示的な削除は不要）。
+バージョンは更新時刻を含むトークンで、ETag / Last-Modified（config.conditional）にも使う。
+"""
+import datetime
+import hashlib
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = 'ver:catalog'
+SHELTER_LIST_VERSION_KEY = 'ver:shelters'
+
+
+def shelter_version_key(shelter_id):
+    return f'ver:shelter:{shelter_id}'
+
+
+def cat_version_key(cat_id):
+    return f'ver:cat:{cat_id}'
+
+
+def favorites_version_key(user_id):
+    return f'ver:favorites:{user_id}'
+
+
+def _config(name, default):
+    return getattr(settings, 'API_CACHE', {}).get(name, default)
+
+
+class LRUCache:
+    """スレッドセーフな TTL 付き LRU キャッシュ（プロセス内）"""
+
+    def __init__(self, max_entries=512, timeout=30):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LRUCache(
+    max_entries=_config('LRU_MAX_ENTRIES', 512),
+    timeout=_config('LRU_TIMEOUT', 30),
+)
+
+
+def shared_cache():
+    return caches[_config('ALIAS', 'default')]
+
+
+# --- バージョン管理 ---
+
+def new_version():
+    """更新時刻（ナノ秒, 16進）と乱数からなるバージョントークン"""
+    return f'{time.time_ns():x}.{uuid.uuid4().hex}'
+
+
+def version_timestamp(version):
+    """バージョンの更新時刻（UTC の datetime）。時刻を含まない旧形式のトークンは None"""
+    stamp, sep, _ = version.partition('.')
+    if not sep:
+        return None
+    try:
+        return datetime.datetime.fromtimestamp(int(stamp, 16) / 1e9, tz=datetime.timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def get_versions(*keys):
+    """バージョンを一括取得する。未設定（または退避済み）のキーは新しいトークンで初期化する"""
+    cache = shared_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # 退避後に古い値へ戻ると過去のエントリーが復活するため、必ず新しいトークンを使う
+        cache.add(key, new_version(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, '') for key in keys]
+
+
+def bump_versions(*keys):
+    """バージョンを更新する（トランザクション確定後に実行）"""
+    keys = [key for key in keys if key]
+    if not keys:
+        return
+
+    def _bump():
+        shared_cache().set_many({key: new_version() for key in keys}, timeout=None)
+
+    transaction.on_commit(_bump)
+
+
+def bump_cat_versions(cat_id, shelter_id):
+    """猫（および画像・動画）の変更時: 一覧・団体・猫のバージョンを更新"""
+    bump_versions(CATALOG_VERSION_KEY, shelter_version_key(shelter_id), cat_version_key(cat_id))
+
+
+def bump_many_cat_versions(cats):
+    """複数の猫の変更時（一括更新）: (猫ID, 団体ID) の一覧から一覧・団体・猫のバージョンをまとめて更新"""
+    cats = list(cats)
+    if not cats:
+        return
+    bump_versions(
+        CATALOG_VERSION_KEY,
+        *{shelter_version_key(shelter_id) for _, shelter_id in cats},
+        *[cat_version_key(cat_id) for cat_id, _ in cats],
+    )
+
+
+def bump_favorites_version(user_id):
+    """お気に入りの変更時: そのユーザー向けのレスポンス（is_favorited）の ETag を変える"""
+    bump_versions(favorites_version_key(user_id))
+
+
+def bump_shelter_versions(shelter_id, cat_ids=()):
+    """団体の変更時: 一覧・団体一覧・団体・所属猫のバージョンを更新"""
+    bump_versions(
+        CATALOG_VERSION_KEY, SHELTER_LIST_VERSION_KEY, shelter_version_key(shelter_id),
+        *[cat_version_key(cat_id) for cat_id in cat_ids]
+    )
+
+
+# --- キャッシュキー ---
+
+def normalize_query_params(query_params, ignore=()):
+    """クエリパラメータを正規化する（順序・カンマ区切り・空値の揺れを吸収）"""
+    items = []
+    for key in sorted(query_params.keys()):
+        if key in ignore:
+            continue
+        values = []
+        for value in query_params.getlist(key):
+            values.extend(part.strip() for part in value.split(','))
+        values = sorted({value for value in values if value})
+        if values:
+            items.append(f'{key}={",".join(values)}')
+    return '&'.join(items)
+
+
+def build_cache_key(prefix, versions, request):
+    params = normalize_query_params(request.query_params)
+    raw = '|'.join([request.get_host(), params, *versions])
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'api:{prefix}:{digest}'
+
+
+def cache_get(key):
+    """プロセス内 LRU → 共有キャッシュの順に参照する"""
+    data = local_cache.get(key)
+    if data is None:
+        data = shared_cache().get(key)
+        if data is not None:
+            local_cache.set(key, data)
+    return data
+
+
+def cache_set(key, data):
+    shared_cache().set(key, data, timeout=_config('TIMEOUT', 300))
+    local_cache.set(key, data)
+
+
+def cached_data(prefix, version_keys, signature, compute):
+    """レスポンス以外の計算結果（集計など）をバージョン付きでキャッシュする
+
+    signature には正規化済みの条件文字列を渡す。ユーザーに依存しない値のみに使うこと。
+    """
+    if not _config('ENABLED', True):
+        return compute()
+
+    versions = get_versions(*version_keys)
+    digest = hashlib.sha1('|'.join([signature, *versions]).encode('utf-8')).hexdigest()
+    key = f'api:{prefix}:{digest}'
+    data = cache_get(key)
+    if data is None:
+        data = compute()
+        cache_set(key, data)
+    return data
+
+
+class CachedResponseMixin:
+    """未ログインの GET レスポンス（list / retrieve）をキャッシュするビュー用 Mixin
+
+    各ビューは get_cache_version_keys(action) でキーに含めるバージョンを返す。
+    None を返した場合はキャッシュしない。
+    """
+
+    cache_prefix = None
+
+    def get_cache_version_keys(self, action):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response('list', super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response('retrieve', super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, action, handler, request, *args, **kwargs):
+        if not _config('ENABLED', True) or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        version_keys = self.get_cache_version_keys(action)
+        if version_keys is None:
+            return handler(request, *args, **kwargs)
+
+        versions = get_versions(*version_keys)
+        key = build_cache_key(f'{self.cache_prefix}:{action}', versions, request)
+
+        data = cache_get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            # ReturnDict/ReturnList が保持するシリアライザー参照を切り離してから保存する
+            data = pickle.loads(pickle.dumps(response.data, pickle.HIGHEST_PROTOCOL))
+            cache_set(key, data)
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,103 @@
+"""
+API レスポンスの圧縮（brotli / gzip）
+
+Accept-Encoding に応じて、settings.COMPRESSION['MIN_SIZE'] バイト以上の JSON などのレスポンスを圧縮する。
+
+- brotli（brotli パッケージがある場合）を優先し、無ければ gzip
+- ストリーミングレスポンス（text/event-stream・CSV エクスポートなど）は圧縮しない
+- Set-Cookie を含むレスポンス（ログイン・トークン更新）は BREACH 対策として圧縮しない
+- 圧縮した場合、ETag は弱い ETag（W/）に変える（If-None-Match は弱い比較のため 304 はそのまま返る）
+- 静的ファイルは WhiteNoise が事前圧縮済みのファイルを返すため対象外
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # brotli が無い環境では gzip のみ
+    brotli = None
+
+_ACCEPT_ENCODING_RE = _lazy_re_compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def _config(name, default):
+    return getattr(settings, 'COMPRESSION', {}).get(name, default)
+
+
+def accepted_encodings(header):
+    """Accept-Encoding を {エンコーディング: q 値} に変換する"""
+    encodings = {}
+    for part in header.split(','):
+        match = _ACCEPT_ENCODING_RE.match(part)
+        if not match or not match.group(1):
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            quality = 0.0
+        encodings[match.group(1).lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """利用できるエンコーディングのうち、クライアントの q 値が最も高いもの（同値なら br 優先）"""
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = encodings.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=_config('BROTLI_QUALITY', 4))
+    # mtime=0: 同じ内容なら同じバイト列にする
+    return gzip.compress(content, compresslevel=_config('GZIP_LEVEL', 6), mtime=0)
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type in _config('CONTENT_TYPES', ('application/json',)) or media_type.endswith('+json')
+
+
+class CompressionMiddleware:
+    """JSON レスポンスを Accept-Encoding に応じて brotli / gzip で圧縮するミドルウェア"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not _config('ENABLED', True):
+            return response
+        if response.streaming or response.has_header('Content-Encoding') or response.cookies:
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        if len(response.content) < _config('MIN_SIZE', 1024):
+            return response
+
+        # 圧縮の有無がクライアントによって変わるため、共有キャッシュ向けに Vary を付ける
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,124 @@
+"""
+条件付きリクエスト（ETag / Last-Modified → 304 Not Modified）
+
+レスポンス本体をシリアライズせずに、キャッシュ無効化用のバージョン（config.cache）と updated_at から検証子を作る。
+
+- ETag（強い ETag）: ビュー・アクション・ホスト・クエリパラメータ・表現形式（renderer）・バージョン・
+  閲覧者ごとの値のハッシュ
+- Last-Modified: バージョンの更新時刻と updated_at の最大値
+  （更新時刻を持たない値が含まれる場合は付けず、ETag のみで判定する）
+- If-None-Match / If-Modified-Since の判定は Django（django.utils.cache.get_conditional_response）に従う
+- 閲覧者によって内容が変わるレスポンス（is_favorited・団体メンバー向けの非公開猫・応募）には
+  Vary: Authorization, Cookie を付け、ログイン中は Cache-Control: private にする
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .cache import favorites_version_key, get_versions, normalize_query_params, version_timestamp
+
+VARY_USER_HEADERS = ('Authorization', 'Cookie')
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def request_signature(request):
+    """同じ URL でも表現が変わる要素（ホスト・クエリパラメータ・表現形式）"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return (
+        request.get_host(),
+        normalize_query_params(request.query_params),
+        getattr(renderer, 'format', ''),
+    )
+
+
+def latest_modified(versions=(), timestamps=()):
+    """バージョンの更新時刻と timestamps の最大値（1つでも不明なら None）"""
+    values = [version_timestamp(version) for version in versions] + list(timestamps)
+    if not values or any(value is None for value in values):
+        return None
+    return max(values)
+
+
+def viewer_parts(request, per_user):
+    """閲覧者ごとに内容が変わる場合の (バージョンキー, ETag に含める値)"""
+    user = request.user
+    if not per_user or not user.is_authenticated:
+        return [], ['anonymous']
+
+    from shelters.membership import get_membership
+
+    # 団体メンバーは自団体の非公開の猫も閲覧できるため、所属団体も含める
+    shelter_ids = []
+    if user.is_superuser or user.user_type in ('shelter', 'admin'):
+        shelter_ids = sorted(get_membership(request).shelter_ids)
+    return [favorites_version_key(user.pk)], [f'user:{user.pk}', ','.join(map(str, shelter_ids))]
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """検証子が一致すれば 304（または 412）のレスポンスを返す"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, request, etag, last_modified=None, per_user=False):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if per_user:
+        patch_vary_headers(response, VARY_USER_HEADERS)
+    if per_user and request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional(request, etag, last_modified, handler, per_user=False):
+    """304 を返すか、handler() のレスポンス（200 の場合）に検証子を付けて返す"""
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        response = handler()
+        if response.status_code != 200:
+            return response
+    return set_validators(response, request, etag, last_modified, per_user)
+
+
+class ConditionalResponseMixin:
+    """GET（list / retrieve）に ETag・Last-Modified を付け、一致すれば 304 を返すビュー用 Mixin
+
+    バージョンキーは get_conditional_version_keys(action)（既定は CachedResponseMixin と同じ
+    get_cache_version_keys）で返す。None を返した場合は条件付きリクエストに対応しない。
+    conditional_per_user=True のビューは閲覧者ごとの値（お気に入り・所属団体）も ETag に含める。
+    """
+
+    conditional_per_user = False
+
+    def get_conditional_version_keys(self, action):
+        return self.get_cache_version_keys(action)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response('list', super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response('retrieve', super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, action, handler, request, *args, **kwargs):
+        version_keys = self.get_conditional_version_keys(action)
+        if version_keys is None:
+            return handler(request, *args, **kwargs)
+
+        user_keys, user_parts = viewer_parts(request, self.conditional_per_user)
+        versions = get_versions(*version_keys, *user_keys)
+        etag = make_etag(
+            type(self).__name__, action, sorted(kwargs.items()), *request_signature(request),
+            *versions, *user_parts,
+        )
+        return conditional(
+            request, etag, latest_modified(versions),
+            lambda: handler(request, *args, **kwargs), per_user=self.conditional_per_user,
+        )
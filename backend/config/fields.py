@@ -0,0 +1,108 @@
+"""
+レスポンスの項目選択（?fields=）とネストの展開指定（?expand=）
+
+    GET /api/cats/12/?fields=id,name,status
+    GET /api/cats/12/?expand=images                     # ネストは images のみ（videos・shelter は返さない）
+    GET /api/applications/?fields=id,status,cat_detail.name&expand=cat_detail
+
+- fields: 返す項目（カンマ区切り）。ネストした項目は cat_detail.name のようにドットで指定する。
+  親だけを指定した場合（cat_detail）はネストの項目をすべて返す。存在しない項目名は無視する
+- expand: 埋め込むネスト（シリアライザーの項目）。指定した場合、指定外のネストは返さない。
+  ネストの中のネストは cat_detail.shelter のように指定する。未指定（空を含む）は従来どおりすべて埋め込む
+- 対象は GET / HEAD のみ（作成・更新のバリデーションには影響しない）
+
+ビューは SparseFieldsMixin を使い、get_queryset() で field_selection.includes() を見て
+不要になった select_related / prefetch_related / annotate を省く。
+パラメータはクエリパラメータに含まれるため、レスポンスキャッシュ・ETag（config.cache / config.conditional）の
+キーにもそのまま反映される。
+"""
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(values):
+    """'a,b.c,b.d' → {'a': {}, 'b': {'c': {}, 'd': {}}}（値が無ければ None）"""
+    tree = None
+    for value in values:
+        for path in value.split(','):
+            parts = [part.strip() for part in path.split('.') if part.strip()]
+            if not parts:
+                continue
+            if tree is None:
+                tree = {}
+            node = tree
+            for part in parts:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSelection:
+    """?fields= / ?expand= の指定（未指定の場合は制限なし）"""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return cls()
+        params = request.query_params
+        return cls(parse_paths(params.getlist(FIELDS_PARAM)), parse_paths(params.getlist(EXPAND_PARAM)))
+
+    def __bool__(self):
+        return self.fields is not None or self.expand is not None
+
+    def includes(self, path, nested=False):
+        """項目 path（ドット区切り）を返すか
+
+        nested=True は path の末尾がネストしたシリアライザーであることを示す（途中の要素は常にネスト）。
+        """
+        parts = path.split('.')
+        fields, expand = self.fields, self.expand
+        for index, part in enumerate(parts):
+            if fields is not None:
+                if part not in fields:
+                    return False
+                # 親だけの指定（cat_detail）はネストの項目をすべて含む
+                fields = fields[part] or None
+            if expand is not None and (nested or index < len(parts) - 1):
+                if part not in expand:
+                    return False
+                expand = expand[part]
+        return True
+
+    def prune(self, serializer, prefix=''):
+        """シリアライザー（many=True の場合は child）から返さない項目を取り除く"""
+        if not self:
+            return serializer
+        target = serializer.child if isinstance(serializer, ListSerializer) else serializer
+        for name, field in list(target.fields.items()):
+            if getattr(field, 'write_only', False):
+                continue
+            path = f'{prefix}{name}'
+            nested = isinstance(field, BaseSerializer)
+            if not self.includes(path, nested):
+                del target.fields[name]
+            elif nested:
+                self.prune(field, f'{path}.')
+        return serializer
+
+
+class SparseFieldsMixin:
+    """GET の ?fields= / ?expand= でレスポンスの項目を絞り込むビュー用 Mixin
+
+    get_queryset() では self.field_selection.includes('images', nested=True) のように
+    レスポンスに含まれる項目を確認し、不要な関連の取得を省く。
+    """
+
+    @property
+    def field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = FieldSelection.from_request(self.request)
+        return self._field_selection
+
+    def get_serializer(self, *args, **kwargs):
+        return self.field_selection.prune(super().get_serializer(*args, **kwargs))
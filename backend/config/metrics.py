@@ -0,0 +1,303 @@
+"""
+リクエスト単位の計測（レイテンシ・SQL クエリ数・SQL 時間・レスポンスサイズ）と Prometheus 形式での出力
+
+    MIDDLEWARE = [..., 'config.metrics.MetricsMiddleware']
+    GET /metrics/   （管理者、または Authorization: Bearer <METRICS['TOKEN']>）
+
+- ルート（URL パターン）・メソッドごとにヒストグラムを集計する（パスのIDごとには分けない）
+- SQL はリクエスト中の DB 接続に execute_wrapper を挟んで件数と時間を数える
+- 集計はプロセス内で行い、settings.METRICS['DIR'] のディレクトリへ定期的にワーカーごとのファイルとして書き出す。
+  /metrics/ は全ワーカーのファイルを合算して返す（gunicorn の複数ワーカーでも1つの値になる）
+- settings.METRICS['SLOW_REQUEST_MS'] を超えたリクエストは、正規化した SQL（値を ? に置換）ごとの
+  件数・時間と合わせて警告ログに出力する
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# 出力するメトリクス: 名前 → (種別, 説明, ヒストグラムのバケット)
+METRICS = {
+    'http_requests_total': ('counter', 'Total HTTP requests.', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency in seconds.', DURATION_BUCKETS),
+    'http_request_db_queries': ('histogram', 'SQL queries executed per HTTP request.', QUERY_COUNT_BUCKETS),
+    'http_request_db_duration_seconds_total': ('counter', 'Total time spent in SQL queries.', None),
+    'http_response_size_bytes': ('histogram', 'HTTP response body size in bytes.', SIZE_BUCKETS),
+}
+
+
+def _config(name, default):
+    return getattr(settings, 'METRICS', {}).get(name, default)
+
+
+# --- SQL の正規化 ---
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL の値部分を ? に置き換え、同じ形のクエリをまとめられるようにする"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+# --- 集計 ---
+
+class MetricsStore:
+    """プロセス内の集計値
+
+    counters:   {(名前, ラベル): 値}
+    histograms: {(名前, ラベル): [バケットごとの件数..., 合計, 件数]}
+    ラベルは ((キー, 値), ...) のタプル。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self._last_flush = 0.0
+        self._pid = None
+        self._filename = None
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.counters[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            data = self.histograms.get((name, labels))
+            if data is None:
+                data = self.histograms[(name, labels)] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(data)] for (name, labels), data in self.histograms.items()],
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --- ワーカー間の共有 ---
+
+    def _path(self, directory):
+        # PID は再利用されるため、起動時刻も含めたファイル名にする
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._filename = f'{self._pid}-{time.time_ns()}.json'
+        return os.path.join(directory, self._filename)
+
+    def maybe_flush(self):
+        """一定間隔でこのプロセスの集計値をファイルへ書き出す"""
+        directory = _config('DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < _config('FLUSH_INTERVAL', 5):
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = self._path(directory)
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_path, path)
+        except OSError:
+            logger.exception('Failed to write metrics snapshot')
+
+    def collect(self):
+        """全ワーカーの集計値を合算する（このプロセスの分はメモリ上の最新値を使う）"""
+        snapshots = [self.snapshot()]
+        directory = _config('DIR', None)
+        if directory and os.path.isdir(directory):
+            own = os.path.basename(self._path(directory))
+            for filename in os.listdir(directory):
+                if not filename.endswith('.json') or filename == own:
+                    continue
+                try:
+                    with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                counters[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, data in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                if key not in histograms:
+                    histograms[key] = list(data)
+                else:
+                    histograms[key] = [a + b for a, b in zip(histograms[key], data)]
+        return counters, histograms
+
+
+store = MetricsStore()
+
+
+# --- Prometheus テキスト形式 ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    counters, histograms = store.collect()
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+            continue
+        for (metric, labels), data in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, data):
+                cumulative += count
+                bucket_labels = _format_labels(labels, [('le', _format_number(float(bound)))])
+                lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {data[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(data[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {data[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+# --- リクエストごとの計測 ---
+
+class QueryRecorder:
+    """DB 接続の execute_wrapper として SQL の件数・時間を記録する"""
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_sql = keep_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.keep_sql:
+                self.queries.append((sql, elapsed))
+
+    def top_fingerprints(self, limit=10):
+        """正規化した SQL ごとの (件数, 合計秒, SQL) を時間の長い順に返す"""
+        grouped = {}
+        for sql, elapsed in self.queries:
+            key = fingerprint(sql)
+            count, total = grouped.get(key, (0, 0.0))
+            grouped[key] = (count + 1, total + elapsed)
+        ranked = sorted(grouped.items(), key=lambda item: -item[1][1])
+        return [(count, total, sql) for sql, (count, total) in ranked[:limit]]
+
+
+def route_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.route or match.view_name or '<unknown>'
+
+
+class MetricsMiddleware:
+    """リクエストごとのレイテンシ・SQL・レスポンスサイズを集計するミドルウェア"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _config('ENABLED', True) or request.path.startswith(tuple(_config('EXCLUDE_PATHS', ()))):
+            return self.get_response(request)
+
+        slow_ms = _config('SLOW_REQUEST_MS', 0)
+        recorder = QueryRecorder(keep_sql=bool(slow_ms))
+        started = time.perf_counter()
+        with _wrap_connections(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = route_label(request)
+        labels = (('method', request.method), ('route', route))
+        store.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+        store.observe('http_request_duration_seconds', labels, elapsed)
+        store.observe('http_request_db_queries', labels, recorder.count)
+        store.inc('http_request_db_duration_seconds_total', labels, recorder.duration)
+        if not response.streaming:
+            store.observe('http_response_size_bytes', labels, len(response.content))
+        store.maybe_flush()
+
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            self.log_slow_request(request, route, response, elapsed, recorder)
+        return response
+
+    @staticmethod
+    def log_slow_request(request, route, response, elapsed, recorder):
+        lines = [
+            f'Slow request: {request.method} {route} status={response.status_code} '
+            f'duration={elapsed * 1000:.0f}ms queries={recorder.count} sql={recorder.duration * 1000:.0f}ms'
+        ]
+        for count, total, sql in recorder.top_fingerprints():
+            lines.append(f'  {count}x {total * 1000:.1f}ms {sql[:500]}')
+        logger.warning('\n'.join(lines))
+
+
+def _wrap_connections(wrapper):
+    """全 DB 接続に execute_wrapper を挟む"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+    return stack
@@ -0,0 +1,263 @@
+"""
+キーセット（カーソル）ページネーション
+
+OFFSET + COUNT(*) を使わず、並び順のキー（例: created_at, id）の位置を
+カーソルとして受け渡すことで、ページが深くなっても一定コストで取得する。
+
+- ?cursor=<カーソル> を指定した場合のみキーセット方式で返す（?cursor= の空指定で先頭ページ）
+- cursor を指定しない従来クライアントは legacy_pagination_class の方式（page 番号など）で動作する
+- 並び順はビューの queryset.order_by() に従い、一意性のため末尾に主キーを補う
+"""
+import base64
+import datetime
+import decimal
+import json
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """キーセットページネーション（page 番号指定の従来クライアント互換付き）"""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    max_page_size = 100
+
+    # queryset が並び順を持たない場合の既定値
+    default_ordering = ('-created_at',)
+
+    # 末尾まで到達しても next カーソルを返す（チャットの差分ポーリング用）
+    always_emit_next = False
+
+    # cursor 未指定時に使う従来方式（None の場合はページネーションなし）
+    legacy_pagination_class = PageNumberPagination
+
+    # cursor 未指定でもキーセット方式の先頭ページを返す（従来方式を持たない新しいエンドポイント用）
+    keyset_by_default = False
+
+    invalid_cursor_message = '不正なカーソルです。'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.legacy = None
+
+        if self.cursor_query_param not in request.query_params and not self.keyset_by_default:
+            if self.legacy_pagination_class is None:
+                return None
+            self.legacy = self.legacy_pagination_class()
+            return self.legacy.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_position_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.position = position
+        self.reverse = reverse
+        return results
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'キーセットページネーションのカーソル（空指定で先頭ページ）',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '1ページあたりの件数',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    # --- 並び順 ---
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """queryset の並び順に一意なタイブレーカー（主キー）を付け足して返す"""
+        ordering = [
+            field for field in (queryset.query.order_by or self.default_ordering)
+            if isinstance(field, str)
+        ]
+        names = [field.lstrip('-') for field in ordering]
+        if 'id' not in names and 'pk' not in names:
+            # 主キーが id 以外のモデル（PublicCat など）にも対応するため pk を使う
+            last_desc = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if last_desc else 'pk')
+        return tuple(ordering)
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+    @staticmethod
+    def build_position_filter(ordering, position):
+        """(a, b, c) > (pa, pb, pc) 相当の条件を列ごとの向きに合わせて組み立てる"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_field, prev_value in zip(ordering[:index], position[:index]):
+                clause &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= clause
+        return condition
+
+    # --- カーソル ---
+
+    def encode_cursor(self, obj, reverse):
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'p': values, 'r': int(reverse)}, default=self._json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _json_default(value):
+        # DjangoJSONEncoder はミリ秒に丸めるため、位置がずれないようマイクロ秒まで保持する
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+    def decode_cursor(self, request, model):
+        raw = request.query_params.get(self.cursor_query_param, '')
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8'))
+            values = payload['p']
+            reverse = bool(payload.get('r', 0))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.to_python(model, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError, json.JSONDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def to_python(model, name, value):
+        if name == 'pk':
+            name = model._meta.pk.name
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # annotate された値（検索の関連度など）はそのまま使う
+            return value
+        try:
+            return field.to_python(value)
+        except Exception:
+            raise ValueError(name)
+
+    def get_next_link(self):
+        if not self.page:
+            # 差分ポーリング: 新着がなければ同じカーソルを返す
+            if self.always_emit_next and not self.reverse:
+                return self.request.build_absolute_uri()
+            return None
+        if self.reverse or self.has_more or self.always_emit_next:
+            return self._link(self.encode_cursor(self.page[-1], reverse=False))
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if (self.reverse and self.has_more) or (not self.reverse and self.position is not None):
+            return self._link(self.encode_cursor(self.page[0], reverse=True))
+        return None
+
+    def _link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, parse.unquote(cursor))
+
+
+class CatKeysetPagination(KeysetPagination):
+    """保護猫一覧用（新着順: -created_at, -id）"""
+
+    default_ordering = ('-created_at',)
+
+
+class ApplicationKeysetPagination(KeysetPagination):
+    """応募一覧用（新着順: -applied_at, -id）"""
+
+    default_ordering = ('-applied_at',)
+
+
+class MessageKeysetPagination(KeysetPagination):
+    """メッセージ用（古い順: created_at, id）
+
+    next は常に返すため、クライアントは受け取った next を保持しておき
+    それをポーリングすることで「カーソル以降の新着メッセージ」だけを取得できる。
+    cursor 未指定の従来クライアントには全件をそのまま返す。
+    """
+
+    default_ordering = ('created_at',)
+    always_emit_next = True
+    legacy_pagination_class = None
+    max_page_size = 200
+
+
+class ApplicationEventKeysetPagination(KeysetPagination):
+    """応募タイムライン用（古い順: created_at, id）
+
+    件数に上限が無いため、cursor 未指定でも先頭ページのみを返す。
+    """
+
+    default_ordering = ('created_at',)
+    keyset_by_default = True
+    legacy_pagination_class = None
+    max_page_size = 200
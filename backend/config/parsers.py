@@ -0,0 +1,30 @@
+"""
+高速な JSON パーサー（orjson）
+
+UTF-8 のリクエスト本文を orjson で読み込む。orjson が無い環境・UTF-8 以外の文字コード・
+orjson が扱えない値（64bit を超える整数など）は DRF 標準の JSONParser（json）で処理する。
+"""
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """orjson で JSON を読み込むパーサー（結果・エラーは JSONParser と互換）"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        data = stream.read() if stream is not None else b''
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # エラーメッセージと NaN の扱いを JSONParser に揃えるため、標準の json で読み直す
+            import io
+            return super().parse(io.BytesIO(data), media_type, parser_context)
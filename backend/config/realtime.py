@@ -0,0 +1,197 @@
+"""
+リアルタイム配信（Server-Sent Events）用のイベントブローカー
+
+同期コード（ビュー・モデル）から publish() したイベントを、
+ASGI で待ち受けているストリーム（subscribe()）へ配信する。
+
+- プロセス内の購読者へは asyncio.Queue 経由で直接配信する
+- プロセス間（gunicorn の複数ワーカー・複数 dyno）の配信は settings.REALTIME['BACKEND'] で差し替える
+  - LocalBackend: プロセス内のみ（開発・単一プロセス用）
+  - RedisBackend: Redis Pub/Sub で全プロセスへ配信（REDIS_URL 設定時の既定）
+- settings.REALTIME['ENABLED'] が False の場合（REDIS_URL が無く複数ワーカーで動かす場合の既定）は
+  ストリームを提供しない（他のワーカーで保存されたメッセージが届かないため）
+
+publish() はトランザクション確定後に送信されるため、
+ロールバックされた変更が配信されることはない。
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def _config(name, default):
+    return getattr(settings, 'REALTIME', {}).get(name, default)
+
+
+def application_channel(application_id):
+    return f'application:{application_id}'
+
+
+# 購読キューに入れると購読側がストリームを閉じる合図（クライアントは再接続して追いつく）
+CLOSE = None
+
+
+def _offer(queue, payload, limit):
+    """購読キューへ追加する。処理が追いつかない購読者は切断する"""
+    if queue.qsize() >= limit:
+        if queue.qsize() == limit:
+            queue.put_nowait(CLOSE)
+        return
+    queue.put_nowait(payload)
+
+
+class LocalBackend:
+    """プロセス内のみで配信するバックエンド"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, payload):
+        self.broker.deliver(channel, payload)
+
+    def start(self):
+        pass
+
+
+class RedisBackend:
+    """Redis Pub/Sub で全プロセスへ配信するバックエンド
+
+    受信は1プロセスにつき1本のバックグラウンドスレッド（PSUBSCRIBE）で行い、
+    届いたイベントをプロセス内の購読者へ振り分ける。
+    """
+
+    prefix = 'realtime:'
+
+    def __init__(self, broker):
+        import redis
+
+        self.broker = broker
+        self.client = redis.Redis.from_url(_config('REDIS_URL', None) or settings.REDIS_URL)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, channel, payload):
+        self.client.publish(self.prefix + channel, payload)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='realtime-redis', daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        import time
+
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode('utf-8')[len(self.prefix):]
+                    self.broker.deliver(channel, message['data'].decode('utf-8'))
+            except Exception:
+                logger.exception('Realtime Redis listener disconnected; reconnecting')
+                time.sleep(1)
+
+
+class Broker:
+    """チャンネル単位の Pub/Sub"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend_class = import_string(_config('BACKEND', 'config.realtime.LocalBackend'))
+            self._backend = backend_class(self)
+        return self._backend
+
+    def publish(self, channel, event):
+        """イベントを配信する（同期コードから呼び出す。トランザクション確定後に送信）"""
+        payload = json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+        def _publish():
+            try:
+                self.backend.publish(channel, payload)
+            except Exception:
+                # 配信に失敗しても本処理（メッセージ保存など）は成功させる。クライアントは再接続時に追いつく
+                logger.exception(f'Realtime publish failed: channel={channel}')
+
+        transaction.on_commit(_publish)
+
+    def deliver(self, channel, payload):
+        """プロセス内の購読者へ配信する（任意のスレッドから呼び出し可）"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        limit = _config('QUEUE_SIZE', 100)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload, limit)
+            except RuntimeError:
+                # イベントループ終了済み
+                pass
+
+    def subscribe(self, channel):
+        """チャンネルを購読する（async with で使用。CLOSE が届いたら切断する）
+
+            async with broker.subscribe(channel) as queue:
+                payload = await queue.get()
+        """
+        return Subscription(self, channel)
+
+    def _add(self, channel, entry):
+        self.backend.start()
+        with self._lock:
+            self._subscribers[channel].add(entry)
+
+    def _remove(self, channel, entry):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(entry)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class Subscription:
+    """購読中は JSON 文字列が届く asyncio.Queue を返す"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.entry = None
+
+    async def __aenter__(self):
+        self.entry = (asyncio.get_running_loop(), asyncio.Queue())
+        self.broker._add(self.channel, self.entry)
+        return self.entry[1]
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self.channel, self.entry)
+        return False
+
+
+broker = Broker()
+
+
+def format_sse(data, event=None, event_id=None):
+    """Server-Sent Events の1イベント分の文字列を組み立てる"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,51 @@
+"""
+高速な JSON レンダラー（orjson）
+
+DRF の JSONRenderer と同じ出力（UTF-8・区切りの空白なし・UTC は末尾 Z・U+2028/U+2029 のエスケープ）を
+orjson で生成する。以下の場合は DRF 標準（json）の処理に切り替える。
+
+- orjson がインストールされていない
+- インデント指定（Accept: application/json; indent=4 やブラウザブル API）
+- UNICODE_JSON=False / COMPACT_JSON=False の設定
+- orjson が扱えない値（64bit を超える整数など）
+
+orjson 固有の型以外（Decimal・遅延文字列・QuerySet など）は DRF の JSONEncoder の変換に従う。
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では DRF 標準の json で動作する
+    orjson = None
+
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """orjson で JSON を生成するレンダラー（出力は JSONRenderer と互換）"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # JavaScript の文字列リテラルとして安全になるよう、JSONRenderer と同じくエスケープする
+        if b'\xe2\x80' in ret:
+            for raw, escaped in _LINE_SEPARATORS:
+                ret = ret.replace(raw, escaped)
+        return ret
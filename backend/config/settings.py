@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware',  # 先頭に置き、他のミドルウェアを含めた処理時間を計測する
+    'config.compression.CompressionMiddleware',  # JSON レスポンスの brotli / gzip 圧縮
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -53,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.audit.AuditLogMiddleware',  # 監査ログをリクエストごとにまとめて保存する
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,14 +81,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
+# 接続の保持秒数: web は ASGI（config.asgi）で動くため既定は 0（リクエストごとに接続・切断）。
+# ASGI では同期処理がリクエストごとに別スレッドで実行され、保持した接続が再利用されずに増え続けるため。
+# 接続コストを下げる場合はコネクションプーラー（PgBouncer・ProxySQL など）を使う。WSGI で動かす場合のみ 600 などを指定する
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+
 # SUPABASE_DATABASE_URL が設定されている場合はそちらを優先（PostgreSQL）
 _supabase_url = os.environ.get('SUPABASE_DATABASE_URL')
 if _supabase_url:
-    db_config = dj_database_url.parse(_supabase_url, conn_max_age=600)
+    db_config = dj_database_url.parse(_supabase_url, conn_max_age=DB_CONN_MAX_AGE)
 else:
     db_config = dj_database_url.config(
         default=f"mysql://{os.environ.get('DB_USER', 'catuser')}:{os.environ.get('DB_PASSWORD', 'catpassword')}@{os.environ.get('DB_HOST', 'db')}:{os.environ.get('DB_PORT', '3306')}/{os.environ.get('DB_NAME', 'cat_matching')}",
-        conn_max_age=600
+        conn_max_age=DB_CONN_MAX_AGE
     )
     if db_config['ENGINE'] == 'django.db.backends.mysql':
         db_config.setdefault('OPTIONS', {})['charset'] = 'utf8mb4'
@@ -157,6 +165,93 @@ else:
     if not os.path.exists(MEDIA_ROOT):
         os.makedirs(MEDIA_ROOT, exist_ok=True)
 
+# Cache
+# 共有キャッシュ: REDIS_URL があれば Redis、なければローカルのファイルキャッシュで代用する
+# ファイルキャッシュは同じホストのワーカー間でしか共有されない。複数ホストで動かす場合は REDIS_URL が必須
+# （キャッシュ無効化・ETag のバージョンがホストごとになり、他のホストでの更新が反映されないため）
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    _shared_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    _shared_cache = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', '/tmp/cat_matching_cache'),
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': _shared_cache,
+}
+
+# 公開API（猫一覧・詳細・団体）のレスポンスキャッシュ（config.cache）
+# 既定では REDIS_URL がある場合のみ有効（単一ホストならファイルキャッシュでも API_CACHE_ENABLED=True で有効にできる）
+API_CACHE = {
+    'ENABLED': os.environ.get('API_CACHE_ENABLED', 'True' if REDIS_URL else 'False') == 'True',
+    'ALIAS': 'shared',
+    'TIMEOUT': 300,           # 共有キャッシュの有効期限（秒）
+    'LRU_MAX_ENTRIES': 512,   # プロセス内 LRU の最大件数
+    'LRU_TIMEOUT': 30,        # プロセス内 LRU の有効期限（秒）
+}
+
+# 監査ログ（accounts.audit）: 指定モデルの作成・更新・削除の差分を AuditLog に記録する
+AUDIT_LOG = {
+    'ENABLED': os.environ.get('AUDIT_LOG_ENABLED', 'True') == 'True',
+    # 全モデル共通で記録しないフィールド
+    'EXCLUDE_FIELDS': ['updated_at'],
+    # モデルごとの方針:
+    #   actions: 記録する操作（省略時は create/update/delete）
+    #   exclude_fields: 記録しないフィールド（自動計算・非正規化フィールドなど）
+    #   sample_rate: 記録する割合（0〜1、省略時は SAMPLE_RATE）
+    #   repr_field: object_repr に使うフィールド（関連オブジェクトを読み込まないよう自モデルのフィールドのみ）
+    'MODELS': {
+        'accounts.User': {'exclude_fields': ['password', 'last_login'], 'repr_field': 'username'},
+        'shelters.Shelter': {'repr_field': 'name'},
+        'shelters.ShelterUser': {},
+        'cats.Cat': {
+            'exclude_fields': ['search_document', 'primary_image', 'primary_image_name', 'primary_image_variants'],
+            'repr_field': 'name',
+        },
+        'applications.Application': {'exclude_fields': ['applicant_unread_count', 'shelter_unread_count']},
+        # メッセージ本体が送信履歴を兼ねるため、作成は記録せず編集・削除のみ記録する
+        'applications.Message': {'actions': ['update', 'delete']},
+    },
+    'SAMPLE_RATE': 1.0,
+    'BATCH_SIZE': 500,
+}
+
+# リクエストの計測（config.metrics）: /metrics/ で Prometheus 形式で出力する
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'True') == 'True',
+    # ワーカーごとの集計値を書き出すディレクトリ（/metrics/ で全ワーカー分を合算する。空で無効）
+    'DIR': os.environ.get('METRICS_DIR', '/tmp/cat_matching_metrics'),
+    'FLUSH_INTERVAL': 5,  # 書き出し間隔（秒）
+    # /metrics/ をスクレイパーから読むためのトークン（Authorization: Bearer <token>。未設定時は管理者のみ）
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+    # この時間（ミリ秒）を超えたリクエストを SQL の内訳付きでログに出す（0 で無効）
+    'SLOW_REQUEST_MS': int(os.environ.get('SLOW_REQUEST_MS', 0)),
+    'EXCLUDE_PATHS': ('/static/', '/media/', '/healthz/', '/metrics/'),
+}
+
+# レスポンスの圧縮（config.compression）: Accept-Encoding に応じて JSON を brotli / gzip で圧縮する
+# brotli は Brotli パッケージがある場合のみ（無ければ gzip）
+COMPRESSION = {
+    'ENABLED': os.environ.get('COMPRESSION_ENABLED', 'True') == 'True',
+    'MIN_SIZE': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),  # これより小さいレスポンスは圧縮しない（バイト）
+    'CONTENT_TYPES': ('application/json',),  # 加えて +json で終わる Content-Type も対象
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,  # 動的レスポンス向けに圧縮率より速度を優先する
+}
+
+# 団体所属情報（ShelterUser）のキャッシュ秒数（0 で無効、リクエスト内では常に1回だけ取得）
+# ShelterUser の保存・削除時に無効化される。無効化が全ホストに届く共有キャッシュ（REDIS_URL）がある場合のみ使う
+# （ホストごとのファイルキャッシュでは、所属を外されたユーザーが他のホストで権限を持ち続けるため）
+MEMBERSHIP_CACHE_TIMEOUT = int(os.environ.get('MEMBERSHIP_CACHE_TIMEOUT', 300)) if REDIS_URL else 0
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -168,6 +263,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'accounts.authentication.JWTCookieAuthentication',  # HttpOnly Cookie + Authorizationヘッダー両対応
     ),
+    # orjson による JSON の生成・読み込み（orjson が無い環境では DRF 標準の json）
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_PERMISSION_CLASSES': (
@@ -241,6 +346,43 @@ if EMAIL_HOST_USER and EMAIL_HOST_PASSWORD:
 else:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# チャットのリアルタイム配信（config.realtime / GET /api/messages/stream/）
+# 複数プロセス間の配信は REDIS_URL があれば Redis Pub/Sub、なければプロセス内のみ。
+# プロセス内のみの配信は他のワーカーで保存されたメッセージが届かないため、
+# REDIS_URL が無く複数ワーカー（WEB_CONCURRENCY > 1）で動かす場合は配信を無効にする（クライアントはポーリングを続ける）
+REALTIME = {
+    'ENABLED': bool(REDIS_URL) or int(os.environ.get('WEB_CONCURRENCY', 1)) <= 1,
+    'BACKEND': 'config.realtime.RedisBackend' if REDIS_URL else 'config.realtime.LocalBackend',
+    'KEEPALIVE_SECONDS': 15,      # 無通信時のコメント送信間隔（プロキシのタイムアウト対策）。閲覧権限もこの間隔で再確認する
+    'MAX_STREAM_SECONDS': 300,    # 1接続の最大時間（クライアントは自動で再接続する）
+    'RETRY_MILLISECONDS': 3000,   # EventSource の再接続間隔
+    'QUEUE_SIZE': 100,            # 購読者ごとの未送信イベント上限（超えたら切断）
+}
+
+# 保護猫画像の派生画像（cats.images）
+# アップロード後にバックグラウンドスレッドで幅ごとの WebP / JPEG（Pillow が対応していれば AVIF も）を生成する
+CAT_IMAGE_VARIANTS = {
+    'ENABLED': os.environ.get('CAT_IMAGE_VARIANTS_ENABLED', 'True') == 'True',
+    'ASYNC': True,                          # False: トランザクション確定直後に同じスレッドで生成
+    'WIDTHS': [320, 640, 1280],
+    'FORMATS': ['avif', 'webp', 'jpeg'],
+    'MAX_WORKERS': 2,
+}
+
+# メール送信キュー（EmailLog の pending 行をワーカーが送信する）
+# 既定は無効（リクエスト内で即時送信する）。有効にする場合は send_queued_emails ワーカーを必ず起動すること
+# （ワーカーが無いと2段階認証コード・パスワード再設定のメールも送信されない）
+EMAIL_QUEUE = {
+    'ENABLED': os.environ.get('EMAIL_QUEUE_ENABLED', 'False') == 'True',
+    'BATCH_SIZE': int(os.environ.get('EMAIL_QUEUE_BATCH_SIZE', 50)),
+    'POLL_INTERVAL': float(os.environ.get('EMAIL_QUEUE_POLL_INTERVAL', 2)),
+    # リトライ間隔: RETRY_BASE_SECONDS * 2^(retry_count - 1)、上限 RETRY_MAX_SECONDS
+    'RETRY_BASE_SECONDS': 60,
+    'RETRY_MAX_SECONDS': 3600,
+    # ワーカーが確保した行を他のワーカーが取得しない秒数（送信後・記録前に停止した場合はこの後に再送される）
+    'CLAIM_SECONDS': 600,
+}
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': '保護猫マッチングシステム API',
@@ -262,3 +404,23 @@ if not DEBUG:
 # File Upload Settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+
+# Logging
+# 低速リクエストのログ（config.metrics）などアプリのログを標準エラーに出力する（Heroku のログに集約される）
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'config.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
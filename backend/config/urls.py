@@ -9,10 +9,11 @@ from django.http import JsonResponse
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 
-from .views import health_check, contact_view
+from .views import health_check, contact_view, metrics_view
 
 urlpatterns = [
     path('healthz/', health_check, name='health_check'),
+    path('metrics/', metrics_view, name='metrics'),
     path('api/contact/', contact_view, name='contact'),
     path('django-admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
@@ -13,6 +13,34 @@ def health_check(request):
     """Health check endpoint for monitoring and load balancers."""
     return JsonResponse({"status": "ok", "service": "cat-matching-api"})
 
+
+def _can_read_metrics(request):
+    """メトリクスの閲覧権限: スクレイパー用トークン、または管理者（Django 管理画面のセッション / JWT）"""
+    import hmac
+
+    token = getattr(settings, 'METRICS', {}).get('TOKEN')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+        return True
+
+    user = request.user
+    if not user.is_authenticated:
+        from accounts.authentication import JWTCookieAuthentication
+
+        result = JWTCookieAuthentication().authenticate(request)
+        user = result[0] if result else user
+    return user.is_authenticated and (user.is_superuser or user.user_type == 'admin')
+
+
+def metrics_view(request):
+    """リクエスト計測値（config.metrics）を Prometheus のテキスト形式で返す"""
+    from django.http import HttpResponse, HttpResponseForbidden
+    from .metrics import render_prometheus
+
+    if not _can_read_metrics(request):
+        return HttpResponseForbidden('forbidden')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def contact_view(request):
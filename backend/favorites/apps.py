@@ -5,3 +5,6 @@ class FavoritesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'favorites'
     verbose_name = 'お気に入り'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,15 @@
+"""
+お気に入り関連のシグナルハンドラ
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_favorites_version
+from .models import Favorite
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_favorites_etag(sender, instance, **kwargs):
+    """猫の一覧・詳細の is_favorited が変わるため、ユーザーの ETag を更新する"""
+    bump_favorites_version(instance.user_id)
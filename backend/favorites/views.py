@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 from .models import Favorite
 from .serializers import FavoriteSerializer, FavoriteCreateSerializer
 from cats.models import Cat
@@ -16,7 +17,9 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # ログインユーザーのお気に入りのみ取得
-        return Favorite.objects.filter(user=self.request.user).select_related('cat', 'cat__shelter')
+        return Favorite.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('cat', queryset=Cat.objects.with_list_data(self.request.user))
+        )
 
     def get_serializer_class(self):
         if self.action == 'create':
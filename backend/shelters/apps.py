@@ -5,3 +5,6 @@ class SheltersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shelters'
     verbose_name = '保護団体'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,132 @@
+"""
+ユーザーの保護団体所属情報（メンバーシップ）の解決
+
+所属団体とロールを1リクエストにつき1回だけ読み込み、
+権限クラス・ビュー・シリアライザーから共通で参照する。
+
+    membership = get_membership(request)
+    membership.is_member(shelter_id)
+    membership.role(shelter_id)      # 'admin' / 'staff' / None
+    membership.shelter_ids           # 所属団体IDの集合
+
+さらに settings.MEMBERSHIP_CACHE_TIMEOUT（秒, 0 で無効。REDIS_URL 未設定時は無効）の間、
+共有キャッシュにも保持する。ShelterUser の保存・削除時に該当ユーザーのエントリーを削除する。
+"""
+from django.conf import settings
+from django.db import transaction
+
+_REQUEST_ATTR = '_shelter_membership'
+
+
+def membership_cache_key(user_id):
+    return f'membership:{user_id}'
+
+
+class Membership:
+    """ユーザーの有効な団体所属（ShelterUser.is_active=True）の一覧"""
+
+    def __init__(self, user, rows=()):
+        self.user = user
+        # (ShelterUser.id, shelter_id, role) を ShelterUser.id 順で保持
+        self.rows = sorted(rows)
+        self._roles = {shelter_id: role for _, shelter_id, role in self.rows}
+        self._primary_shelter = None
+
+    @property
+    def shelter_ids(self):
+        return set(self._roles)
+
+    def is_member(self, shelter_id):
+        return shelter_id in self._roles
+
+    def role(self, shelter_id):
+        return self._roles.get(shelter_id)
+
+    def is_admin(self, shelter_id):
+        return self._roles.get(shelter_id) == 'admin'
+
+    def is_staff_only(self, shelter_id):
+        """団体内ロールが staff（管理者でない）か"""
+        return self._roles.get(shelter_id) == 'staff'
+
+    def shelter_ids_with_role(self, role):
+        """指定ロールで所属している団体ID（所属順）"""
+        return [shelter_id for _, shelter_id, member_role in self.rows if member_role == role]
+
+    @property
+    def primary_shelter_id(self):
+        """代表の所属団体（最初に所属した団体。従来の ShelterUser...first() 相当）"""
+        return self.rows[0][1] if self.rows else None
+
+    @property
+    def primary_role(self):
+        return self.rows[0][2] if self.rows else None
+
+    @property
+    def primary_shelter(self):
+        """代表の所属団体オブジェクト（必要になった時点で1回だけ取得）"""
+        if self._primary_shelter is None and self.primary_shelter_id is not None:
+            from .models import Shelter
+            self._primary_shelter = Shelter.objects.filter(pk=self.primary_shelter_id).first()
+        return self._primary_shelter
+
+
+def load_membership(user):
+    """DB（または共有キャッシュ）から所属情報を読み込む"""
+    if user is None or not user.is_authenticated:
+        return Membership(user)
+
+    from config.cache import shared_cache
+    from .models import ShelterUser
+
+    timeout = getattr(settings, 'MEMBERSHIP_CACHE_TIMEOUT', 0)
+    key = membership_cache_key(user.pk)
+    if timeout:
+        rows = shared_cache().get(key)
+        if rows is not None:
+            return Membership(user, rows)
+
+    rows = list(
+        ShelterUser.objects.filter(user=user, is_active=True)
+        .values_list('id', 'shelter_id', 'role')
+    )
+    if timeout:
+        shared_cache().set(key, rows, timeout=timeout)
+    return Membership(user, rows)
+
+
+def get_membership(request, user=None):
+    """リクエスト単位でキャッシュした所属情報を返す
+
+    user を指定した場合はそのユーザーの所属情報を返す（request.user と異なる場合はキャッシュしない）。
+    """
+    if request is None:
+        return load_membership(user)
+
+    if user is not None and user != request.user:
+        return load_membership(user)
+
+    # DRF の Request とラップ元の HttpRequest のどちらから呼ばれても同じものを使う
+    http_request = getattr(request, '_request', request)
+    membership = getattr(http_request, _REQUEST_ATTR, None)
+    if membership is None or membership.user != request.user:
+        membership = load_membership(request.user)
+        setattr(http_request, _REQUEST_ATTR, membership)
+    return membership
+
+
+def invalidate_membership(user_id):
+    """所属変更時に共有キャッシュのエントリーを削除する（トランザクション確定後）"""
+    if not getattr(settings, 'MEMBERSHIP_CACHE_TIMEOUT', 0):
+        return
+
+    from config.cache import shared_cache
+
+    transaction.on_commit(lambda: shared_cache().delete(membership_cache_key(user_id)))
+
+
+def clear_request_membership(request):
+    """同一リクエスト内で所属を変更した後に呼ぶ"""
+    http_request = getattr(request, '_request', request)
+    if hasattr(http_request, _REQUEST_ATTR):
+        delattr(http_request, _REQUEST_ATTR)
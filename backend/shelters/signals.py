@@ -0,0 +1,15 @@
+"""
+保護団体関連のシグナルハンドラ
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .membership import invalidate_membership
+from .models import ShelterUser
+
+
+@receiver(post_save, sender=ShelterUser)
+@receiver(post_delete, sender=ShelterUser)
+def invalidate_shelter_membership(sender, instance, **kwargs):
+    """所属・ロールの変更時に、キャッシュ済みのメンバーシップを破棄する"""
+    invalidate_membership(instance.user_id)
@@ -2,9 +2,13 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Shelter, ShelterUser
+from .membership import get_membership
 from .serializers import ShelterSerializer, ShelterPublicSerializer, ShelterMemberSerializer
+from config.cache import CachedResponseMixin, SHELTER_LIST_VERSION_KEY, shelter_version_key
+from config.conditional import ConditionalResponseMixin
+from config.fields import SparseFieldsMixin
 
-class ShelterViewSet(viewsets.ModelViewSet):
+class ShelterViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """保護団体情報管理 ViewSet"""
     queryset = Shelter.objects.all()
     serializer_class = ShelterSerializer
@@ -17,21 +21,18 @@ class ShelterViewSet(viewsets.ModelViewSet):
             return Shelter.objects.all()
         
         # 所属している有効なシェルターのIDを取得
-        shelter_ids = ShelterUser.objects.filter(
-            user=user, 
-            is_active=True
-        ).values_list('shelter_id', flat=True)
+        shelter_ids = get_membership(self.request).shelter_ids
         
         return Shelter.objects.filter(id__in=shelter_ids)
 
     @action(detail=False, methods=['get'], url_path='my-shelter')
     def my_shelter(self, request):
         """ログイン中のユーザーが所属するシェルター情報を取得"""
-        shelter_user = ShelterUser.objects.filter(user=request.user, is_active=True).first()
-        if not shelter_user:
+        shelter = get_membership(request).primary_shelter
+        if not shelter:
             return Response({"detail": "所属する保護団体が見つかりません。"}, status=status.HTTP_404_NOT_FOUND)
             
-        serializer = self.get_serializer(shelter_user.shelter)
+        serializer = self.get_serializer(shelter)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], url_path='verify')
@@ -125,14 +126,7 @@ class ShelterViewSet(viewsets.ModelViewSet):
             return Response({"detail": "審査ステータスを変更する権限はありません。"}, status=status.HTTP_403_FORBIDDEN)
 
         if not user.is_superuser:
-            shelter_user = ShelterUser.objects.filter(
-                user=user, 
-                shelter=shelter, 
-                is_active=True,
-                role='admin'
-            ).exists()
-            
-            if not shelter_user:
+            if not get_membership(request).is_admin(shelter.id):
                 return Response(
                     {"detail": "保護団体情報を更新する権限がありません。管理者のみ可能です。"}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -145,12 +139,19 @@ class ShelterViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
-class PublicShelterViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicShelterViewSet(SparseFieldsMixin, ConditionalResponseMixin, CachedResponseMixin,
+                           viewsets.ReadOnlyModelViewSet):
     """一般ユーザー向けの団体情報 ViewSet"""
     queryset = Shelter.objects.filter(public_profile_enabled=True, verification_status='approved')
     serializer_class = ShelterPublicSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'id'
+    cache_prefix = 'shelters'
+
+    def get_cache_version_keys(self, action):
+        if action == 'retrieve':
+            return [shelter_version_key(self.kwargs['id'])]
+        return [SHELTER_LIST_VERSION_KEY]
 
     def get_object(self):
         """公開フラグが立っており、かつ審査承認済みの団体のみ返す"""
@@ -174,11 +175,7 @@ class ShelterMemberViewSet(viewsets.ModelViewSet):
             return ShelterUser.objects.all()
 
         # 自分が管理者として所属しているアクティブなシェルターを取得
-        my_shelter_admins = ShelterUser.objects.filter(
-            user=user, 
-            is_active=True,
-            role='admin'
-        ).values_list('shelter', flat=True)
+        my_shelter_admins = get_membership(self.request).shelter_ids_with_role('admin')
 
         if not my_shelter_admins:
             return ShelterUser.objects.none()
@@ -200,17 +197,12 @@ class ShelterMemberViewSet(viewsets.ModelViewSet):
         email = serializer.validated_data['email']
         
         # 自身が管理者として所属するシェルターを取得 (複数ある場合は最初の一つを対象とする運用)
-        user = request.user
-        shelter_user_admin = ShelterUser.objects.filter(
-            user=user, 
-            is_active=True,
-            role='admin'
-        ).first()
+        admin_shelter_ids = get_membership(request).shelter_ids_with_role('admin')
         
-        if not shelter_user_admin:
+        if not admin_shelter_ids:
              return Response({"detail": "管理者権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
              
-        shelter = shelter_user_admin.shelter
+        shelter = Shelter.objects.get(pk=admin_shelter_ids[0])
         
         # 追加対象のユーザーを取得
         from django.contrib.auth import get_user_model
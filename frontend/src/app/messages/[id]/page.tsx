@@ -4,6 +4,13 @@ import { useEffect, useState, useRef } from "react";
 import { useParams, useRouter } from "next/navigation";
 import Link from "next/link";
 import api from "@/lib/api";
+import {
+  POLL_INTERVAL_MS,
+  STREAM_POLL_INTERVAL_MS,
+  lastMessageId,
+  subscribeApplicationStream,
+  type ApplicationStreamEvent,
+} from "@/lib/messageStream";
 import { ArrowLeft, Send, User as UserIcon, Home, Clock, MessageSquare, AlertCircle } from "lucide-react";
 import Header from "@/components/common/Header";
 import Footer from "@/components/common/Footer";
@@ -77,7 +84,7 @@ export default function MessagePage() {
     }
   };
 
-  const fetchMessages = async () => {
+  const fetchMessages = async (): Promise<Message[] | null> => {
     try {
       const res = await api.get(`/api/messages/?application=${applicationId}`);
       // バックエンドのページネーション設定に関わらず、配列を取り出す
@@ -94,30 +101,70 @@ export default function MessagePage() {
         api.post('/api/messages/mark_as_read/', { application_id: Number(applicationId) })
            .catch(err => console.error("Failed to mark as read:", err));
       }
+      return sortedMessages;
     } catch (err) {
       console.error("Failed to fetch messages:", err);
+      return null;
     }
   };
 
   useEffect(() => {
+    let cancelled = false;
+    let unsubscribe = () => {};
+
+    const startPolling = (interval: number) => {
+      if (pollingInterval.current) {
+        clearInterval(pollingInterval.current);
+      }
+      pollingInterval.current = setInterval(fetchMessages, interval);
+    };
+
+    const handleEvent = (event: ApplicationStreamEvent) => {
+      if (event.type === 'message') {
+        setMessages((prev) =>
+          prev.some((m) => m.id === event.message.id) ? prev : [...prev, event.message]
+        );
+        if (event.message.sender_type !== 'user') {
+          api.post('/api/messages/mark_as_read/', { application_id: Number(applicationId) })
+             .catch(err => console.error("Failed to mark as read:", err));
+        }
+      } else if (event.type === 'read' && event.reader === 'shelter') {
+        // 団体側が既読にした → 自分の送信メッセージを既読表示に
+        setMessages((prev) => prev.map((m) => (m.sender_type === 'user' ? { ...m, is_read: true } : m)));
+      } else if (event.type === 'status') {
+        fetchApplication();
+      }
+    };
+
     const init = async () => {
-      await Promise.all([
+      const [, loaded] = await Promise.all([
         fetchApplication(),
         fetchMessages(),
         fetchUser()
       ]);
       setIsLoading(false);
       scrollToBottom();
+      if (cancelled) return;
+
+      // リアルタイム配信を購読（読み込み済みの最後のメッセージ以降から受け取る）。
+      // 接続中も低頻度でポーリングし、利用できない場合は5秒ごとのポーリングに切り替える
+      startPolling(STREAM_POLL_INTERVAL_MS);
+      unsubscribe = subscribeApplicationStream(
+        applicationId as string,
+        handleEvent,
+        () => startPolling(POLL_INTERVAL_MS),
+        loaded ? lastMessageId(loaded) : null,
+      );
     };
 
     init();
 
-    // ポーリング開始 (5秒ごと)
-    pollingInterval.current = setInterval(fetchMessages, 5000);
-
     return () => {
+      cancelled = true;
+      unsubscribe();
       if (pollingInterval.current) {
         clearInterval(pollingInterval.current);
+        pollingInterval.current = null;
       }
     };
   }, [applicationId, router]);
@@ -26,6 +26,12 @@ export default function Home() {
     ([_, f]) => catsService.getCats(f)
   );
 
+  // 絞り込み条件ごとの件数（ページ番号には依存しない）
+  const { data: facets } = useSWR(
+    ['/api/cats/facets', filters],
+    ([_, f]) => catsService.getFacets(f)
+  );
+
   const cats = data?.results || [];
   const totalCount = data?.count || 0;
 
@@ -42,6 +48,7 @@ export default function Home() {
             <aside className="w-full lg:w-80 flex-shrink-0">
               <CatFilter 
                 filters={filters} 
+                facets={facets}
                 onFilterChange={(newFilters) => {
                   setFilters(newFilters);
                   setPage(1);
@@ -5,6 +5,13 @@ import { useParams, useRouter } from "next/navigation";
 import Link from "next/link";
 import Image from "next/image";
 import api from "@/lib/api";
+import {
+  POLL_INTERVAL_MS,
+  STREAM_POLL_INTERVAL_MS,
+  lastMessageId,
+  subscribeApplicationStream,
+  type ApplicationStreamEvent,
+} from "@/lib/messageStream";
 import { 
   ArrowLeft, 
   Send, 
@@ -113,7 +120,7 @@ export default function ShelterApplicationDetailPage() {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
-  const fetchData = useCallback(async () => {
+  const fetchData = useCallback(async (): Promise<Message[] | null> => {
     try {
       const [appRes, msgRes] = await Promise.all([
         api.get(`/api/applications/${applicationId}/`),
@@ -121,15 +128,20 @@ export default function ShelterApplicationDetailPage() {
       ]);
       setApplication(appRes.data);
       const data = Array.isArray(msgRes.data) ? msgRes.data : (msgRes.data.results || []);
-      setMessages([...data].sort((a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime()));
+      const sortedMessages: Message[] = [...data].sort(
+        (a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime()
+      );
+      setMessages(sortedMessages);
       
       // Mark as read
       if (data.some((m: Message) => !m.is_read && m.sender_type === 'user')) {
         api.post('/api/messages/mark_as_read/', { application_id: Number(applicationId) })
            .catch(err => console.error("Failed to mark as read:", err));
       }
+      return sortedMessages;
     } catch (err) {
       console.error("Failed to fetch data:", err);
+      return null;
     } finally {
       setIsLoading(false);
     }
@@ -145,12 +157,57 @@ export default function ShelterApplicationDetailPage() {
   }, []);
 
   useEffect(() => {
-    fetchData();
-    fetchCurrentUser();
-    pollingInterval.current = setInterval(fetchData, 5000);
+    let cancelled = false;
+    let unsubscribe = () => {};
+
+    const startPolling = (interval: number) => {
+      if (pollingInterval.current) {
+        clearInterval(pollingInterval.current);
+      }
+      pollingInterval.current = setInterval(fetchData, interval);
+    };
+
+    const handleEvent = (event: ApplicationStreamEvent) => {
+      if (event.type === 'message') {
+        setMessages((prev) =>
+          prev.some((m) => m.id === event.message.id) ? prev : [...prev, event.message]
+        );
+        if (event.message.sender_type === 'user') {
+          api.post('/api/messages/mark_as_read/', { application_id: Number(applicationId) })
+             .catch(err => console.error("Failed to mark as read:", err));
+        }
+      } else if (event.type === 'read' && event.reader === 'applicant') {
+        // 応募者が既読にした → 団体側の送信メッセージを既読表示に
+        setMessages((prev) => prev.map((m) => (m.sender_type !== 'user' ? { ...m, is_read: true } : m)));
+      } else if (event.type === 'status') {
+        fetchData();
+      }
+    };
+
+    const init = async () => {
+      const [loaded] = await Promise.all([fetchData(), fetchCurrentUser()]);
+      if (cancelled) return;
+
+      // リアルタイム配信を購読（読み込み済みの最後のメッセージ以降から受け取る）。
+      // 接続中も低頻度でポーリングし、利用できない場合は5秒ごとのポーリングに切り替える
+      startPolling(STREAM_POLL_INTERVAL_MS);
+      unsubscribe = subscribeApplicationStream(
+        applicationId,
+        handleEvent,
+        () => startPolling(POLL_INTERVAL_MS),
+        loaded ? lastMessageId(loaded) : null,
+      );
+    };
+
+    init();
 
     return () => {
-      if (pollingInterval.current) clearInterval(pollingInterval.current);
+      cancelled = true;
+      unsubscribe();
+      if (pollingInterval.current) {
+        clearInterval(pollingInterval.current);
+        pollingInterval.current = null;
+      }
     };
   }, [applicationId, fetchData, fetchCurrentUser, router]);
 
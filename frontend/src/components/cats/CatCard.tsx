@@ -75,6 +75,9 @@ const CatCard: FC<CatCardProps> = ({ cat, onFavoriteChange, showFavoriteButton =
         {cat.primary_image ? (
           <ImageWithFallback
             src={cat.primary_image}
+            srcSet={cat.primary_image_srcset?.webp}
+            sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+            loading="lazy"
             alt={cat.name}
             className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
           />
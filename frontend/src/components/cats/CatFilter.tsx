@@ -1,4 +1,4 @@
-import { CatFilters } from "@/types";
+import { CatFacetName, CatFacetsResponse, CatFilters } from "@/types";
 import { Search, X } from "lucide-react";
 import { FC, ChangeEvent } from "react";
 
@@ -6,9 +6,18 @@ interface CatFilterProps {
   filters: CatFilters;
   onFilterChange: (filters: CatFilters) => void;
   onReset?: () => void;
+  facets?: CatFacetsResponse;
 }
 
-const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) => {
+const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset, facets }) => {
+  // 件数が取得できていれば選択肢の後ろに「(n)」を付ける
+  const withCount = (label: string, facet: CatFacetName, value: string | number) => {
+    if (!facets) return label;
+    // 都道府県は猫がいる値のみ返ってくるため、無いものは 0 件
+    const option = facets.facets[facet]?.find((item) => String(item.value) === String(value));
+    return `${label} (${option?.count ?? 0})`;
+  };
+
   const handleSearchChange = (e: ChangeEvent<HTMLInputElement>) => {
     onFilterChange({ ...filters, search: e.target.value || undefined });
   };
@@ -166,7 +175,7 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
                     </div>
                   </div>
                   <span className={`ml-3 text-sm transition-colors ${isSelected ? 'text-pink-600 font-bold' : 'text-gray-600 group-hover:text-pink-400'}`}>
-                    {pref}
+                    {withCount(pref, "prefecture", pref)}
                   </span>
                 </label>
               );
@@ -186,10 +195,10 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="kitten">子猫</option>
-            <option value="adult">成猫</option>
-            <option value="senior">シニア猫</option>
-            <option value="unknown">不明</option>
+            <option value="kitten">{withCount("子猫", "age_category", "kitten")}</option>
+            <option value="adult">{withCount("成猫", "age_category", "adult")}</option>
+            <option value="senior">{withCount("シニア猫", "age_category", "senior")}</option>
+            <option value="unknown">{withCount("不明", "age_category", "unknown")}</option>
           </select>
         </div>
 
@@ -205,10 +214,10 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="active">活発</option>
-            <option value="normal">普通</option>
-            <option value="calm">おっとり</option>
-            <option value="unknown">不明</option>
+            <option value="active">{withCount("活発", "activity_level", "active")}</option>
+            <option value="normal">{withCount("普通", "activity_level", "normal")}</option>
+            <option value="calm">{withCount("おっとり", "activity_level", "calm")}</option>
+            <option value="unknown">{withCount("不明", "activity_level", "unknown")}</option>
           </select>
         </div>
 
@@ -224,11 +233,11 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="5">5: とろとろ甘えん坊</option>
-            <option value="4">4: 甘えん坊</option>
-            <option value="3">3: ツンデレ</option>
-            <option value="2">2: クール</option>
-            <option value="1">1: 怖がり</option>
+            <option value="5">{withCount("5: とろとろ甘えん坊", "affection_level", "5")}</option>
+            <option value="4">{withCount("4: 甘えん坊", "affection_level", "4")}</option>
+            <option value="3">{withCount("3: ツンデレ", "affection_level", "3")}</option>
+            <option value="2">{withCount("2: クール", "affection_level", "2")}</option>
+            <option value="1">{withCount("1: 怖がり", "affection_level", "1")}</option>
           </select>
         </div>
 
@@ -244,9 +253,9 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="easy">初心者でも安心 (楽々)</option>
-            <option value="normal">少しコツが必要 (普通)</option>
-            <option value="hard">経験者向き (練習中)</option>
+            <option value="easy">{withCount("初心者でも安心 (楽々)", "maintenance_level", "easy")}</option>
+            <option value="normal">{withCount("少しコツが必要 (普通)", "maintenance_level", "normal")}</option>
+            <option value="hard">{withCount("経験者向き (練習中)", "maintenance_level", "hard")}</option>
           </select>
         </div>
 
@@ -262,9 +271,9 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="male">オス</option>
-            <option value="female">メス</option>
-            <option value="unknown">不明</option>
+            <option value="male">{withCount("オス", "gender", "male")}</option>
+            <option value="female">{withCount("メス", "gender", "female")}</option>
+            <option value="unknown">{withCount("不明", "gender", "unknown")}</option>
           </select>
         </div>
 
@@ -280,10 +289,10 @@ const CatFilter: FC<CatFilterProps> = ({ filters, onFilterChange, onReset }) =>
             className="w-full px-3 py-2 border border-gray-200 rounded-md focus:outline-none focus:ring-2 focus:ring-pink-300 text-sm bg-white"
           >
             <option value="">すべて</option>
-            <option value="open">募集中</option>
-            <option value="trial">トライアル中</option>
-            <option value="adopted">譲渡済み</option>
-            <option value="in_review">審査中</option>
+            <option value="open">{withCount("募集中", "status", "open")}</option>
+            <option value="trial">{withCount("トライアル中", "status", "trial")}</option>
+            <option value="adopted">{withCount("譲渡済み", "status", "adopted")}</option>
+            <option value="in_review">{withCount("審査中", "status", "in_review")}</option>
           </select>
         </div>
       </div>
@@ -23,14 +23,18 @@ interface ImageWithFallbackProps extends React.ImgHTMLAttributes<HTMLImageElemen
 }
 
 export function ImageWithFallback(props: ImageWithFallbackProps) {
-  const { src, alt, style, className, fallbackSrc = ERROR_IMG_SRC, ...rest } = props;
+  const { src, srcSet, alt, style, className, fallbackSrc = ERROR_IMG_SRC, ...rest } = props;
   const [imgSrc, setImgSrc] = useState<string>(getImageUrl(src, fallbackSrc));
+  const [failed, setFailed] = useState(false);
 
   useEffect(() => {
     setImgSrc(getImageUrl(src, fallbackSrc));
-  }, [src, fallbackSrc]);
+    setFailed(false);
+  }, [src, srcSet, fallbackSrc]);
 
   const handleError = () => {
+    // srcset があるとブラウザは src より優先するため、失敗時は srcset も外す
+    setFailed(true);
     if (imgSrc !== getImageUrl(fallbackSrc)) {
       setImgSrc(getImageUrl(fallbackSrc));
     }
@@ -39,6 +43,7 @@ export function ImageWithFallback(props: ImageWithFallbackProps) {
   return (
     <img
       src={imgSrc}
+      srcSet={failed ? undefined : srcSet || undefined}
       alt={alt}
       className={className}
       style={style}
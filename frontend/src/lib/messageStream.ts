@@ -0,0 +1,70 @@
+import { API_URL } from './api';
+
+export type ApplicationStreamEvent =
+  | { type: 'message'; id: number; application: number; message: any }
+  | { type: 'read'; application: number; reader: 'applicant' | 'shelter'; count: number; read_at: string }
+  | { type: 'status'; application: number; status: string; status_display: string; updated_at: string };
+
+/** ストリームを利用できない場合のポーリング間隔 */
+export const POLL_INTERVAL_MS = 5000;
+
+/** ストリーム接続中のポーリング間隔（再接続で再送されない既読通知・ステータス変更の取りこぼし対策） */
+export const STREAM_POLL_INTERVAL_MS = 30000;
+
+/** 読み込み済みメッセージの最後のID（購読開始時の lastEventId。メッセージが無ければ 0） */
+export function lastMessageId(messages: { id: number }[]): number {
+  return messages.reduce((max, m) => Math.max(max, m.id), 0);
+}
+
+/**
+ * 応募チャットのイベントストリーム（Server-Sent Events）を購読する。
+ *
+ * - 認証は HttpOnly Cookie（withCredentials）
+ * - lastEventId には読み込み済みの最後のメッセージIDを渡す。取得から購読開始までの間に届いたメッセージを最初に受け取る
+ * - 切断時は EventSource が Last-Event-ID 付きで自動再接続し、取りこぼしたメッセージを受け取る
+ * - サーバーがストリームを提供できない場合（WSGI 環境・複数ワーカーで Redis が無い場合など）は
+ *   onUnavailable が呼ばれるので、ポーリングに切り替える
+ * - 既読通知・ステータス変更は再接続時に再送されないため、接続中も低頻度のポーリングを併用すること
+ *
+ * @returns 購読を終了する関数
+ */
+export function subscribeApplicationStream(
+  applicationId: string | number,
+  onEvent: (event: ApplicationStreamEvent) => void,
+  onUnavailable: () => void,
+  lastEventId?: number | null,
+): () => void {
+  if (typeof window === 'undefined' || typeof EventSource === 'undefined') {
+    onUnavailable();
+    return () => {};
+  }
+
+  const params = new URLSearchParams({ application: String(applicationId) });
+  if (lastEventId != null) {
+    params.set('last_event_id', String(lastEventId));
+  }
+  const source = new EventSource(
+    `${API_URL}/api/messages/stream/?${params.toString()}`,
+    { withCredentials: true },
+  );
+
+  const handle = (e: MessageEvent) => {
+    try {
+      onEvent(JSON.parse(e.data));
+    } catch (err) {
+      console.error('Failed to parse stream event:', err);
+    }
+  };
+  source.addEventListener('message', handle);
+  source.addEventListener('read', handle as EventListener);
+  source.addEventListener('status', handle as EventListener);
+
+  source.onerror = () => {
+    // CONNECTING: 自動再接続中 / CLOSED: 再接続しない（503・401 など）
+    if (source.readyState === EventSource.CLOSED) {
+      onUnavailable();
+    }
+  };
+
+  return () => source.close();
+}
@@ -1,35 +1,47 @@
 import api from '@/lib/api';
-import { CatList, CatDetail, CatFilters, CatImage, PaginatedResponse } from '@/types';
+import { CatList, CatDetail, CatFilters, CatFacetsResponse, CatImage, PaginatedResponse } from '@/types';
+
+// 一覧・件数APIで共通の絞り込み条件パラメータ
+const buildCatParams = (filters?: CatFilters) => {
+  const params = new URLSearchParams();
+  if (filters) {
+    if (filters.search) params.append('search', filters.search);
+    if (filters.gender) params.append('gender', filters.gender);
+    if (filters.status) params.append('status', filters.status);
+    if (filters.age_category) params.append('age_category', filters.age_category);
+    if (filters.prefecture) {
+      if (Array.isArray(filters.prefecture)) {
+        filters.prefecture.forEach(p => params.append('prefecture', p));
+      } else {
+        params.append('prefecture', filters.prefecture);
+      }
+    }
+    if (filters.activity_level) params.append('activity_level', filters.activity_level);
+    if (filters.affection_level) params.append('affection_level', String(filters.affection_level));
+    if (filters.maintenance_level) params.append('maintenance_level', filters.maintenance_level);
+    if (filters.shelter_id) params.append('shelter_id', String(filters.shelter_id));
+  }
+  return params;
+};
 
 export const catsService = {
   // 保護猫一覧取得 (Paginated)
   getCats: async (filters?: CatFilters) => {
-    const params = new URLSearchParams();
-    if (filters) {
-      if (filters.search) params.append('search', filters.search);
-      if (filters.gender) params.append('gender', filters.gender);
-      if (filters.status) params.append('status', filters.status);
-      if (filters.age_category) params.append('age_category', filters.age_category);
-      if (filters.prefecture) {
-        if (Array.isArray(filters.prefecture)) {
-          filters.prefecture.forEach(p => params.append('prefecture', p));
-        } else {
-          params.append('prefecture', filters.prefecture);
-        }
-      }
-      if (filters.activity_level) params.append('activity_level', filters.activity_level);
-      if (filters.affection_level) params.append('affection_level', String(filters.affection_level));
-      if (filters.maintenance_level) params.append('maintenance_level', filters.maintenance_level);
-      if (filters.shelter_id) params.append('shelter_id', String(filters.shelter_id));
-      // Backendのページング仕様に合わせる
-      if (filters.page) params.append('page', String(filters.page));
-    }
+    const params = buildCatParams(filters);
+    // Backendのページング仕様に合わせる
+    if (filters?.page) params.append('page', String(filters.page));
     
     // NOTE: BackendでPaginatedResponse<CatList>を返すように設定変更済み前提
     const response = await api.get<PaginatedResponse<CatList>>(`/api/cats/?${params.toString()}`);
     return response.data;
   },
 
+  // 絞り込み条件ごとの件数取得（各条件は「その条件以外」の絞り込みで数える）
+  getFacets: async (filters?: CatFilters) => {
+    const response = await api.get<CatFacetsResponse>(`/api/cats/facets/?${buildCatParams(filters).toString()}`);
+    return response.data;
+  },
+
   // 保護猫詳細取得
   getCat: async (id: number) => {
     const response = await api.get<CatDetail>(`/api/cats/${id}/`);
@@ -71,10 +71,18 @@ export type Size = 'small' | 'medium' | 'large';
 export type CatStatus = 'open' | 'in_review' | 'trial' | 'adopted' | 'paused';
 export type ApplicationStatus = 'pending' | 'reviewing' | 'trial' | 'accepted' | 'rejected' | 'cancelled';
 
+export type ImageFormat = 'avif' | 'webp' | 'jpeg';
+// 派生画像（サムネイル）の URL
+export type ImageVariants = Partial<Record<ImageFormat, Record<string, string>>>;
+// <img srcset> にそのまま渡せる文字列（"URL 320w, URL 640w"）
+export type ImageSrcSet = Partial<Record<ImageFormat, string>>;
+
 export interface CatImage {
   id: number;
   image: string; // URL
   image_url: string; // Absolute URL
+  variants?: ImageVariants; // { 形式: { 幅: URL } }（生成前は空）
+  srcset?: ImageSrcSet;
   is_primary: boolean;
   sort_order: number;
   caption?: string;
@@ -100,6 +108,7 @@ export interface CatList {
   estimated_age: string;
   status: CatStatus;
   primary_image: string | null;
+  primary_image_srcset?: ImageSrcSet;
   shelter_name: string;
   created_at: string;
    // API response might include computed fields
@@ -169,6 +178,22 @@ export interface CatFilters {
   page?: number;
 }
 
+// 絞り込み条件ごとの件数（GET /api/cats/facets/）
+export interface CatFacetOption {
+  value: string | number;
+  label: string;
+  count: number;
+}
+
+export type CatFacetName =
+  | 'gender' | 'age_category' | 'prefecture' | 'activity_level'
+  | 'affection_level' | 'maintenance_level' | 'status';
+
+export interface CatFacetsResponse {
+  total: number;
+  facets: Record<CatFacetName, CatFacetOption[]>;
+}
+
 export interface Application {
   id: number;
   cat: number | CatList; // Depends on serializer depth